@@ -6,6 +6,7 @@ from app.api.routes import boards
 from app.api.routes import task
 from app.api.routes import ai_service
 from app.api.routes import dashboard
+from app.api.routes import notifications
 
 router = APIRouter()
 
@@ -16,3 +17,4 @@ router.include_router(boards.router, prefix="/api")
 router.include_router(task.router, prefix="/api")
 router.include_router(ai_service.router, prefix="/api")
 router.include_router(dashboard.router, prefix="/api")
+router.include_router(notifications.router, prefix="/api")
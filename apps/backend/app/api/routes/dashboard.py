@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from bson import ObjectId
 from app.services.dashboard_service import DashboardService
+from app.services.analytics_service import AnalyticsService
 from app.api.dependencies import get_current_user
 from app.utils.permissions import verify_user_access_to_organization
 from app.utils.logger import logger
@@ -224,3 +225,142 @@ async def get_recent_activity(
     except Exception as e:
         logger.error(f"Recent activity endpoint failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get recent activity")
+
+
+@router.get("/analytics/{org_id}")
+async def get_organization_analytics(
+    org_id: str,
+    weeks: int = Query(12, ge=1, le=52),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get org-wide analytics: status mix, weekly velocity, cycle time distribution
+    and priority mix over the last `weeks` weeks
+    """
+    try:
+        user_id = ObjectId(current_user["id"])
+        organization_id = ObjectId(org_id)
+
+        # Verify user has access to this organization
+        await verify_user_access_to_organization(
+            current_user=user_id,
+            org_id=organization_id,
+            action="view"
+        )
+
+        analytics = await AnalyticsService.get_organization_analytics(organization_id, weeks)
+
+        return {
+            "success": True,
+            "analytics": analytics
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Analytics endpoint failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get analytics")
+
+
+@router.get("/analytics/{org_id}/velocity")
+async def get_velocity(
+    org_id: str,
+    weeks: int = Query(12, ge=1, le=52),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get created vs completed tasks per week for the organization
+    """
+    try:
+        user_id = ObjectId(current_user["id"])
+        organization_id = ObjectId(org_id)
+
+        # Verify user has access to this organization
+        await verify_user_access_to_organization(
+            current_user=user_id,
+            org_id=organization_id,
+            action="view"
+        )
+
+        analytics = await AnalyticsService.get_organization_analytics(
+            organization_id, weeks, metrics=["velocity"])
+
+        return {
+            "success": True,
+            "velocity": analytics["velocity"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Velocity endpoint failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get velocity")
+
+
+@router.get("/analytics/{org_id}/throughput")
+async def get_throughput(
+    org_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get cycle time distribution of completed tasks for the organization
+    """
+    try:
+        user_id = ObjectId(current_user["id"])
+        organization_id = ObjectId(org_id)
+
+        # Verify user has access to this organization
+        await verify_user_access_to_organization(
+            current_user=user_id,
+            org_id=organization_id,
+            action="view"
+        )
+
+        analytics = await AnalyticsService.get_organization_analytics(
+            organization_id, metrics=["throughput"])
+
+        return {
+            "success": True,
+            "throughput": analytics["throughput"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Throughput endpoint failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get throughput")
+
+
+@router.get("/analytics/{org_id}/priority-mix")
+async def get_priority_mix(
+    org_id: str,
+    weeks: int = Query(12, ge=1, le=52),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get tasks created per week split by priority for the organization
+    """
+    try:
+        user_id = ObjectId(current_user["id"])
+        organization_id = ObjectId(org_id)
+
+        # Verify user has access to this organization
+        await verify_user_access_to_organization(
+            current_user=user_id,
+            org_id=organization_id,
+            action="view"
+        )
+
+        analytics = await AnalyticsService.get_organization_analytics(
+            organization_id, weeks, metrics=["priority_mix"])
+
+        return {
+            "success": True,
+            "priority_mix": analytics["priority_mix"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Priority mix endpoint failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to get priority mix")
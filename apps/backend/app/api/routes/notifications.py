@@ -0,0 +1,118 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from typing import Any, Dict, Optional
+from app.utils.logger import logger
+from app.services.notification_service import NotificationService
+from app.services.notification_push import notification_push, CLOSE
+from app.config.config import NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+from app.lib.request.notification_request import MarkNotificationsReadRequest
+from app.api.dependencies import get_current_user
+
+router = APIRouter(prefix="/notifications", tags=["notifications"])
+
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+
+
+@router.get("")
+async def list_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    unread_only: bool = Query(False),
+    current_user: dict = Depends(get_current_user)
+):
+    """List the current user's notifications, newest first"""
+    try:
+        result = await NotificationService.list_notifications(
+            ObjectId(current_user["id"]), limit=limit, cursor=cursor, unread_only=unread_only)
+        return {
+            "success": True,
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing notifications: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/unread-count")
+async def get_unread_count(current_user: dict = Depends(get_current_user)):
+    """Unread badge count, read from the per-user counter"""
+    try:
+        return {
+            "success": True,
+            "unread_count": await NotificationService.get_unread_count(ObjectId(current_user["id"]))
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting unread notification count: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.post("/mark-read")
+async def mark_notifications_read(
+    request: MarkNotificationsReadRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Mark the given notifications read, or all of them when no ids are sent"""
+    try:
+        notification_ids = None
+        if request.notification_ids is not None:
+            if not all(ObjectId.is_valid(n) for n in request.notification_ids):
+                raise HTTPException(status_code=400, detail="Invalid notification id")
+            notification_ids = [ObjectId(n) for n in request.notification_ids]
+        result = await NotificationService.mark_read(ObjectId(current_user["id"]), notification_ids)
+        return {
+            "message": "Notifications marked as read",
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error marking notifications read: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Server-sent events for the current user: `notification` for each new
+    notification and `unread_count` when the badge changes. The stream
+    starts with the current unread count; comment lines keep idle
+    connections open. Replaces polling the list endpoint.
+    """
+    user_id = ObjectId(current_user["id"])
+    unread_count = await NotificationService.get_unread_count(user_id)
+
+    async def events():
+        queue = notification_push.registry.connect(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            yield _sse({"type": "unread_count", "unread_count": unread_count})
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=NOTIFICATION_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is CLOSE:
+                    break
+                yield _sse(event)
+        finally:
+            notification_push.registry.disconnect(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Literal
 from fastapi import APIRouter, HTTPException, Depends, Query
 from datetime import datetime
 from bson import ObjectId
@@ -10,6 +10,8 @@ import app.lib.request.organization_request as org_req
 from app.utils.permissions import verify_user_access_to_organization
 from app.db.database import get_db
 from app.services.activity_service import ActivityService
+from app.services.autocomplete_service import AutocompleteService, ENTITY_TYPES
+from app.services.export_service import ExportService
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 db = get_db()
@@ -156,6 +158,37 @@ async def invite_member(
     }
 
 
+@router.post("/{org_id}/invite/bulk")
+async def bulk_invite_members(
+    org_id: str,
+    request: org_req.BulkInviteMembersRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Invite many members to organization at once"""
+    user_id = ObjectId(current_user["id"])
+    organization_id = ObjectId(org_id)
+
+    user, org = await verify_user_access_to_organization(
+        current_user=user_id,
+        org_id=organization_id,
+        action="who_can_invite_members"
+    )
+
+    result = await OrganizationService.bulk_invite_users_to_organization(
+        organization_id=organization_id,
+        emails=request.emails,
+        inviter_name=user["name"],
+        role=request.role,
+        invited_by=user_id,
+        message=request.message
+    )
+
+    return {
+        "message": f"Invitations sent to {len(result['invited'])} of {len(request.emails)} address(es)",
+        "data": result
+    }
+
+
 @router.get("/invitations/{token}")
 async def get_invitation_details(token: str):
     invitation = await db["organization_invitations"].find_one({
@@ -197,9 +230,13 @@ async def accept_invitation(
 @router.get("/{org_slug}/members")
 async def get_organization_members(
     org_slug: str,
+    q: Optional[str] = Query(None, max_length=100, description="Name or email prefix"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    count_mode: Literal["exact", "capped", "none"] = Query("exact"),
     current_user: dict = Depends(get_current_user)
 ):
-    """Get members of an organization by slug"""
+    """Get a page of members of an organization by slug"""
     user_id = ObjectId(current_user["id"])
 
     # Verify user has access to this organization
@@ -214,9 +251,74 @@ async def get_organization_members(
             action="view"
         )
 
-    members = await OrganizationService.get_organization_members_by_slug(org["slug"])
+    return await OrganizationService.get_organization_members_by_slug(
+        org["slug"], search=q, limit=limit, offset=offset, count_mode=count_mode)
+
+@router.get("/{org_id}/autocomplete")
+async def autocomplete(
+    org_id: str,
+    q: str = Query(..., min_length=1, max_length=100),
+    types: Optional[str] = Query(None, description="Comma separated: project,member,task"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Prefix suggestions for the quick switcher (served from memory)"""
+    type_list = None
+    if types:
+        type_list = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = set(type_list) - set(ENTITY_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+
+    suggestions = await AutocompleteService.suggest(
+        user_id=ObjectId(current_user["id"]),
+        organization_id=ObjectId(org_id),
+        query=q,
+        types=type_list,
+        limit=limit
+    )
+    return {"suggestions": suggestions}
+
+
+@router.get("/{org_id}/tasks/export")
+async def export_organization_tasks(
+    org_id: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    include_archived: bool = Query(False),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream all tasks the user can see in the organization as CSV or NDJSON"""
+    chunks = await ExportService.export_organization_tasks(
+        user_id=ObjectId(current_user["id"]),
+        organization_id=ObjectId(org_id),
+        export_format=format,
+        include_archived=include_archived
+    )
+    return ExportService.to_response(chunks, f"tasks-{org_id}", format, compress=gzip)
+
+
+@router.get("/{org_id}/activities/export")
+async def export_organization_activities(
+    org_id: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    project_id: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream organization activities as CSV or NDJSON"""
+    chunks = await ExportService.export_organization_activities(
+        user_id=ObjectId(current_user["id"]),
+        organization_id=ObjectId(org_id),
+        export_format=format,
+        project_id=ObjectId(project_id) if project_id else None,
+        date_from=date_from,
+        date_to=date_to
+    )
+    return ExportService.to_response(chunks, f"activities-{org_id}", format, compress=gzip)
 
-    return { "members": members }
 
 @router.post("/{org_id}/tasks/search")
 async def search_organization_tasks(
@@ -241,7 +343,9 @@ async def search_organization_tasks(
         offset=request.offset,
         status=request.status,
         priority=request.priority,
-        assignee_id=assignee_obj_id
+        assignee_id=assignee_obj_id,
+        cursor=request.cursor,
+        count_mode=request.count_mode
     )
     
     return result
@@ -270,7 +374,27 @@ async def get_organization_activities(
         project_id=project_obj_id,
         date_from=request.date_from,
         date_to=request.date_to,
-        user_filter_id=user_filter_obj_id
+        user_filter_id=user_filter_obj_id,
+        cursor=request.cursor,
+        count_mode=request.count_mode
     )
     
-    return result
\ No newline at end of file
+    return result
+
+
+@router.post("/{org_id}/activities/summaries")
+async def get_organization_activity_summaries(
+    org_id: str,
+    request: org_req.GetOrganizationActivitySummariesRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get daily activity summaries for the period past the raw activity retention window"""
+    project_obj_id = ObjectId(request.project_id) if request.project_id else None
+
+    return await ActivityService.get_organization_activity_summaries(
+        user_id=ObjectId(current_user["id"]),
+        organization_id=ObjectId(org_id),
+        project_id=project_obj_id,
+        before=request.before,
+        days=request.days
+    )
\ No newline at end of file
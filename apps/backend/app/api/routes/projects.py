@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Literal, Optional
 from datetime import datetime
 from bson import ObjectId
 from app.services.project_service import ProjectService
+from app.services.export_service import ExportService
+from app.services.import_service import ImportService
 from app.api.dependencies import get_current_user
 from app.db.enums import UserRole
 from app.db.enums import InvitationStatus
@@ -78,19 +81,19 @@ async def add_project_members(
 async def get_member_projects(
     organization_id: str,
     project_slug: str,
+    q: Optional[str] = Query(None, max_length=100, description="Name or email prefix"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    count_mode: Literal["exact", "capped", "none"] = Query("exact"),
     current_user=Depends(get_current_user),
 ):
-    """Get all member projects for a specific organization"""
+    """Get a page of project members for a specific organization"""
     
     user_id = ObjectId(current_user["id"])
     org_id = ObjectId(organization_id)
-    members = await project_service.get_project_members_by_slug(user_id, org_id, project_slug)
-    total = len(members)
-
-    return {
-        "members": members,
-        "total": total,
-    }
+    return await project_service.get_project_members_by_slug(
+        user_id, org_id, project_slug, search=q, limit=limit,
+        offset=offset, count_mode=count_mode)
 
 
 @router.get("/{org_id}/sidebar-projects")
@@ -141,4 +144,63 @@ async def list_projects(
     return {
         "projects": projects,
         "total": total,
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/{project_id}/tasks/export")
+async def export_project_tasks(
+    project_id: str,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    include_archived: bool = Query(False),
+    current_user=Depends(get_current_user),
+):
+    """Stream all tasks of a project as CSV or NDJSON"""
+    chunks = await ExportService.export_project_tasks(
+        user_id=ObjectId(current_user["id"]),
+        project_id=ObjectId(project_id),
+        export_format=format,
+        include_archived=include_archived
+    )
+    return ExportService.to_response(chunks, f"tasks-{project_id}", format, compress=gzip)
+
+
+@router.post("/{project_id}/imports")
+async def create_task_import(
+    project_id: str,
+    request: project_request.CreateTaskImportRequest,
+    current_user=Depends(get_current_user),
+):
+    """Create an import job; the file is then uploaded to /projects/imports/{job_id}/data"""
+    job = await ImportService.create_job(
+        user_id=ObjectId(current_user["id"]),
+        project_id=ObjectId(project_id),
+        import_format=request.format,
+        board_id=ObjectId(request.board_id) if request.board_id else None
+    )
+    return {"message": "Import job created", "job": job}
+
+
+@router.put("/imports/{job_id}/data")
+async def upload_task_import(
+    job_id: str,
+    request: Request,
+    current_user=Depends(get_current_user),
+):
+    """Stream the CSV/NDJSON file as the raw request body and import it"""
+    job = await ImportService.run_job(
+        user_id=ObjectId(current_user["id"]),
+        job_id=ObjectId(job_id),
+        chunks=request.stream()
+    )
+    return {"job": job}
+
+
+@router.get("/imports/{job_id}")
+async def get_task_import(
+    job_id: str,
+    current_user=Depends(get_current_user),
+):
+    """Progress and row-level errors of an import job"""
+    job = await ImportService.get_job(ObjectId(current_user["id"]), ObjectId(job_id))
+    return {"job": job}
@@ -4,7 +4,7 @@ from typing import Optional
 from app.utils.logger import logger
 from app.services.task_service import TaskService
 from app.models.task import TaskCreate
-from app.lib.request.task_request import TaskCreateRequest, TaskUpdatePositionRequest, TaskUpdateRequest, TaskUpdateStatusRequest
+from app.lib.request.task_request import TaskCreateRequest, TaskUpdatePositionRequest, TaskUpdateRequest, TaskUpdateStatusRequest, BulkTaskUpdateRequest
 from app.db.enums import UserRole
 from app.utils.permissions import verify_user_access_to_project
 from app.api.dependencies import get_current_user
@@ -53,7 +53,8 @@ async def update_task_position(
             user_id,
             task_object_id,
             task.new_position,
-            task.column_id
+            task.column_id,
+            task.version
         )
         return {
             "message": "Task position updated successfully",
@@ -83,6 +84,7 @@ async def change_task_status(
             user_id,
             task_object_id,
             task.new_column_id,
+            task.version
         )
         return {
             "message": "Task status changed successfully",
@@ -111,7 +113,8 @@ async def update_task_partial(
         result = await TaskService.update_task_partial(
             user_id,
             task_object_id,
-            task_data.updates
+            task_data.updates,
+            task_data.version
         )
         return {
             "message": "Task updated successfully",
@@ -124,6 +127,33 @@ async def update_task_partial(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.put("/bulk-update")
+async def bulk_update_tasks(
+    request: BulkTaskUpdateRequest,
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Apply the same changes (assignee, priority, labels, due date, archive)
+    to a list of tasks or to every task matching a filter.
+    """
+    try:
+        result = await TaskService.bulk_update_tasks(
+            user_id=ObjectId(current_user["id"]),
+            patch=request.patch.model_dump(exclude_unset=True),
+            task_ids=[ObjectId(task_id) for task_id in request.task_ids] if request.task_ids else None,
+            task_filter=request.filter.model_dump() if request.filter else None
+        )
+        return {
+            "message": "Tasks updated successfully",
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk updating tasks: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 @router.delete("/{task_id}")
 async def delete_task(
     task_id: str,
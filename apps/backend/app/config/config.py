@@ -29,3 +29,87 @@ OPENAI_TEMPERATURE=0.7
 AI_REQUESTS_PER_MINUTE=10
 AI_REQUESTS_PER_HOUR=20
 
+# Activity writer (buffered activity logging)
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", 500))
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", 1.0))
+ACTIVITY_BUFFER_MAX = int(os.getenv("ACTIVITY_BUFFER_MAX", 20000))
+
+# Actor snapshots on activities
+ACTOR_CACHE_TTL_SECONDS = int(os.getenv("ACTOR_CACHE_TTL_SECONDS", 300))
+ACTOR_SNAPSHOT_REFRESH_INTERVAL_SECONDS = int(os.getenv("ACTOR_SNAPSHOT_REFRESH_INTERVAL_SECONDS", 60))
+ACTOR_SNAPSHOT_REFRESH_LEASE_SECONDS = int(os.getenv("ACTOR_SNAPSHOT_REFRESH_LEASE_SECONDS", 600))
+
+# Activity retention (raw events are compacted into daily summaries)
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", 90))
+ACTIVITY_ROLLUP_INTERVAL_SECONDS = int(os.getenv("ACTIVITY_ROLLUP_INTERVAL_SECONDS", 3600))
+ACTIVITY_ROLLUP_BATCH_SIZE = int(os.getenv("ACTIVITY_ROLLUP_BATCH_SIZE", 5000))
+ACTIVITY_ROLLUP_LEASE_SECONDS = int(os.getenv("ACTIVITY_ROLLUP_LEASE_SECONDS", 1800))
+
+# Listing pagination
+PAGINATION_COUNT_CAP = int(os.getenv("PAGINATION_COUNT_CAP", 1000))
+
+# Autocomplete (in-memory per-organization prefix index)
+AUTOCOMPLETE_MAX_ORGS = int(os.getenv("AUTOCOMPLETE_MAX_ORGS", 32))
+AUTOCOMPLETE_INDEX_TTL_SECONDS = int(os.getenv("AUTOCOMPLETE_INDEX_TTL_SECONDS", 600))
+
+# Streaming exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Streaming task imports
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+IMPORT_MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", 65536))
+
+# Bulk task updates
+BULK_UPDATE_MAX_TASKS = int(os.getenv("BULK_UPDATE_MAX_TASKS", 1000))
+
+# Background job queue
+JOB_WORKER_IN_PROCESS = os.getenv("JOB_WORKER_IN_PROCESS", "true").lower() == "true"
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 60))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1.0))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 3600))
+JOB_DEFAULT_CONCURRENCY = int(os.getenv("JOB_DEFAULT_CONCURRENCY", 4))
+JOB_DONE_RETENTION_HOURS = int(os.getenv("JOB_DONE_RETENTION_HOURS", 24))
+
+# Outbound email (pooled SMTP delivery)
+MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.gmail.com")
+MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() == "true"
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "false").lower() == "true"
+MAIL_FROM_NAME = os.getenv("MAIL_FROM_NAME", "TaskForge")
+MAIL_FROM_ADDRESS = os.getenv("MAIL_FROM_ADDRESS", EMAIL_USER or "no-reply@localhost")
+MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", 2))
+MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("MAIL_MAX_MESSAGES_PER_CONNECTION", 100))
+MAIL_IDLE_TIMEOUT_SECONDS = float(os.getenv("MAIL_IDLE_TIMEOUT_SECONDS", 60))
+MAIL_TIMEOUT_SECONDS = float(os.getenv("MAIL_TIMEOUT_SECONDS", 30))
+# Per process: the API and every job worker each get this budget
+MAIL_RATE_PER_MINUTE = int(os.getenv("MAIL_RATE_PER_MINUTE", 60))
+# Tokens that low priority (bulk) sends must leave for OTP and other transactional mail
+MAIL_PRIORITY_RESERVE = int(os.getenv("MAIL_PRIORITY_RESERVE", 3))
+
+# Bulk organization invitations
+INVITE_BULK_MAX_EMAILS = int(os.getenv("INVITE_BULK_MAX_EMAILS", 500))
+INVITE_EMAIL_BATCH_SIZE = int(os.getenv("INVITE_EMAIL_BATCH_SIZE", 100))
+
+# Notifications
+NOTIFICATION_DUE_SOON_HOURS = int(os.getenv("NOTIFICATION_DUE_SOON_HOURS", 24))
+NOTIFICATION_REMINDER_INTERVAL_SECONDS = int(os.getenv("NOTIFICATION_REMINDER_INTERVAL_SECONDS", 900))
+NOTIFICATION_REMINDER_BATCH_SIZE = int(os.getenv("NOTIFICATION_REMINDER_BATCH_SIZE", 500))
+NOTIFICATION_REMINDER_LEASE_SECONDS = int(os.getenv("NOTIFICATION_REMINDER_LEASE_SECONDS", 600))
+
+# Real-time notification push (server-sent events)
+NOTIFICATION_BROADCAST_BACKEND = os.getenv("NOTIFICATION_BROADCAST_BACKEND", "mongo")  # "mongo" or "local"
+NOTIFICATION_EVENTS_COLLECTION = os.getenv("NOTIFICATION_EVENTS_COLLECTION", "notification_events")
+NOTIFICATION_EVENTS_CAPPED_BYTES = int(os.getenv("NOTIFICATION_EVENTS_CAPPED_BYTES", 16 * 1024 * 1024))
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", 100))
+NOTIFICATION_STREAM_MAX_PER_USER = int(os.getenv("NOTIFICATION_STREAM_MAX_PER_USER", 5))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", 20))
+
+# Weekly digest emails
+DIGEST_WEEKDAY = int(os.getenv("DIGEST_WEEKDAY", 0))  # 0 = Monday, UTC
+DIGEST_HOUR = int(os.getenv("DIGEST_HOUR", 8))
+DIGEST_CHECK_INTERVAL_SECONDS = int(os.getenv("DIGEST_CHECK_INTERVAL_SECONDS", 900))
+DIGEST_EMAIL_BATCH_SIZE = int(os.getenv("DIGEST_EMAIL_BATCH_SIZE", 100))
+DIGEST_RUN_LEASE_SECONDS = int(os.getenv("DIGEST_RUN_LEASE_SECONDS", 1800))
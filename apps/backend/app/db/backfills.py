@@ -0,0 +1,100 @@
+"""
+Resumable data backfills for denormalized fields.
+
+Each backfill records its progress in the `migration_state` collection, so an
+interrupted run continues from the last finished batch. Updates only touch
+documents that are still missing the field, which makes re-runs safe.
+
+Run from apps/backend:
+    python -m app.db.backfills organization_id actor_snapshot memberships
+"""
+import asyncio
+import sys
+from typing import Dict, Any
+from app.db.database import get_db
+from app.utils.logger import logger
+from app.services.actor_snapshot_service import ActorSnapshotService
+from app.services.membership_service import MembershipService
+
+db = get_db()
+
+STATE_COLLECTION = "migration_state"
+
+
+async def _get_state(name: str) -> Dict[str, Any]:
+    return await db[STATE_COLLECTION].find_one({"_id": name}) or {}
+
+
+async def _save_state(name: str, **fields) -> None:
+    await db[STATE_COLLECTION].update_one(
+        {"_id": name},
+        {"$set": fields},
+        upsert=True
+    )
+
+
+async def backfill_organization_ids(batch_size: int = 200) -> Dict[str, int]:
+    """Copy projects.organization_id onto their tasks and activities"""
+    name = "backfill_organization_id"
+    state = await _get_state(name)
+    if state.get("completed"):
+        logger.info(f"{name} already completed, skipping")
+        return {"tasks": 0, "activities": 0}
+
+    last_project_id = state.get("last_project_id")
+    totals = {"tasks": 0, "activities": 0}
+
+    while True:
+        query = {"_id": {"$gt": last_project_id}} if last_project_id else {}
+        projects = await db["projects"].find(
+            query, {"_id": 1, "organization_id": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not projects:
+            break
+
+        for project in projects:
+            missing = {"project_id": project["_id"], "organization_id": None}
+            update = {"$set": {"organization_id": project["organization_id"]}}
+            tasks_result = await db["tasks"].update_many(missing, update)
+            activities_result = await db["activities"].update_many(missing, update)
+            totals["tasks"] += tasks_result.modified_count
+            totals["activities"] += activities_result.modified_count
+
+        last_project_id = projects[-1]["_id"]
+        await _save_state(name, last_project_id=last_project_id)
+        logger.info(
+            f"{name}: processed projects up to {last_project_id} "
+            f"({totals['tasks']} tasks, {totals['activities']} activities so far)")
+
+    # Organization-level activities without a project keep the id in metadata
+    result = await db["activities"].update_many(
+        {
+            "organization_id": None,
+            "project_id": None,
+            "metadata.organization_id": {"$type": "string"}
+        },
+        [{"$set": {"organization_id": {"$toObjectId": "$metadata.organization_id"}}}]
+    )
+    totals["activities"] += result.modified_count
+
+    await _save_state(name, completed=True)
+    logger.info(f"{name} completed: {totals}")
+    return totals
+
+
+BACKFILLS = {
+    "organization_id": backfill_organization_ids,
+    "actor_snapshot": ActorSnapshotService.refresh_changed_users,
+    "memberships": MembershipService.backfill,
+}
+
+
+async def run_backfills(*names: str) -> None:
+    for backfill_name in names or BACKFILLS.keys():
+        if backfill_name not in BACKFILLS:
+            raise ValueError(f"Unknown backfill: {backfill_name}")
+        await BACKFILLS[backfill_name]()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_backfills(*sys.argv[1:]))
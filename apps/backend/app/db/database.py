@@ -1,5 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.config.config import MONGO_URI, MONGO_DB_NAME
+from pymongo.errors import CollectionInvalid
+from app.config.config import (
+    MONGO_URI,
+    MONGO_DB_NAME,
+    NOTIFICATION_EVENTS_COLLECTION,
+    NOTIFICATION_EVENTS_CAPPED_BYTES
+)
 
 client = AsyncIOMotorClient(MONGO_URI)
 # db = client[MONGO_DB_NAME]
@@ -17,6 +23,7 @@ async def ensure_indexes():
     # User indexes
     await db["users"].create_index("organization_id")
     await db["users"].create_index("role")
+    await db["users"].create_index([("profile_updated_at", 1), ("_id", 1)])
 
     # Organization indexes
     await db["organizations"].create_index("slug", unique=True)
@@ -39,6 +46,15 @@ async def ensure_indexes():
     await db["tasks"].create_index([("project_id", 1), ("status", 1)])
     await db["tasks"].create_index([("assignee_id", 1), ("status", 1)])
     await db["tasks"].create_index([("board_id", 1), ("column_id", 1), ("position", 1)])
+    await db["tasks"].create_index([("organization_id", 1), ("archived", 1), ("updated_at", -1), ("_id", -1)])
+    await db["tasks"].create_index([("organization_id", 1), ("_id", -1)])
+    await db["tasks"].create_index([("organization_id", 1), ("due_date", 1)])
+    await db["tasks"].create_index(
+        [("organization_id", 1), ("title", "text"), ("labels", "text"), ("description", "text")],
+        weights={"title": 10, "labels": 5, "description": 1},
+        language_override="text_language",
+        name="tasks_org_text_search"
+    )
 
     # Board indexes
     await db["boards"].create_index("project_id")
@@ -50,11 +66,45 @@ async def ensure_indexes():
     await db["activities"].create_index("created_at")
     await db["activities"].create_index([("project_id", 1), ("created_at", -1)])
     await db["activities"].create_index([("user_id", 1), ("created_at", -1)])
+    await db["activities"].create_index([("organization_id", 1), ("created_at", -1), ("_id", -1)])
+    await db["activities"].create_index([("organization_id", 1), ("project_id", 1), ("created_at", -1), ("_id", -1)])
+    await db["activities"].create_index("rollup_id", sparse=True)
+    await db["activities"].create_index("expire_at", expireAfterSeconds=0)
+
+    # Activity summary indexes (daily rollups of expired activities)
+    await db["activity_summaries"].create_index([("organization_id", 1), ("date", -1), ("project_id", 1)])
+
+    # Membership indexes (one row per user and organization or project)
+    await db["memberships"].create_index([("user_id", 1), ("scope_id", 1)], unique=True)
+    await db["memberships"].create_index([("scope_id", 1), ("role", 1)])
+    await db["memberships"].create_index([("user_id", 1), ("organization_id", 1)])
+    await db["memberships"].create_index([("scope_id", 1), ("search_name", 1), ("user_id", 1)])
+    await db["memberships"].create_index([("scope_id", 1), ("search_email", 1)])
+
+    # Import job indexes
+    await db["import_jobs"].create_index([("project_id", 1), ("created_at", -1)])
+    await db["import_jobs"].create_index([("user_id", 1), ("status", 1)])
+
+    # Background job queue indexes
+    await db["jobs"].create_index([("status", 1), ("type", 1), ("priority", -1), ("run_at", 1)])
+    await db["jobs"].create_index([("status", 1), ("lease_until", 1)])
+    await db["jobs"].create_index("expire_at", expireAfterSeconds=0)
 
     # Notification indexes
     await db["notifications"].create_index("recipient_id")
     await db["notifications"].create_index([("recipient_id", 1), ("read", 1)])
     await db["notifications"].create_index("created_at")
+    await db["notifications"].create_index([("recipient_id", 1), ("created_at", -1), ("_id", -1)])
+    await db["notifications"].create_index([("recipient_id", 1), ("read", 1), ("created_at", -1), ("_id", -1)])
+    await db["notifications"].create_index([("type", 1), ("created_at", 1)])
+
+    # Capped collection the web workers tail for real-time notification push
+    if NOTIFICATION_EVENTS_COLLECTION not in await db.list_collection_names():
+        try:
+            await db.create_collection(
+                NOTIFICATION_EVENTS_COLLECTION, capped=True, size=NOTIFICATION_EVENTS_CAPPED_BYTES)
+        except CollectionInvalid:
+            pass  # created by another worker
 
     # Calendar event indexes
     await db["calendar_events"].create_index("start_time")
@@ -69,6 +119,7 @@ async def ensure_indexes():
     await db["organization_invitations"].create_index([("token", 1)], unique=True)
     await db["organization_invitations"].create_index([("email", 1)])
     await db["organization_invitations"].create_index([("organization_id", 1)])
+    await db["organization_invitations"].create_index([("organization_id", 1), ("email", 1), ("status", 1)])
 
     # AI Rate Limiting indexes
     await db["ai_rate_limits"].create_index([("user_id", 1), ("action_type", 1), ("date", 1)], unique=True)
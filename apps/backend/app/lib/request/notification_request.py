@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class MarkNotificationsReadRequest(BaseModel):
+    # Leave out to mark every unread notification read
+    notification_ids: Optional[List[str]] = Field(None, max_length=500)
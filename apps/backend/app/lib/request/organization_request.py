@@ -1,7 +1,8 @@
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from app.db.enums import ActivityType, TaskPriority, TaskStatus, UserRole
+from app.config.config import INVITE_BULK_MAX_EMAILS
 
 
 class CreateTeamOrganizationRequest(BaseModel):
@@ -14,15 +15,24 @@ class InviteMemberRequest(BaseModel):
     role: UserRole = UserRole.MEMBER
     message: Optional[str] = None
 
+
+class BulkInviteMembersRequest(BaseModel):
+    # Plain strings so one bad address is reported per address instead of failing the request
+    emails: List[str] = Field(..., min_length=1, max_length=INVITE_BULK_MAX_EMAILS)
+    role: UserRole = UserRole.MEMBER
+    message: Optional[str] = None
+
     
 class GetOrganizationTasksRequest(BaseModel):
     project_id: Optional[str] = Field(None, description="Filter by specific project ID")
     limit: int = Field(20, ge=1, le=100, description="Number of tasks per page")
     offset: int = Field(0, ge=0, description="Number of tasks to skip")
-    search: Optional[str] = Field(None, description="Search tasks by title ")
+    search: Optional[str] = Field(None, description="Full-text search over task title, labels and description")
     status: Optional[TaskStatus] = Field(None, description="Filter by task status")
     priority: Optional[TaskPriority] = Field(None, description="Filter by task priority")
     assignee_id: Optional[str] = Field(None, description="Filter by assignee ID")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page (replaces offset)")
+    count_mode: Literal["exact", "capped", "none"] = Field("exact", description="How to compute total")
     
     
 class GetOrganizationActivitiesRequest(BaseModel):
@@ -33,3 +43,11 @@ class GetOrganizationActivitiesRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="Filter by specific user ID")
     date_from: Optional[datetime] = Field(None, description="Filter activities from this date")
     date_to: Optional[datetime] = Field(None, description="Filter activities to this date")
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page (replaces offset)")
+    count_mode: Literal["exact", "capped", "none"] = Field("exact", description="How to compute total")
+
+
+class GetOrganizationActivitySummariesRequest(BaseModel):
+    project_id: Optional[str] = Field(None, description="Filter by specific project ID")
+    before: Optional[datetime] = Field(None, description="Return days before this date (defaults to the raw retention window start)")
+    days: int = Field(7, ge=1, le=92, description="Number of days per page")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from app.models.project import ProjectStatus
 
 
@@ -25,4 +25,9 @@ class ListProjectQueryRequest(BaseModel):
     status: Optional[ProjectStatus] = None  # ProjectStatus enum value
     archived: Optional[bool] = None
     limit: Optional[int] = 10
-    offset: Optional[int] = 0
\ No newline at end of file
+    offset: Optional[int] = 0
+
+
+class CreateTaskImportRequest(BaseModel):
+    format: Literal["csv", "ndjson"] = "csv"
+    board_id: Optional[str] = None  # Defaults to the project's board
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from app.models.task import TaskPriority
+from app.models.task import TaskPriority, TaskStatus
 
 class TaskCreateRequest(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
@@ -14,15 +14,45 @@ class TaskCreateRequest(BaseModel):
     due_date: Optional[datetime] = None
     estimated_hours: Optional[float] = None
     labels: List[str] = []
+    mentions: List[str] = []  # user ids mentioned in the description
     
 class TaskUpdatePositionRequest(BaseModel):
     new_position: float
     column_id: str
+    version: Optional[int] = None  # Last version seen by the client
     
 class TaskUpdateStatusRequest(BaseModel):
     task_id: str
     new_column_id: str
+    version: Optional[int] = None
 
 class TaskUpdateRequest(BaseModel):
     task_id: str
-    updates: Dict[str, Any]
\ No newline at end of file
+    updates: Dict[str, Any]
+    version: Optional[int] = None
+
+
+class BulkTaskFilter(BaseModel):
+    project_id: str
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    assignee_id: Optional[str] = None
+    column_id: Optional[str] = None
+    label: Optional[str] = None
+    archived: bool = False
+
+
+class BulkTaskPatch(BaseModel):
+    # Fields left out are not touched; an explicit null assignee_id or due_date clears it
+    assignee_id: Optional[str] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[datetime] = None
+    archived: Optional[bool] = None
+    add_labels: List[str] = []
+    remove_labels: List[str] = []
+
+
+class BulkTaskUpdateRequest(BaseModel):
+    task_ids: Optional[List[str]] = None
+    filter: Optional[BulkTaskFilter] = None
+    patch: BulkTaskPatch
@@ -4,12 +4,38 @@ from app.db.database import get_db, ensure_indexes
 from app.utils.logger import logger
 from app.api import router as api_router
 from app.api.middlewares.middleware import LoggingMiddleware, add_cors_middleware
+from app.services.activity_writer import activity_writer
+from app.services.actor_snapshot_service import ActorSnapshotService
+from app.services.activity_retention_service import ActivityRetentionService
+from app.services.notification_service import NotificationService
+from app.services.notification_push import notification_push
+from app.services.digest_service import DigestService
+from app.services.job_worker import job_worker
+from app.services.mail_delivery import mail_delivery
+from app.utils.periodic import PeriodicTask
+from app.config.config import (
+    ACTOR_SNAPSHOT_REFRESH_INTERVAL_SECONDS,
+    ACTIVITY_ROLLUP_INTERVAL_SECONDS,
+    NOTIFICATION_REMINDER_INTERVAL_SECONDS,
+    DIGEST_CHECK_INTERVAL_SECONDS,
+    JOB_WORKER_IN_PROCESS
+)
 
 app = FastAPI()
 
 add_cors_middleware(app)
 app.add_middleware(LoggingMiddleware)
 
+periodic_tasks = [
+    PeriodicTask("actor_snapshot_refresh", ActorSnapshotService.refresh_changed_users,
+                 ACTOR_SNAPSHOT_REFRESH_INTERVAL_SECONDS),
+    PeriodicTask("activity_rollup", ActivityRetentionService.compact_expired_activities,
+                 ACTIVITY_ROLLUP_INTERVAL_SECONDS),
+    PeriodicTask("due_date_reminders", NotificationService.send_due_reminders,
+                 NOTIFICATION_REMINDER_INTERVAL_SECONDS),
+    PeriodicTask("weekly_digest", DigestService.run_if_due, DIGEST_CHECK_INTERVAL_SECONDS),
+]
+
 
 @app.on_event("startup")
 async def startup_db_check():
@@ -20,6 +46,33 @@ async def startup_db_check():
         logger.info("MongoDB connected successfully.")
     except Exception as e:
         logger.error(f"MongoDB connection failed: {e}")
+    activity_writer.start()
+    notification_push.start()
+    for task in periodic_tasks:
+        task.start()
+    if JOB_WORKER_IN_PROCESS:
+        job_worker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_background_tasks():
+    for task in periodic_tasks:
+        await task.stop()
+    await job_worker.stop()
+    await notification_push.stop()
+    await mail_delivery.close()
+    await activity_writer.stop()
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "activity_writer": activity_writer.get_metrics(),
+        "job_worker": job_worker.get_metrics(),
+        "mail_delivery": mail_delivery.get_metrics(),
+        "notification_push": notification_push.get_metrics()
+    }
 
 
 app.include_router(api_router)
@@ -1,17 +1,42 @@
+from datetime import datetime
 from typing import Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from app.db.base import BaseDocument, PyObjectId
 from app.db.enums import ActivityType
 
 
+class ActorSnapshot(BaseModel):
+    name: str = ""
+    avatar: Optional[str] = None
+    initials: str = ""
+
+
 class Activity(BaseDocument):
     type: ActivityType
     user_id: PyObjectId
+    actor: Optional[ActorSnapshot] = None  # denormalized from users
     project_id: Optional[PyObjectId] = None
+    organization_id: Optional[PyObjectId] = None  # denormalized from project
     task_id: Optional[PyObjectId] = None
     target_user_id: Optional[PyObjectId] = None
     metadata: Dict[str, Any] = {}
     description: str
+    expire_at: Optional[datetime] = None  # set once rolled into activity_summaries
+
+
+class ActivitySummary(BaseModel):
+    """Daily per-project rollup of activities past the retention window"""
+    id: str = Field(alias="_id")
+    organization_id: PyObjectId
+    project_id: Optional[PyObjectId] = None
+    date: datetime
+    total: int = 0
+    by_type: Dict[str, int] = {}
+    by_user: Dict[str, Dict[str, Any]] = {}
+
+    class Config:
+        populate_by_name = True
+        arbitrary_types_allowed = True
 
 
 class ActivityCreate(BaseModel):
@@ -38,6 +38,7 @@ class Task(BaseDocument):
     status: TaskStatus = TaskStatus.TODO
     priority: TaskPriority = TaskPriority.NO_PRIORITY
     project_id: PyObjectId
+    organization_id: Optional[PyObjectId] = None  # denormalized from project
     board_id: Optional[PyObjectId] = None
     column_id: Optional[str] = None
     creator_id: PyObjectId
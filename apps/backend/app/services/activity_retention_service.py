@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.db.database import get_db
+from app.config.config import (
+    ACTIVITY_RETENTION_DAYS,
+    ACTIVITY_ROLLUP_BATCH_SIZE,
+    ACTIVITY_ROLLUP_LEASE_SECONDS
+)
+from app.utils.logger import logger
+
+db = get_db()
+
+STATE_COLLECTION = "migration_state"
+ROLLUP_STATE_ID = "activity_rollup"
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ActivityRetentionService:
+    """
+    Compacts raw activities older than ACTIVITY_RETENTION_DAYS into one
+    `activity_summaries` document per project and day, then lets the raw rows
+    expire through the TTL index on `activities.expire_at`.
+
+    A run first tags the rows it owns with a run id (saved in migration_state),
+    in batches of ACTIVITY_ROLLUP_BATCH_SIZE, folds them into the summaries
+    and only then sets expire_at. A lease on the state document lets only one
+    worker roll up at a time, so the pending run id is never replaced while
+    its rows are still tagged. An interrupted run is resumed with the same id
+    once its lease runs out, and summaries record the runs already applied to
+    them, so no event is counted twice or lost.
+    """
+
+    @staticmethod
+    def get_raw_window_start(now: Optional[datetime] = None) -> datetime:
+        """Oldest moment for which raw activities are still kept"""
+        now = now or datetime.utcnow()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=ACTIVITY_RETENTION_DAYS)
+
+    @staticmethod
+    def summary_key(organization_id: ObjectId, project_id: Optional[ObjectId], day: datetime) -> str:
+        return f"{organization_id}:{project_id or 'organization'}:{day.strftime('%Y-%m-%d')}"
+
+    @staticmethod
+    async def compact_expired_activities(now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+        """
+        Roll raw activities past the retention window into daily summaries.
+        Returns None when another worker holds the rollup lease.
+        """
+        now = now or datetime.utcnow()
+        state = await ActivityRetentionService._claim_rollup(now)
+        if state is None:
+            return None
+
+        run_id = state.get("pending_run")
+        cutoff = state.get("cutoff")
+        if not run_id:
+            run_id = ObjectId()
+            cutoff = ActivityRetentionService.get_raw_window_start(now)
+            await db[STATE_COLLECTION].update_one(
+                {"_id": ROLLUP_STATE_ID},
+                {"$set": {"pending_run": run_id, "cutoff": cutoff}}
+            )
+        # Also finishes the tagging of a resumed run that stopped part way
+        await ActivityRetentionService._tag_expired(run_id, cutoff)
+
+        groups = await db["activities"].aggregate([
+            {"$match": {"rollup_id": run_id}},
+            {"$group": {
+                "_id": {
+                    "organization_id": "$organization_id",
+                    "project_id": "$project_id",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                    "type": "$type",
+                    "user_id": "$user_id"
+                },
+                "count": {"$sum": 1},
+                "actor": {"$last": "$actor"}
+            }}
+        ]).to_list(length=None)
+
+        summaries = ActivityRetentionService._fold_groups(groups)
+        applied = await ActivityRetentionService._apply_summaries(summaries, run_id)
+
+        expired = await db["activities"].update_many(
+            {"rollup_id": run_id},
+            {"$set": {"expire_at": datetime.utcnow()}}
+        )
+        await db[STATE_COLLECTION].update_one(
+            {"_id": ROLLUP_STATE_ID},
+            {
+                "$unset": {"pending_run": "", "cutoff": ""},
+                "$set": {"last_run_at": datetime.utcnow(), "lease_until": None}
+            }
+        )
+
+        result = {"activities": expired.modified_count, "summaries": applied}
+        if expired.modified_count:
+            logger.info(f"Compacted activities older than {cutoff.date()}: {result}")
+        return result
+
+    @staticmethod
+    async def _claim_rollup(now: datetime) -> Optional[Dict[str, Any]]:
+        """Take the rollup lease; None while another worker holds it"""
+        try:
+            return await db[STATE_COLLECTION].find_one_and_update(
+                {
+                    "_id": ROLLUP_STATE_ID,
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+                },
+                {"$set": {"lease_until": now + timedelta(seconds=ACTIVITY_ROLLUP_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None
+
+    @staticmethod
+    async def _tag_expired(run_id: ObjectId, cutoff: datetime) -> int:
+        """Tag untagged rows before `cutoff` with the run id, one bounded batch at a time"""
+        tagged = 0
+        query = {
+            "created_at": {"$lt": cutoff},
+            "rollup_id": {"$exists": False},
+            "organization_id": {"$ne": None}
+        }
+        while True:
+            rows = await db["activities"].find(query, {"_id": 1}).limit(
+                ACTIVITY_ROLLUP_BATCH_SIZE).to_list(length=ACTIVITY_ROLLUP_BATCH_SIZE)
+            if not rows:
+                break
+            result = await db["activities"].update_many(
+                {"_id": {"$in": [row["_id"] for row in rows]}, "rollup_id": {"$exists": False}},
+                {"$set": {"rollup_id": run_id}}
+            )
+            tagged += result.modified_count
+            await db[STATE_COLLECTION].update_one(
+                {"_id": ROLLUP_STATE_ID},
+                {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=ACTIVITY_ROLLUP_LEASE_SECONDS)}}
+            )
+            if len(rows) < ACTIVITY_ROLLUP_BATCH_SIZE:
+                break
+        return tagged
+
+    @staticmethod
+    def _fold_groups(groups: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Merge (project, day, type, user) counts into one summary per project and day"""
+        summaries: Dict[str, Dict[str, Any]] = {}
+        for group in groups:
+            key_fields = group["_id"]
+            day = datetime.strptime(key_fields["day"], "%Y-%m-%d")
+            key = ActivityRetentionService.summary_key(
+                key_fields["organization_id"], key_fields.get("project_id"), day)
+
+            summary = summaries.setdefault(key, {
+                "organization_id": key_fields["organization_id"],
+                "project_id": key_fields.get("project_id"),
+                "date": day,
+                "total": 0,
+                "by_type": {},
+                "by_user": {},
+                "actors": {}
+            })
+            count = group["count"]
+            activity_type = str(key_fields["type"])
+            user_key = str(key_fields["user_id"])
+
+            summary["total"] += count
+            summary["by_type"][activity_type] = summary["by_type"].get(activity_type, 0) + count
+            summary["by_user"][user_key] = summary["by_user"].get(user_key, 0) + count
+            if group.get("actor"):
+                summary["actors"][user_key] = group["actor"]
+        return summaries
+
+    @staticmethod
+    async def _apply_summaries(summaries: Dict[str, Dict[str, Any]], run_id: ObjectId) -> int:
+        if not summaries:
+            return 0
+
+        now = datetime.utcnow()
+        operations = []
+        for key, summary in summaries.items():
+            inc = {"total": summary["total"]}
+            inc.update({f"by_type.{t}": n for t, n in summary["by_type"].items()})
+            inc.update({f"by_user.{u}.count": n for u, n in summary["by_user"].items()})
+            set_fields = {f"by_user.{u}.actor": a for u, a in summary["actors"].items()}
+            set_fields["updated_at"] = now
+
+            # The $ne guard makes re-applying a run a duplicate-key upsert we can ignore
+            operations.append(UpdateOne(
+                {"_id": key, "applied_runs": {"$ne": run_id}},
+                {
+                    "$inc": inc,
+                    "$set": set_fields,
+                    "$push": {"applied_runs": run_id},
+                    "$setOnInsert": {
+                        "organization_id": summary["organization_id"],
+                        "project_id": summary["project_id"],
+                        "date": summary["date"],
+                        "created_at": now
+                    }
+                },
+                upsert=True
+            ))
+
+        try:
+            result = await db["activity_summaries"].bulk_write(operations, ordered=False)
+            return result.upserted_count + result.modified_count
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(err.get("code") != DUPLICATE_KEY_ERROR for err in errors):
+                raise
+            return len(operations) - len(errors)
+
+    @staticmethod
+    async def get_summaries(
+        organization_id: ObjectId,
+        project_ids: List[ObjectId],
+        before: Optional[datetime] = None,
+        days: int = 7
+    ) -> Dict[str, Any]:
+        """Daily summaries for `days` whole days before `before`, newest day first"""
+        window_start = ActivityRetentionService.get_raw_window_start()
+        if before and before.tzinfo is not None:
+            before = before.replace(tzinfo=None)
+        before = min(before, window_start) if before else window_start
+        after = before - timedelta(days=days)
+
+        summaries = await db["activity_summaries"].find(
+            {
+                "organization_id": organization_id,
+                "project_id": {"$in": project_ids},
+                "date": {"$gte": after, "$lt": before}
+            },
+            {"applied_runs": 0}
+        ).sort([("date", -1), ("project_id", 1)]).to_list(length=None)
+
+        return {
+            "summaries": summaries,
+            "before": before,
+            "next_before": after,
+            "raw_window_start": window_start
+        }
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from bson import ObjectId
@@ -5,11 +6,133 @@ from fastapi import HTTPException
 from app.db.database import get_db
 from app.db.enums import ActivityType
 from app.utils.logger import logger
+from app.utils.pagination import keyset_filter, split_page, count_matching
+from app.utils.search import escape_regex
+from app.services.activity_writer import activity_writer
+from app.services.actor_snapshot_service import ActorSnapshotService
+from app.services.activity_retention_service import ActivityRetentionService
+from app.services.membership_service import MembershipService
 
 db = get_db()
 
+# A project never moves between organizations, so project -> organization
+# lookups can be cached for the lifetime of the process.
+PROJECT_ORG_CACHE_SIZE = 10000
+_project_org_cache: "OrderedDict[ObjectId, ObjectId]" = OrderedDict()
+
 
 class ActivityService:
+    @staticmethod
+    async def log_activity(
+        user_id: ObjectId,
+        project_id: Optional[ObjectId],
+        activity_type: ActivityType,
+        description: str,
+        target_user_id: Optional[ObjectId] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        organization_id: Optional[ObjectId] = None
+    ):
+        """Record an activity through the buffered writer"""
+        try:
+            now = datetime.utcnow()
+            activity_doc = {
+                "type": activity_type,
+                "user_id": user_id,
+                "actor": await ActorSnapshotService.get_snapshot(user_id),
+                "project_id": project_id,
+                "organization_id": organization_id or await ActivityService.resolve_organization_id(project_id),
+                "target_user_id": target_user_id,
+                "description": description,
+                "metadata": metadata or {},
+                "created_at": now,
+                "updated_at": now
+            }
+
+            if activity_writer.running:
+                activity_writer.enqueue(activity_doc)
+            else:
+                # No background flusher (scripts, tests): write inline
+                await db["activities"].insert_one(activity_doc)
+        except Exception as e:
+            logger.error(f"Failed to log activity: {str(e)}")
+            # Don't raise exception for logging failures
+
+    @staticmethod
+    async def log_activities(
+        user_id: ObjectId,
+        activities: List[Dict[str, Any]],
+        organization_id: Optional[ObjectId] = None
+    ):
+        """
+        Record several activities by the same user with one actor lookup and
+        one insert_many. Each entry takes the log_activity keyword arguments
+        (project_id, activity_type, description, target_user_id, metadata).
+        """
+        if not activities:
+            return
+        try:
+            now = datetime.utcnow()
+            actor = await ActorSnapshotService.get_snapshot(user_id)
+            activity_docs = []
+            for activity in activities:
+                project_id = activity.get("project_id")
+                activity_docs.append({
+                    "type": activity["activity_type"],
+                    "user_id": user_id,
+                    "actor": actor,
+                    "project_id": project_id,
+                    "organization_id": organization_id or await ActivityService.resolve_organization_id(project_id),
+                    "target_user_id": activity.get("target_user_id"),
+                    "description": activity["description"],
+                    "metadata": activity.get("metadata") or {},
+                    "created_at": now,
+                    "updated_at": now
+                })
+
+            if activity_writer.running:
+                for activity_doc in activity_docs:
+                    activity_writer.enqueue(activity_doc)
+            else:
+                await db["activities"].insert_many(activity_docs, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to log activities: {str(e)}")
+
+    @staticmethod
+    async def resolve_organization_id(project_id: Optional[ObjectId]) -> Optional[ObjectId]:
+        """Get the organization a project belongs to (cached)"""
+        if not project_id:
+            return None
+        organization_id = _project_org_cache.get(project_id)
+        if organization_id:
+            _project_org_cache.move_to_end(project_id)
+            return organization_id
+
+        project = await db["projects"].find_one(
+            {"_id": project_id}, {"organization_id": 1})
+        if not project:
+            return None
+
+        organization_id = project["organization_id"]
+        _project_org_cache[project_id] = organization_id
+        if len(_project_org_cache) > PROJECT_ORG_CACHE_SIZE:
+            _project_org_cache.popitem(last=False)
+        return organization_id
+
+    @staticmethod
+    async def get_accessible_project_ids(
+        user_id: ObjectId,
+        organization_id: ObjectId
+    ) -> List[ObjectId]:
+        """Projects of the organization the user has joined (403 if not a member)"""
+        org_membership, project_ids = await MembershipService.get_organization_scope(
+            user_id, organization_id)
+        if not org_membership:
+            raise HTTPException(
+                status_code=403,
+                detail="User not member of organization or access denied"
+            )
+        return project_ids
+
     @staticmethod
     async def get_organization_activities(
         user_id: ObjectId,
@@ -20,55 +143,33 @@ class ActivityService:
         project_id: Optional[ObjectId] = None,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
-        user_filter_id: Optional[ObjectId] = None
+        user_filter_id: Optional[ObjectId] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """Get all activities in organization with pagination and filtering"""
+        """
+        Get all activities in organization with pagination and filtering.
+        Pass the returned `next_cursor` back as `cursor` to page by
+        (created_at, _id) instead of offset.
+        """
         try:
-            # Verify user has access to organization
-            user = await db["users"].find_one({"_id": user_id})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            user_orgs = user.get("organizations", [])
-            is_org_member = any(
-                org["organization_id"] == organization_id
-                and org.get("status") == "active"
-                for org in user_orgs
-            )
-
-            if not is_org_member:
-                raise HTTPException(
-                    status_code=403,
-                    detail="User not member of organization or access denied"
-                )
-
-            # Get all projects in organization that user has access to
-            user_project_ids = []
-            user_projects = user.get("joined_projects", [])
-            for proj in user_projects:
-                if proj.get("status") == "active":
-                    # Verify project belongs to organization
-                    project = await db["projects"].find_one({
-                        "_id": proj["project_id"],
-                        "organization_id": organization_id
-                    })
-                    if project:
-                        user_project_ids.append(proj["project_id"])
+            user_project_ids = await ActivityService.get_accessible_project_ids(
+                user_id, organization_id)
 
             if not user_project_ids:
                 return {
                     "activities": [],
                     "total": 0,
+                    "total_capped": False,
                     "limit": limit,
                     "offset": offset,
-                    "has_more": False
+                    "has_more": False,
+                    "next_cursor": None,
+                    "raw_window_start": ActivityRetentionService.get_raw_window_start()
                 }
 
-            # Build aggregation pipeline
-            pipeline = []
-
             # Match stage - base filter
-            match_filter = {}
+            match_filter = {"organization_id": organization_id}
 
             # Filter by projects user has access to
             if project_id:
@@ -86,7 +187,7 @@ class ActivityService:
                 match_filter["user_id"] = user_filter_id
                 
             if search:
-                match_filter["description"] = {"$regex": search, "$options": "i"}
+                match_filter["description"] = {"$regex": escape_regex(search), "$options": "i"}
 
             if date_from or date_to:
                 date_filter = {}
@@ -96,63 +197,31 @@ class ActivityService:
                     date_filter["$lte"] = date_to
                 match_filter["created_at"] = date_filter
 
-            pipeline.append({"$match": match_filter})
-
-            # Lookup user details
-            pipeline.append({
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user_info"
-                }
-            })
+            # Counting ignores the cursor and never touches other collections
+            total, total_capped = await count_matching(
+                db["activities"], match_filter, count_mode)
 
-            # Add user name field
-            pipeline.append({
-                "$addFields": {
-                    "user_name": {"$arrayElemAt": ["$user_info.name", 0]},
-                    "user_avatar": {"$arrayElemAt": ["$user_info.avatar_url", 0]}
-                }
-            })
-
-            # Sort by created_at descending (newest first)
-            pipeline.append({"$sort": {"created_at": -1}})
-
-            # Get total count for pagination (before skip/limit)
-            count_pipeline = pipeline.copy()
-            count_pipeline.append({"$count": "total"})
-            count_result = await db["activities"].aggregate(count_pipeline).to_list(length=None)
-            total = count_result[0]["total"] if count_result else 0
-
-            # Add pagination
-            pipeline.extend([
-                {"$skip": offset},
-                {"$limit": limit}
-            ])
-
-            # Project only needed fields
-            pipeline.append({
-                "$project": {
-                    "_id": 1,
-                    "type": 1,
-                    "description": 1,
-                    "user_name": 1,
-                    "user_avatar": 1,
-                    "created_at": 1
-                }
-            })
+            # Keyset pagination: continue strictly after the last row seen
+            if cursor:
+                match_filter = {**match_filter, **keyset_filter("created_at", cursor)}
+                offset = 0
 
-            # Execute aggregation
-            activities = await db["activities"].aggregate(pipeline).to_list(length=None)
+            # Sorted newest first on the (organization_id, ..., created_at, _id)
+            # indexes; one extra row tells whether another page exists
+            rows = await db["activities"].find(
+                match_filter,
+                {"_id": 1, "type": 1, "description": 1, "actor": 1, "created_at": 1}
+            ).sort([("created_at", -1), ("_id", -1)]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+            activities, next_cursor = split_page(rows, limit, "created_at")
 
             # Format response according to specified format
             formatted_activities = []
             for activity in activities:
-                # Generate user initials if no avatar
-                user_name = activity.get("user_name", "")
-                avatar = activity.get(
-                    "user_avatar") or ActivityService._get_initials(user_name)
+                # Actor snapshot is stored on the activity; initials if no avatar
+                actor = activity.get("actor") or {}
+                user_name = actor.get("name", "")
+                avatar = actor.get("avatar") or actor.get(
+                    "initials") or ActivityService._get_initials(user_name)
 
                 formatted_activities.append({
                     "id": str(activity["_id"]),
@@ -165,9 +234,13 @@ class ActivityService:
             return {
                 "activities": formatted_activities,
                 "total": total,
+                "total_capped": total_capped,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor,
+                # Older activity is only available as daily summaries
+                "raw_window_start": ActivityRetentionService.get_raw_window_start()
             }
 
         except HTTPException:
@@ -179,6 +252,67 @@ class ActivityService:
                 detail=f"Failed to get organization activities: {str(e)}"
             )
 
+    @staticmethod
+    async def get_organization_activity_summaries(
+        user_id: ObjectId,
+        organization_id: ObjectId,
+        project_id: Optional[ObjectId] = None,
+        before: Optional[datetime] = None,
+        days: int = 7
+    ) -> Dict[str, Any]:
+        """Get daily activity summaries for the period past the raw retention window"""
+        try:
+            user_project_ids = await ActivityService.get_accessible_project_ids(
+                user_id, organization_id)
+
+            if project_id:
+                if project_id not in user_project_ids:
+                    raise HTTPException(
+                        status_code=403,
+                        detail="Access denied to this project"
+                    )
+                user_project_ids = [project_id]
+
+            result = await ActivityRetentionService.get_summaries(
+                organization_id, user_project_ids, before=before, days=days)
+
+            formatted_summaries = []
+            for summary in result["summaries"]:
+                by_user = []
+                for user_key, entry in summary.get("by_user", {}).items():
+                    actor = entry.get("actor") or {}
+                    by_user.append({
+                        "user_id": user_key,
+                        "user": actor.get("name", ""),
+                        "avatar": actor.get("avatar") or actor.get("initials", ""),
+                        "count": entry.get("count", 0)
+                    })
+
+                formatted_summaries.append({
+                    "id": summary["_id"],
+                    "project_id": str(summary["project_id"]),
+                    "date": summary["date"],
+                    "total": summary.get("total", 0),
+                    "by_type": summary.get("by_type", {}),
+                    "by_user": by_user
+                })
+
+            return {
+                "summaries": formatted_summaries,
+                "before": result["before"],
+                "next_before": result["next_before"],
+                "raw_window_start": result["raw_window_start"]
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to get organization activity summaries: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to get organization activity summaries: {str(e)}"
+            )
+
     @staticmethod
     def _get_initials(name: str) -> str:
         """Generate initials from name"""
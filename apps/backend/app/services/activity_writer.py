@@ -0,0 +1,207 @@
+import asyncio
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+from bson.errors import InvalidDocument
+from pymongo.errors import (
+    BulkWriteError,
+    ConnectionFailure,
+    DuplicateKeyError,
+    ExecutionTimeout,
+    WTimeoutError
+)
+from app.db.database import get_db
+from app.config.config import (
+    ACTIVITY_BATCH_SIZE,
+    ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    ACTIVITY_BUFFER_MAX
+)
+from app.utils.logger import logger
+
+db = get_db()
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Worth retrying on the next tick; every other failure is permanent for the batch
+TRANSIENT_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+
+class ActivityWriter:
+    """
+    In-memory buffer for activity documents, flushed to Mongo with
+    insert_many by a background task whenever `batch_size` records are
+    waiting or every `flush_interval` seconds. Request handlers only append
+    to the buffer, so logging an activity no longer costs a round trip.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = ACTIVITY_BATCH_SIZE,
+        flush_interval: float = ACTIVITY_FLUSH_INTERVAL_SECONDS,
+        max_buffer: int = ACTIVITY_BUFFER_MAX
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "discarded": 0,
+            "max_queue_depth": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Activity writer started")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still buffered"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await self.flush()
+        logger.info(f"Activity writer stopped: {self.get_metrics()}")
+
+    def enqueue(self, activity_doc: Dict[str, Any]) -> bool:
+        """Buffer one activity document. Returns False if it had to be dropped."""
+        if len(self._buffer) >= self.max_buffer:
+            self._metrics["dropped"] += 1
+            logger.warning("Activity buffer full, dropping activity")
+            return False
+
+        self._buffer.append(activity_doc)
+        self._metrics["enqueued"] += 1
+        self._metrics["max_queue_depth"] = max(
+            self._metrics["max_queue_depth"], len(self._buffer))
+
+        if len(self._buffer) >= self.batch_size and self._wakeup:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> int:
+        """
+        Write all buffered activities in batches of `batch_size`. Only
+        transient errors (connection loss, timeouts) put a batch back for the
+        next tick; documents that can never be written are discarded so they
+        cannot block the activities queued behind them.
+        """
+        written = 0
+        lock = self._flush_lock or asyncio.Lock()
+        async with lock:
+            while self._buffer:
+                batch: List[Dict[str, Any]] = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                try:
+                    await db["activities"].insert_many(batch, ordered=False)
+                    batch_written = len(batch)
+                except BulkWriteError as e:
+                    batch_written = self._count_bulk_write(batch, e.details)
+                except InvalidDocument:
+                    # Some documents cannot be encoded; find them one by one
+                    batch_written, retry = await self._insert_one_by_one(batch)
+                    if retry:
+                        written += self._record_written(batch_written)
+                        self._requeue(retry)
+                        break
+                except TRANSIENT_ERRORS as e:
+                    logger.error(f"Failed to flush {len(batch)} activities: {str(e)}")
+                    self._requeue(batch)
+                    break
+                except Exception as e:
+                    logger.error(f"Discarding {len(batch)} activities that cannot be written: {str(e)}")
+                    self._metrics["failed_flushes"] += 1
+                    self._metrics["discarded"] += len(batch)
+                    continue
+                written += self._record_written(batch_written)
+        return written
+
+    def _record_written(self, count: int) -> int:
+        self._metrics["written"] += count
+        self._metrics["flushes"] += 1
+        return count
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        """Put a batch back (as far as the bound allows) to retry next tick"""
+        self._metrics["failed_flushes"] += 1
+        if self._stopping:
+            self._metrics["dropped"] += len(batch)
+            return
+        room = self.max_buffer - len(self._buffer)
+        self._metrics["dropped"] += max(0, len(batch) - room)
+        self._buffer.extendleft(reversed(batch[:room]))
+
+    def _count_bulk_write(self, batch: List[Dict[str, Any]], details: Dict[str, Any]) -> int:
+        """
+        An unordered insert_many wrote every document without a write error.
+        Duplicate keys mean an earlier partial attempt already wrote the
+        document; any other write error will fail again, so it is discarded.
+        """
+        failed = [
+            error for error in details.get("writeErrors", [])
+            if error.get("code") != DUPLICATE_KEY_ERROR
+        ]
+        if failed:
+            self._metrics["failed_flushes"] += 1
+            self._metrics["discarded"] += len(failed)
+            logger.error(f"Discarding {len(failed)} activities rejected by the server: {failed[0].get('errmsg')}")
+        return len(batch) - len(failed)
+
+    async def _insert_one_by_one(self, batch: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """Returns (written, documents to retry after a transient error)"""
+        written = 0
+        for i, doc in enumerate(batch):
+            try:
+                await db["activities"].insert_one(doc)
+                written += 1
+            except DuplicateKeyError:
+                written += 1
+            except TRANSIENT_ERRORS as e:
+                logger.error(f"Failed to flush {len(batch) - i} activities: {str(e)}")
+                return written, batch[i:]
+            except Exception as e:
+                self._metrics["discarded"] += 1
+                logger.error(f"Discarding activity that cannot be written: {str(e)}")
+        return written, []
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Activity writer flush loop error: {str(e)}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "queue_depth": len(self._buffer),
+            "running": self.running
+        }
+
+
+activity_writer = ActivityWriter()
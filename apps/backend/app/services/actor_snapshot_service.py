@@ -0,0 +1,170 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateMany
+from pymongo.errors import DuplicateKeyError
+from app.db.database import get_db
+from app.services.membership_service import MembershipService, PROFILE_PROJECTION
+from app.config.config import ACTOR_CACHE_TTL_SECONDS, ACTOR_SNAPSHOT_REFRESH_LEASE_SECONDS
+from app.utils.logger import logger
+
+db = get_db()
+
+ACTOR_CACHE_SIZE = 10000
+_actor_cache: "OrderedDict[ObjectId, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+STATE_COLLECTION = "migration_state"
+# Checkpoint on profile_updated_at (the earlier state keyed on updated_at is left unused)
+REFRESH_STATE_ID = "actor_snapshot_profile_refresh"
+
+
+class ActorSnapshotService:
+    @staticmethod
+    def build_snapshot(user: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compact copy of the user fields the activity feeds display"""
+        name = (user or {}).get("name") or ""
+        parts = name.strip().split()
+        return {
+            "name": name,
+            "avatar": (user or {}).get("avatar_url"),
+            "initials": "".join(p[0].upper() for p in parts if p)[:2]
+        }
+
+    @staticmethod
+    async def get_snapshot(user_id: ObjectId) -> Dict[str, Any]:
+        """Get the actor snapshot for a user (cached for a few minutes)"""
+        cached = _actor_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            _actor_cache.move_to_end(user_id)
+            return cached[1]
+
+        user = await db["users"].find_one(
+            {"_id": user_id}, {"name": 1, "avatar_url": 1})
+        snapshot = ActorSnapshotService.build_snapshot(user)
+        _actor_cache[user_id] = (time.monotonic() + ACTOR_CACHE_TTL_SECONDS, snapshot)
+        if len(_actor_cache) > ACTOR_CACHE_SIZE:
+            _actor_cache.popitem(last=False)
+        return snapshot
+
+    @staticmethod
+    async def refresh_user(user_id: ObjectId) -> int:
+        """Rewrite the snapshot on a user's activities right after a profile change"""
+        _actor_cache.pop(user_id, None)
+        user = await db["users"].find_one(
+            {"_id": user_id}, {"name": 1, "avatar_url": 1})
+        if not user:
+            return 0
+        snapshot = ActorSnapshotService.build_snapshot(user)
+        result = await db["activities"].update_many(
+            {"user_id": user_id, "actor": {"$ne": snapshot}},
+            {"$set": {"actor": snapshot}}
+        )
+        return result.modified_count
+
+    @staticmethod
+    async def refresh_changed_users(batch_size: int = 500) -> Optional[int]:
+        """
+        Sweep users whose profile changed since the last run and rewrite the
+        snapshots stored on their activities and the profile copies on their
+        memberships. Profile edits set `users.profile_updated_at`; logins and
+        other writes that only move `updated_at` are not picked up.
+
+        The first run covers every user by _id, which also backfills
+        activities written before snapshots existed, and later runs follow
+        profile_updated_at from the time that sweep started. A lease in
+        migration_state lets only one worker sweep at a time. Returns None
+        while another worker holds it.
+        """
+        now = datetime.utcnow()
+        state = await ActorSnapshotService._claim_refresh(now)
+        if state is None:
+            return None
+
+        modified = 0
+        try:
+            if not state.get("initial_done"):
+                started_at = state.get("initial_started_at") or now
+                last_id = state.get("last_user_id")
+                while True:
+                    query = {"_id": {"$gt": last_id}} if last_id else {}
+                    users = await db["users"].find(query, PROFILE_PROJECTION).sort("_id", 1).limit(
+                        batch_size).to_list(length=batch_size)
+                    if not users:
+                        break
+                    modified += await ActorSnapshotService._refresh_users(users)
+                    last_id = users[-1]["_id"]
+                    await ActorSnapshotService._save_state(
+                        {"last_user_id": last_id, "initial_started_at": started_at})
+                    if len(users) < batch_size:
+                        break
+                state = {"last_profile_updated_at": started_at, "last_user_id": None}
+                await ActorSnapshotService._save_state({**state, "initial_done": True})
+
+            last_updated_at = state.get("last_profile_updated_at")
+            last_id = state.get("last_user_id")
+            while True:
+                query: Dict[str, Any] = {"profile_updated_at": {"$gt": last_updated_at}}
+                if last_id:
+                    query = {"$or": [
+                        query,
+                        {"profile_updated_at": last_updated_at, "_id": {"$gt": last_id}}
+                    ]}
+                users = await db["users"].find(
+                    query, {**PROFILE_PROJECTION, "profile_updated_at": 1}
+                ).sort([("profile_updated_at", 1), ("_id", 1)]).limit(batch_size).to_list(length=batch_size)
+                if not users:
+                    break
+                modified += await ActorSnapshotService._refresh_users(users)
+                last_updated_at = users[-1]["profile_updated_at"]
+                last_id = users[-1]["_id"]
+                await ActorSnapshotService._save_state(
+                    {"last_profile_updated_at": last_updated_at, "last_user_id": last_id})
+                if len(users) < batch_size:
+                    break
+        finally:
+            await db[STATE_COLLECTION].update_one(
+                {"_id": REFRESH_STATE_ID}, {"$set": {"lease_until": None}})
+
+        if modified:
+            logger.info(f"Refreshed actor snapshots on {modified} activities")
+        return modified
+
+    @staticmethod
+    async def _claim_refresh(now: datetime) -> Optional[Dict[str, Any]]:
+        """Take the sweep lease; None while another worker holds it"""
+        try:
+            return await db[STATE_COLLECTION].find_one_and_update(
+                {
+                    "_id": REFRESH_STATE_ID,
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+                },
+                {"$set": {"lease_until": now + timedelta(seconds=ACTOR_SNAPSHOT_REFRESH_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None
+
+    @staticmethod
+    async def _save_state(fields: Dict[str, Any]) -> None:
+        """Checkpoint the sweep and extend the lease"""
+        lease_until = datetime.utcnow() + timedelta(seconds=ACTOR_SNAPSHOT_REFRESH_LEASE_SECONDS)
+        await db[STATE_COLLECTION].update_one(
+            {"_id": REFRESH_STATE_ID}, {"$set": {**fields, "lease_until": lease_until}})
+
+    @staticmethod
+    async def _refresh_users(users: List[Dict[str, Any]]) -> int:
+        operations = []
+        for user in users:
+            snapshot = ActorSnapshotService.build_snapshot(user)
+            _actor_cache.pop(user["_id"], None)
+            operations.append(UpdateMany(
+                {"user_id": user["_id"], "actor": {"$ne": snapshot}},
+                {"$set": {"actor": snapshot}}
+            ))
+        result = await db["activities"].bulk_write(operations, ordered=False)
+        await db["memberships"].bulk_write(
+            MembershipService.profile_operations(users), ordered=False)
+        return result.modified_count
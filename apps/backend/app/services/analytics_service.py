@@ -0,0 +1,316 @@
+import asyncio
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from bson import ObjectId
+from fastapi import HTTPException
+from app.db.database import get_db
+from app.db.enums import TaskStatus
+from app.utils.logger import logger
+
+db = get_db()
+
+# Integer codes for the column arrays (order matters, it is the bincount index)
+STATUS_CODES = {status.value: code for code, status in enumerate(TaskStatus)}
+PRIORITY_LABELS = ["none", "low", "medium", "high", "urgent"]
+PRIORITY_CODES = {label: code for code, label in enumerate(PRIORITY_LABELS)}
+
+DONE_CODE = STATUS_CODES[TaskStatus.DONE.value]
+CANCELED_CODE = STATUS_CODES[TaskStatus.CANCELED.value]
+
+SECONDS_PER_DAY = 86400.0
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+CYCLE_TIME_BUCKETS_DAYS = [0, 1, 2, 4, 7, 14, 30, np.inf]
+
+ANALYTICS_CACHE_MAX_ORGS = 32
+ANALYTICS_LOAD_BATCH_SIZE = 5000
+
+_EPOCH = datetime(1970, 1, 1)
+
+# org_id -> {"version": ..., "columns": {...}}, least recently used first
+_column_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_load_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _to_epoch(value: Any) -> float:
+    """Naive-UTC or aware datetime to epoch seconds, NaN when missing"""
+    if not isinstance(value, datetime):
+        return np.nan
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).total_seconds()
+
+
+def _from_epoch(seconds: float) -> str:
+    return (_EPOCH + timedelta(seconds=float(seconds))).isoformat()
+
+
+def _priority_code(value: Any) -> int:
+    if hasattr(value, "value"):
+        value = value.value
+    return PRIORITY_CODES.get(value, 0) if isinstance(value, str) else 0
+
+
+class AnalyticsService:
+    """
+    Org-wide task metrics computed with NumPy over compact per-org column
+    arrays (status/priority codes, timestamps, hours). Columns are cached per
+    organization and invalidated by the projects' `stats_version` counters,
+    which task mutations bump together with the workload counters (see
+    `WorkloadService.apply_change`) or through `bump_version`.
+    """
+
+    @staticmethod
+    async def bump_version(project_id: ObjectId) -> None:
+        """Mark cached analytics for the project's organization as stale"""
+        try:
+            await db["projects"].update_one(
+                {"_id": project_id},
+                {"$inc": {"stats_version": 1}}
+            )
+        except Exception as e:
+            logger.error(f"Failed to bump analytics version: {str(e)}")
+
+    @staticmethod
+    async def _get_org_version(organization_id: ObjectId) -> Tuple[List[ObjectId], Tuple]:
+        """Return (project ids, version key) for the organization's active projects"""
+        projects = await db["projects"].find(
+            {"organization_id": organization_id, "archived": {"$ne": True}},
+            {"_id": 1, "stats_version": 1}
+        ).to_list(length=None)
+        project_ids = [p["_id"] for p in projects]
+        version = tuple(sorted(
+            (str(p["_id"]), p.get("stats_version", 0)) for p in projects
+        ))
+        return project_ids, version
+
+    @staticmethod
+    async def _load_columns(project_ids: List[ObjectId]) -> Dict[str, np.ndarray]:
+        """Stream tasks into compact typed buffers, then wrap them as NumPy arrays"""
+        status = array("b")
+        priority = array("b")
+        created_at = array("d")
+        completed_at = array("d")
+        due_date = array("d")
+        estimated_hours = array("f")
+        actual_hours = array("f")
+
+        cursor = db["tasks"].find(
+            {"project_id": {"$in": project_ids}, "archived": False},
+            {
+                "_id": 0,
+                "status": 1,
+                "priority": 1,
+                "created_at": 1,
+                "completed_at": 1,
+                "due_date": 1,
+                "estimated_hours": 1,
+                "actual_hours": 1
+            },
+            batch_size=ANALYTICS_LOAD_BATCH_SIZE
+        )
+        async for task in cursor:
+            task_status = task.get("status")
+            if hasattr(task_status, "value"):
+                task_status = task_status.value
+            status.append(STATUS_CODES.get(task_status, STATUS_CODES[TaskStatus.TODO.value]))
+            priority.append(_priority_code(task.get("priority")))
+            created_at.append(_to_epoch(task.get("created_at")))
+            completed_at.append(_to_epoch(task.get("completed_at")))
+            due_date.append(_to_epoch(task.get("due_date")))
+            estimated_hours.append(
+                task["estimated_hours"] if task.get("estimated_hours") is not None else np.nan)
+            actual_hours.append(
+                task["actual_hours"] if task.get("actual_hours") is not None else np.nan)
+
+        return {
+            "status": np.frombuffer(status, dtype=np.int8),
+            "priority": np.frombuffer(priority, dtype=np.int8),
+            "created_at": np.frombuffer(created_at, dtype=np.float64),
+            "completed_at": np.frombuffer(completed_at, dtype=np.float64),
+            "due_date": np.frombuffer(due_date, dtype=np.float64),
+            "estimated_hours": np.frombuffer(estimated_hours, dtype=np.float32),
+            "actual_hours": np.frombuffer(actual_hours, dtype=np.float32)
+        }
+
+    @staticmethod
+    async def get_columns(organization_id: ObjectId) -> Dict[str, np.ndarray]:
+        """Return cached columns for the org, reloading when the version changed"""
+        key = str(organization_id)
+        project_ids, version = await AnalyticsService._get_org_version(organization_id)
+
+        cached = _column_cache.get(key)
+        if cached and cached["version"] == version:
+            _column_cache.move_to_end(key)
+            return cached["columns"]
+
+        lock = _load_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have loaded the same version meanwhile
+            cached = _column_cache.get(key)
+            if cached and cached["version"] == version:
+                return cached["columns"]
+
+            columns = await AnalyticsService._load_columns(project_ids)
+            _column_cache[key] = {"version": version, "columns": columns}
+            _column_cache.move_to_end(key)
+            while len(_column_cache) > ANALYTICS_CACHE_MAX_ORGS:
+                evicted, _ = _column_cache.popitem(last=False)
+                _load_locks.pop(evicted, None)
+
+        logger.info(
+            f"Loaded analytics columns for organization {key}: {len(columns['status'])} tasks")
+        return columns
+
+    @staticmethod
+    def _week_index(timestamps: np.ndarray, now: float, weeks: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket timestamps into `weeks` rolling weeks ending at now (0 = oldest)"""
+        with np.errstate(invalid="ignore"):
+            age_weeks = np.floor((now - timestamps) / SECONDS_PER_WEEK)
+            mask = (age_weeks >= 0) & (age_weeks < weeks)
+        index = (weeks - 1 - age_weeks[mask]).astype(np.int64)
+        return index, mask
+
+    @staticmethod
+    def _week_starts(now: float, weeks: int) -> List[str]:
+        return [_from_epoch(now - (weeks - i) * SECONDS_PER_WEEK) for i in range(weeks)]
+
+    @staticmethod
+    def compute_velocity(columns: Dict[str, np.ndarray], now: float, weeks: int = 12) -> Dict[str, Any]:
+        """Created vs completed tasks (and completed hours) per week"""
+        done = columns["status"] == DONE_CODE
+        completed_idx, completed_mask = AnalyticsService._week_index(
+            np.where(done, columns["completed_at"], np.nan), now, weeks)
+        created_idx, _ = AnalyticsService._week_index(
+            columns["created_at"], now, weeks)
+
+        hours = np.where(np.isnan(columns["actual_hours"]),
+                         columns["estimated_hours"], columns["actual_hours"])
+        hours = np.nan_to_num(hours[completed_mask].astype(np.float64))
+
+        completed = np.bincount(completed_idx, minlength=weeks)
+        created = np.bincount(created_idx, minlength=weeks)
+        completed_hours = np.bincount(completed_idx, weights=hours, minlength=weeks)
+
+        week_starts = AnalyticsService._week_starts(now, weeks)
+        return {
+            "weeks": [
+                {
+                    "week_start": week_starts[i],
+                    "created": int(created[i]),
+                    "completed": int(completed[i]),
+                    "completed_hours": round(float(completed_hours[i]), 1)
+                }
+                for i in range(weeks)
+            ],
+            "average_velocity": round(float(completed.mean()), 1) if weeks else 0.0,
+            "average_completed_hours": round(float(completed_hours.mean()), 1) if weeks else 0.0
+        }
+
+    @staticmethod
+    def compute_throughput(columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Cycle time (created -> completed) distribution of done tasks, in days"""
+        done = (columns["status"] == DONE_CODE) & ~np.isnan(columns["completed_at"])
+        cycle_days = (columns["completed_at"][done] - columns["created_at"][done]) / SECONDS_PER_DAY
+        cycle_days = cycle_days[cycle_days >= 0]
+
+        counts, _ = np.histogram(cycle_days, bins=CYCLE_TIME_BUCKETS_DAYS)
+        buckets = []
+        for i, count in enumerate(counts):
+            low, high = CYCLE_TIME_BUCKETS_DAYS[i], CYCLE_TIME_BUCKETS_DAYS[i + 1]
+            label = f"{low}+ days" if np.isinf(high) else f"{low}-{high} days"
+            buckets.append({"label": label, "count": int(count)})
+
+        if cycle_days.size:
+            p50, p75, p90 = np.percentile(cycle_days, [50, 75, 90])
+            summary = {
+                "completed_tasks": int(cycle_days.size),
+                "mean_days": round(float(cycle_days.mean()), 1),
+                "p50_days": round(float(p50), 1),
+                "p75_days": round(float(p75), 1),
+                "p90_days": round(float(p90), 1)
+            }
+        else:
+            summary = {
+                "completed_tasks": 0,
+                "mean_days": 0.0,
+                "p50_days": 0.0,
+                "p75_days": 0.0,
+                "p90_days": 0.0
+            }
+
+        return {**summary, "distribution": buckets}
+
+    @staticmethod
+    def compute_priority_mix(columns: Dict[str, np.ndarray], now: float, weeks: int = 12) -> Dict[str, Any]:
+        """Tasks created per week split by priority"""
+        created_idx, created_mask = AnalyticsService._week_index(
+            columns["created_at"], now, weeks)
+        priorities = columns["priority"][created_mask].astype(np.int64)
+        n_priorities = len(PRIORITY_LABELS)
+
+        matrix = np.bincount(
+            created_idx * n_priorities + priorities,
+            minlength=weeks * n_priorities
+        ).reshape(weeks, n_priorities)
+
+        week_starts = AnalyticsService._week_starts(now, weeks)
+        return {
+            "priorities": PRIORITY_LABELS,
+            "weeks": [
+                {
+                    "week_start": week_starts[i],
+                    **{PRIORITY_LABELS[p]: int(matrix[i, p]) for p in range(n_priorities)}
+                }
+                for i in range(weeks)
+            ],
+            "totals": {
+                PRIORITY_LABELS[p]: int(count)
+                for p, count in enumerate(np.bincount(columns["priority"].astype(np.int64), minlength=n_priorities))
+            }
+        }
+
+    @staticmethod
+    def compute_status_mix(columns: Dict[str, np.ndarray], now: float) -> Dict[str, Any]:
+        """Current task counts by status plus open overdue tasks"""
+        counts = np.bincount(columns["status"].astype(np.int64), minlength=len(STATUS_CODES))
+        open_tasks = (columns["status"] != DONE_CODE) & (columns["status"] != CANCELED_CODE)
+        with np.errstate(invalid="ignore"):
+            overdue = open_tasks & (columns["due_date"] < now)
+        return {
+            "total_tasks": int(columns["status"].size),
+            "by_status": {status: int(counts[code]) for status, code in STATUS_CODES.items()},
+            "overdue_tasks": int(overdue.sum())
+        }
+
+    @staticmethod
+    async def get_organization_analytics(
+        organization_id: ObjectId,
+        weeks: int = 12,
+        metrics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Compute the requested metrics (all by default) for an organization"""
+        try:
+            columns = await AnalyticsService.get_columns(organization_id)
+            now = _to_epoch(datetime.utcnow())
+            metrics = metrics or ["status_mix", "velocity", "throughput", "priority_mix"]
+
+            result: Dict[str, Any] = {"weeks": weeks}
+            if "status_mix" in metrics:
+                result["status_mix"] = AnalyticsService.compute_status_mix(columns, now)
+            if "velocity" in metrics:
+                result["velocity"] = AnalyticsService.compute_velocity(columns, now, weeks)
+            if "throughput" in metrics:
+                result["throughput"] = AnalyticsService.compute_throughput(columns)
+            if "priority_mix" in metrics:
+                result["priority_mix"] = AnalyticsService.compute_priority_mix(columns, now, weeks)
+            return result
+
+        except Exception as e:
+            logger.error(f"Failed to compute organization analytics: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to compute organization analytics: {str(e)}"
+            )
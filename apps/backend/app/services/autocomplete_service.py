@@ -0,0 +1,273 @@
+import asyncio
+import re
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from bson import ObjectId
+from fastapi import HTTPException
+from app.db.database import get_db
+from app.config.config import AUTOCOMPLETE_MAX_ORGS, AUTOCOMPLETE_INDEX_TTL_SECONDS
+from app.services.membership_service import MembershipService, SCOPE_ORGANIZATION
+from app.utils.logger import logger
+
+db = get_db()
+
+ENTITY_TYPES = ("project", "member", "task")
+MAX_TOKENS_PER_LABEL = 8
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    return [t.lower() for t in _WORD_RE.findall(text or "")][:MAX_TOKENS_PER_LABEL]
+
+
+class PrefixIndex:
+    """
+    Sorted array of "<token>\\0<entity key>" strings for one organization.
+    A prefix lookup is a bisect plus a forward scan over matching keys.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def _entity_key(kind: str, entity_id: Any) -> str:
+        return f"{kind}:{entity_id}"
+
+    def _index_keys(self, entity_key: str, label: str) -> List[str]:
+        return [f"{token}\0{entity_key}" for token in dict.fromkeys(_tokens(label))]
+
+    def load(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Bulk build: collect every key first and sort once"""
+        keys = []
+        for entry in entries:
+            entity_key = self._entity_key(entry["type"], entry["id"])
+            self._entries[entity_key] = entry
+            keys.extend(self._index_keys(entity_key, entry["label"]))
+        keys.sort()
+        self._keys = keys
+
+    def upsert(self, entry: Dict[str, Any]) -> None:
+        entity_key = self._entity_key(entry["type"], entry["id"])
+        self.remove(entry["type"], entry["id"])
+        self._entries[entity_key] = entry
+        for key in self._index_keys(entity_key, entry["label"]):
+            insort(self._keys, key)
+
+    def remove(self, kind: str, entity_id: Any) -> None:
+        entity_key = self._entity_key(kind, entity_id)
+        entry = self._entries.pop(entity_key, None)
+        if not entry:
+            return
+        for key in self._index_keys(entity_key, entry["label"]):
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def search(self, query: str, accept, limit: int) -> List[Dict[str, Any]]:
+        query_tokens = _tokens(query)
+        if not query_tokens:
+            return []
+        # Scan on the longest token (fewest candidates), check the rest per entry
+        anchor = max(query_tokens, key=len)
+        others = [t for t in query_tokens if t != anchor]
+        normalized_query = " ".join(query_tokens)
+
+        matches: Dict[str, Tuple[Tuple, Dict[str, Any]]] = {}
+        position = bisect_left(self._keys, anchor)
+        while position < len(self._keys) and self._keys[position].startswith(anchor):
+            entity_key = self._keys[position].split("\0", 1)[1]
+            position += 1
+            if entity_key in matches:
+                continue
+            entry = self._entries[entity_key]
+            if not accept(entry):
+                continue
+            label_tokens = _tokens(entry["label"])
+            if not all(any(lt.startswith(t) for lt in label_tokens) for t in others):
+                continue
+            rank = (
+                0 if " ".join(label_tokens).startswith(normalized_query) else 1,
+                ENTITY_TYPES.index(entry["type"]),
+                len(entry["label"]),
+                entry["label"].lower()
+            )
+            matches[entity_key] = (rank, entry)
+
+        ranked = sorted(matches.values(), key=lambda item: item[0])
+        return [entry for _, entry in ranked[:limit]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_indexes: "OrderedDict[ObjectId, PrefixIndex]" = OrderedDict()
+_build_locks: Dict[ObjectId, asyncio.Lock] = {}
+_rebuilds: Dict[ObjectId, "asyncio.Task[None]"] = {}
+
+
+class AutocompleteService:
+    @staticmethod
+    def task_entry(task: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "task", "id": str(task["_id"]), "label": task.get("title", ""),
+                "project_id": str(task["project_id"])}
+
+    @staticmethod
+    def project_entry(project: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "project", "id": str(project["_id"]), "label": project.get("name", ""),
+                "project_id": str(project["_id"]), "slug": project.get("slug")}
+
+    @staticmethod
+    def member_entry(user: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "member", "id": str(user["_id"]), "label": user.get("name", ""),
+                "avatar": user.get("avatar_url")}
+
+    @staticmethod
+    async def _build_index(organization_id: ObjectId) -> PrefixIndex:
+        projects = await db["projects"].find(
+            {"organization_id": organization_id}, {"name": 1, "slug": 1}
+        ).to_list(length=None)
+        members = await MembershipService.get_scope_member_profiles(organization_id, SCOPE_ORGANIZATION)
+
+        entries = [AutocompleteService.project_entry(p) for p in projects]
+        entries += [AutocompleteService.member_entry({**m, "_id": m["user_id"]}) for m in members]
+
+        index = PrefixIndex()
+        tasks_cursor = db["tasks"].find(
+            {"organization_id": organization_id, "archived": False},
+            {"title": 1, "project_id": 1}
+        ).batch_size(5000)
+        async for task in tasks_cursor:
+            entries.append(AutocompleteService.task_entry(task))
+
+        index.load(entries)
+        logger.info(f"Built autocomplete index for organization {organization_id} ({len(index)} entries)")
+        return index
+
+    @staticmethod
+    async def get_index(organization_id: ObjectId) -> PrefixIndex:
+        """
+        Get the organization's index, building it on first use. An index past
+        its TTL keeps being served while a background task rebuilds it, so a
+        keystroke never waits on Mongo once the index is loaded.
+        """
+        index = _indexes.get(organization_id)
+        if index:
+            _indexes.move_to_end(organization_id)
+            if time.monotonic() - index.built_at >= AUTOCOMPLETE_INDEX_TTL_SECONDS:
+                AutocompleteService._schedule_rebuild(organization_id)
+            return index
+
+        lock = _build_locks.setdefault(organization_id, asyncio.Lock())
+        async with lock:
+            index = _indexes.get(organization_id)
+            if index:
+                return index
+            index = await AutocompleteService._build_index(organization_id)
+            AutocompleteService._store(organization_id, index)
+            return index
+
+    @staticmethod
+    def _schedule_rebuild(organization_id: ObjectId) -> None:
+        running = _rebuilds.get(organization_id)
+        if running and not running.done():
+            return
+
+        async def rebuild() -> None:
+            try:
+                index = await AutocompleteService._build_index(organization_id)
+                AutocompleteService._store(organization_id, index)
+            except Exception as e:
+                # The stale index stays in place; the next lookup tries again
+                logger.error(f"Failed to rebuild autocomplete index for {organization_id}: {str(e)}")
+            finally:
+                _rebuilds.pop(organization_id, None)
+
+        _rebuilds[organization_id] = asyncio.create_task(rebuild())
+
+    @staticmethod
+    def _store(organization_id: ObjectId, index: PrefixIndex) -> None:
+        _indexes[organization_id] = index
+        _indexes.move_to_end(organization_id)
+        while len(_indexes) > AUTOCOMPLETE_MAX_ORGS:
+            evicted, _ = _indexes.popitem(last=False)
+            _build_locks.pop(evicted, None)
+
+    @staticmethod
+    async def suggest(
+        user_id: ObjectId,
+        organization_id: ObjectId,
+        query: str,
+        types: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Prefix suggestions over project names, member names and task titles"""
+        try:
+            org_membership, project_ids = await MembershipService.get_organization_scope(
+                user_id, organization_id)
+            if not org_membership:
+                raise HTTPException(
+                    status_code=403,
+                    detail="User not member of organization or access denied"
+                )
+
+            joined_project_ids = {str(project_id) for project_id in project_ids}
+            wanted_types = set(types or ENTITY_TYPES)
+
+            def accept(entry: Dict[str, Any]) -> bool:
+                if entry["type"] not in wanted_types:
+                    return False
+                if entry["type"] == "member":
+                    return True
+                return entry["project_id"] in joined_project_ids
+
+            index = await AutocompleteService.get_index(organization_id)
+            return index.search(query, accept, limit)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to get autocomplete suggestions: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to get autocomplete suggestions: {str(e)}"
+            )
+
+    # Incremental updates. Only indexes already loaded in this process are
+    # touched; others are built from the database on their next use.
+
+    @staticmethod
+    def on_task_saved(task: Dict[str, Any]) -> None:
+        index = _indexes.get(task.get("organization_id"))
+        if index is None:
+            return
+        if task.get("archived"):
+            index.remove("task", str(task["_id"]))
+        else:
+            index.upsert(AutocompleteService.task_entry(task))
+
+    @staticmethod
+    def on_task_deleted(organization_id: Optional[ObjectId], task_id: ObjectId) -> None:
+        index = _indexes.get(organization_id)
+        if index is not None:
+            index.remove("task", str(task_id))
+
+    @staticmethod
+    def on_project_saved(project: Dict[str, Any]) -> None:
+        index = _indexes.get(project.get("organization_id"))
+        if index is not None:
+            index.upsert(AutocompleteService.project_entry(project))
+
+    @staticmethod
+    def on_member_added(organization_id: ObjectId, user: Dict[str, Any]) -> None:
+        index = _indexes.get(organization_id)
+        if index is not None:
+            index.upsert(AutocompleteService.member_entry(user))
+
+    @staticmethod
+    def invalidate(organization_id: Optional[ObjectId]) -> None:
+        """Drop an index after bulk changes; it is rebuilt lazily"""
+        _indexes.pop(organization_id, None)
@@ -6,7 +6,11 @@ from app.db.database import get_db
 from app.models.board import Board, BoardCreate, BoardUpdate, BoardColumn
 from app.db.enums import ActivityType, UserRole, TaskStatus
 from app.utils.logger import logger
+from app.services.activity_service import ActivityService
 from app.utils.permissions import verify_user_access_to_project
+from app.services.workload_service import WorkloadService
+from app.services.autocomplete_service import AutocompleteService
+from pymongo import ReturnDocument
 
 db = get_db()
 
@@ -71,15 +75,7 @@ class BoardService:
             if not board:
                 raise HTTPException(status_code=404, detail="Board not found")
             await verify_user_access_to_project(user_id, board["project_id"])
-            return {
-                "id": str(board["_id"]),
-                "name": board["name"],
-                "project_id": str(board["project_id"]),
-                "columns": board["columns"],
-                "is_default": board["is_default"],
-                "created_at": board["created_at"],
-                "updated_at": board["updated_at"]
-            }
+            return BoardService._format_board(board)
         except HTTPException:
             raise
         except Exception as e:
@@ -87,6 +83,19 @@ class BoardService:
             raise HTTPException(
                 status_code=500, detail=f"Failed to get board: {str(e)}")
 
+    @staticmethod
+    def _format_board(board: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(board["_id"]),
+            "name": board["name"],
+            "project_id": str(board["project_id"]),
+            "columns": board["columns"],
+            "is_default": board["is_default"],
+            "version": board.get("version", 0),
+            "created_at": board["created_at"],
+            "updated_at": board["updated_at"]
+        }
+
     @staticmethod
     async def get_board_tasks(
         user_id: ObjectId,
@@ -189,9 +198,10 @@ class BoardService:
     async def update_board(
         user_id: ObjectId,
         board_id: ObjectId,
-        board_data: BoardUpdate
+        board_data: BoardUpdate,
+        expected_version: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Update board"""
+        """Update board; with expected_version, concurrent edits are rejected with 409"""
         try:
             # Find board
             board = await db["boards"].find_one({"_id": board_id})
@@ -223,11 +233,24 @@ class BoardService:
                     })
                 update_data["columns"] = columns
 
-            # Update board
-            await db["boards"].update_one(
-                {"_id": board_id},
-                {"$set": update_data}
+            # Update board only if nobody changed it since it was read, and
+            # take the post-image from the same round trip
+            current_version = board.get("version", 0)
+            if expected_version is not None and expected_version != current_version:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Board was modified by someone else, reload and try again"
+                )
+            updated_board = await db["boards"].find_one_and_update(
+                {"_id": board_id, "version": current_version or None},
+                {"$set": update_data, "$inc": {"version": 1}},
+                return_document=ReturnDocument.AFTER
             )
+            if not updated_board:
+                raise HTTPException(
+                    status_code=409,
+                    detail="Board was modified by someone else, reload and try again"
+                )
 
             # If columns were updated, update tasks
             if board_data.columns is not None:
@@ -238,15 +261,14 @@ class BoardService:
                 )
 
             # Log activity
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.BOARD_UPDATED,
                 description=f"Updated board '{board['name']}'"
             )
 
-            # Return updated board
-            return await BoardService.get_board(user_id, board_id)
+            return BoardService._format_board(updated_board)
 
         except HTTPException:
             raise
@@ -348,7 +370,7 @@ class BoardService:
             )
 
             # Log activity
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.BOARD_UPDATED,
@@ -422,11 +444,14 @@ class BoardService:
 
             await db["tasks"].update_one(
                 {"_id": task_id},
-                {"$set": update_data}
+                {"$set": update_data, "$inc": {"version": 1}}
             )
+            await WorkloadService.apply_change(
+                board["project_id"], task, {**task, **update_data},
+                bump_stats_version=True)
 
             # Log activity
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.TASK_UPDATED,
@@ -538,7 +563,8 @@ class BoardService:
                             "$set": {
                                 "column_id": default_column_id,
                                 "updated_at": datetime.utcnow()
-                            }
+                            },
+                            "$inc": {"version": 1}
                         }
                     )
 
@@ -695,16 +721,18 @@ class BoardService:
                 bulk_operations.append({
                     "update_one": {
                         "filter": {"_id": task_id},
-                        "update": {"$set": update_data}
+                        "update": {"$set": update_data, "$inc": {"version": 1}}
                     }
                 })
 
             # Execute bulk update
             if bulk_operations:
                 await db["tasks"].bulk_write(bulk_operations)
+                await WorkloadService.rebuild_project(
+                    board["project_id"], bump_stats_version=True)
 
             # Log activity
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.BOARD_UPDATED,
@@ -763,14 +791,21 @@ class BoardService:
                         "archived": True,
                         "archived_at": datetime.utcnow(),
                         "updated_at": datetime.utcnow()
-                    }
+                    },
+                    "$inc": {"version": 1}
                 }
             )
 
+            if result.modified_count:
+                await WorkloadService.rebuild_project(
+                    board["project_id"], bump_stats_version=True)
+                AutocompleteService.invalidate(
+                    await ActivityService.resolve_organization_id(board["project_id"]))
+
             # Log activity
             column_name = next(
                 (col["name"] for col in board["columns"] if col["id"] == column_id), column_id)
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.BOARD_UPDATED,
@@ -789,32 +824,6 @@ class BoardService:
             )
     # ...existing code...
 
-    @staticmethod
-    async def _log_activity(
-        user_id: ObjectId,
-        project_id: ObjectId,
-        activity_type: ActivityType,
-        description: str,
-        target_user_id: Optional[ObjectId] = None,
-        metadata: Optional[Dict[str, Any]] = None
-    ):
-        """Log board activity"""
-        try:
-            activity_doc = {
-                "type": activity_type,
-                "user_id": user_id,
-                "project_id": project_id,
-                "target_user_id": target_user_id,
-                "description": description,
-                "metadata": metadata or {},
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            await db["activities"].insert_one(activity_doc)
-        except Exception as e:
-            logger.error(f"Failed to log activity: {str(e)}")
-            # Don't raise exception for logging failures
-
     @staticmethod
     async def delete_board(
         user_id: ObjectId,
@@ -858,7 +867,7 @@ class BoardService:
             await db["boards"].delete_one({"_id": board_id})
 
             # Log activity
-            await BoardService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=board["project_id"],
                 activity_type=ActivityType.BOARD_UPDATED,
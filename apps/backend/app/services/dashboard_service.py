@@ -5,6 +5,7 @@ from bson import ObjectId
 from fastapi import HTTPException
 from app.db.database import get_db
 from app.db.enums import TaskStatus
+from app.services.analytics_service import AnalyticsService
 from app.utils.logger import logger
 
 db = get_db()
@@ -18,15 +19,19 @@ class DashboardService:
         Get complete dashboard data with parallel queries for better performance
         """
         try:
+            # Tasks in archived projects stay off the dashboard; resolve the
+            # active project ids once for every task query below
+            project_ids = await DashboardService._get_active_project_ids(organization_id)
 
             # Run all queries in parallel for better performance
-            stats_task = DashboardService._get_dashboard_stats(organization_id)
+            stats_task = DashboardService._get_dashboard_stats(
+                organization_id, project_ids=project_ids)
             recent_tasks_task = DashboardService._get_recent_tasks(
-                organization_id, limit=5)
+                organization_id, limit=5, project_ids=project_ids)
             active_projects_task = DashboardService._get_active_projects(
                 organization_id, limit=4)
             upcoming_deadlines_task = DashboardService._get_upcoming_deadlines(
-                organization_id, days=7)
+                organization_id, days=7, project_ids=project_ids)
             recent_activity_task = DashboardService._get_recent_activity(
                 organization_id, limit=5)
             team_stats_task = DashboardService._get_team_stats(organization_id)
@@ -87,17 +92,20 @@ class DashboardService:
                 status_code=500, detail=f"Failed to get dashboard data: {str(e)}")
 
     @staticmethod
-    async def _get_dashboard_stats(organization_id: str) -> Dict[str, Any]:
+    async def _get_dashboard_stats(organization_id: str, project_ids: Optional[List[ObjectId]] = None) -> Dict[str, Any]:
         """Get dashboard statistics with aggregation pipeline for efficiency"""
         try:
             # Convert string ID to ObjectId
             org_object_id = ObjectId(organization_id)
+            if project_ids is None:
+                project_ids = await DashboardService._get_active_project_ids(organization_id)
 
             # Single aggregation query to get all task stats
             task_stats_pipeline = [
                 {
                     "$match": {
-                        "project_id": {"$in": await DashboardService._get_organization_project_ids(organization_id)},
+                        "organization_id": org_object_id,
+                        "project_id": {"$in": project_ids},
                         "archived": {"$ne": True}
                     }
                 },
@@ -140,11 +148,8 @@ class DashboardService:
                 "overdue_tasks": 0
             }
 
-            # Get project count 
-            project_count = await db["projects"].count_documents({
-                "organization_id": org_object_id,
-                "archived": {"$ne": True}
-            })
+            # Active projects are exactly the ids resolved above
+            project_count = len(project_ids)
 
             # Calculate completion rate
             completion_rate = 0
@@ -166,14 +171,16 @@ class DashboardService:
             return DashboardService._get_default_stats()
 
     @staticmethod
-    async def _get_recent_tasks(organization_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+    async def _get_recent_tasks(organization_id: str, limit: int = 5, project_ids: Optional[List[ObjectId]] = None) -> List[Dict[str, Any]]:
         """Get recent tasks with project and user details"""
         try:
-            project_ids = await DashboardService._get_organization_project_ids(organization_id)
+            if project_ids is None:
+                project_ids = await DashboardService._get_active_project_ids(organization_id)
 
             pipeline = [
                 {
                     "$match": {
+                        "organization_id": ObjectId(organization_id),
                         "project_id": {"$in": project_ids},
                         "archived": {"$ne": True}
                     }
@@ -378,16 +385,18 @@ class DashboardService:
             return []
 
     @staticmethod
-    async def _get_upcoming_deadlines(organization_id: str, days: int = 7) -> List[Dict[str, Any]]:
+    async def _get_upcoming_deadlines(organization_id: str, days: int = 7, project_ids: Optional[List[ObjectId]] = None) -> List[Dict[str, Any]]:
         """Get upcoming deadlines from tasks"""
         try:
             end_date = datetime.utcnow() + timedelta(days=days)
-            project_ids = await DashboardService._get_organization_project_ids(organization_id)
+            if project_ids is None:
+                project_ids = await DashboardService._get_active_project_ids(organization_id)
 
             # Get tasks with upcoming due dates
             tasks_pipeline = [
                 {
                     "$match": {
+                        "organization_id": ObjectId(organization_id),
                         "project_id": {"$in": project_ids},
                         "due_date": {
                             "$gte": datetime.utcnow(),
@@ -446,38 +455,18 @@ class DashboardService:
     async def _get_recent_activity(organization_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent activity from the organization"""
         try:
-            # Get activities related to organization projects
-            project_ids = await DashboardService._get_organization_project_ids(organization_id)
-
+            # Walks the (organization_id, created_at, _id) index and stops after `limit`
             pipeline = [
-                {
-                    "$match": {
-                        "$or": [
-                            {"project_id": {"$in": project_ids}},
-                            # Keep as string since metadata likely stores string IDs
-                            {"metadata.organization_id": organization_id}
-                        ]
-                    }
-                },
-                # Sort by _id instead of created_at (safer)
-                {"$sort": {"_id": -1}},
+                {"$match": {"organization_id": ObjectId(organization_id)}},
+                {"$sort": {"created_at": -1, "_id": -1}},
                 {"$limit": limit},
-                {
-                    "$lookup": {
-                        "from": "users",
-                        "localField": "user_id",
-                        "foreignField": "_id",
-                        "as": "user"
-                    }
-                },
                 {
                     "$project": {
                         "id": {"$toString": "$_id"},
                         "type": 1,
                         "description": 1,
                         "created_at": 1,
-                        "user_name": {"$arrayElemAt": ["$user.name", 0]},
-                        "user_email": {"$arrayElemAt": ["$user.email", 0]}
+                        "actor": 1
                     }
                 }
             ]
@@ -487,14 +476,11 @@ class DashboardService:
             # Format activity data, ensuring no ObjectIds remain
             formatted_activities = []
             for activity in activities:
-                user_name = activity.get("user_name", "Unknown User")
+                actor = activity.get("actor") or {}
+                user_name = actor.get("name") or "Unknown User"
 
-                # Generate avatar initials
-                avatar = ""
-                if user_name and user_name != "Unknown User":
-                    name_parts = user_name.strip().split()
-                    avatar = "".join([part[0].upper()
-                                     for part in name_parts[:2] if part])
+                # Avatar initials are part of the actor snapshot
+                avatar = actor.get("initials", "")
 
                 # Format time
                 created_at = activity.get("created_at")
@@ -568,26 +554,11 @@ class DashboardService:
             return {"team_members": 0, "active_members": 0}
 
     @staticmethod
-    async def _get_organization_project_ids(organization_id: str) -> List[ObjectId]:
-        """Get all project IDs for an organization"""
+    async def _get_active_project_ids(organization_id: str) -> List[ObjectId]:
+        """Get the ids of the organization's non-archived projects"""
         try:
-            # Convert string ID to ObjectId
-            org_object_id = ObjectId(organization_id)
-
-            # Debug: log the query
-            logger.info(
-                f"Looking for projects with organization_id: {org_object_id}")
-
-            projects = await db["projects"].find(
-                {"organization_id": org_object_id, "archived": {"$ne": True}},
-                {"_id": 1}
-            ).to_list(length=None)
-
-            logger.info(
-                f"Found {len(projects)} projects for organization {organization_id}")
-
-            return [project["_id"] for project in projects]
-
+            project_ids, _ = await AnalyticsService._get_org_version(ObjectId(organization_id))
+            return project_ids
         except Exception as e:
             logger.error(f"Failed to get organization project IDs: {str(e)}")
             return []
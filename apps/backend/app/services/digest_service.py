@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.db.database import get_db
+from app.db.enums import NotificationType
+from app.services.job_queue import JobQueue, PRIORITY_LOW
+from app.services.workload_service import CLOSED_STATUSES
+from app.utils.logger import logger
+from app.config.config import (
+    DIGEST_WEEKDAY,
+    DIGEST_HOUR,
+    DIGEST_EMAIL_BATCH_SIZE,
+    DIGEST_RUN_LEASE_SECONDS
+)
+
+db = get_db()
+
+STAT_FIELDS = ("assigned", "completed", "overdue", "mentions")
+
+
+class DigestService:
+    """
+    Weekly digest for users with `preferences.weekly_digest` enabled. One run
+    makes a single pass over the organizations with one grouped aggregation
+    on tasks each, plus one aggregation over the week's mention
+    notifications, then loads the users with activity in batches and queues
+    one email job per batch. The job renders and sends the batch through the
+    pooled mail delivery.
+
+    Runs are keyed by week in `digest_runs`. A lease keeps two workers from
+    running the same week, and a checkpoint on the last user queued lets an
+    interrupted run resume without sending twice.
+    """
+
+    @staticmethod
+    def week_window(now: datetime) -> Tuple[datetime, datetime]:
+        """The seven days before the most recent DIGEST_WEEKDAY midnight"""
+        today = datetime(now.year, now.month, now.day)
+        week_end = today - timedelta(days=(today.weekday() - DIGEST_WEEKDAY) % 7)
+        return week_end - timedelta(days=7), week_end
+
+    @staticmethod
+    async def run_if_due(now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Periodic entry point: runs once the digest day and hour have come"""
+        now = now or datetime.utcnow()
+        _, week_end = DigestService.week_window(now)
+        if now < week_end + timedelta(hours=DIGEST_HOUR):
+            return None
+        return await DigestService.run_weekly_digest(now)
+
+    @staticmethod
+    async def run_weekly_digest(now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Queue the digests for the last full week. Returns None if it already ran or is running."""
+        now = now or datetime.utcnow()
+        week_start, week_end = DigestService.week_window(now)
+        run = await DigestService._claim_run(week_start, now)
+        if run is None:
+            return None
+
+        run_id = run["_id"]
+        week_label = f"{week_start:%d %b} - {(week_end - timedelta(days=1)):%d %b %Y}"
+        stats, org_names = await DigestService.collect_stats(week_start, week_end, now)
+
+        users_with_activity = sorted(stats)
+        if run.get("last_user_id"):
+            users_with_activity = [u for u in users_with_activity if u > run["last_user_id"]]
+
+        queued = run.get("emails_queued", 0)
+        for i in range(0, len(users_with_activity), DIGEST_EMAIL_BATCH_SIZE):
+            chunk = users_with_activity[i:i + DIGEST_EMAIL_BATCH_SIZE]
+            users = await db["users"].find(
+                {
+                    "_id": {"$in": chunk},
+                    "is_active": {"$ne": False},
+                    # Missing preferences use the model default, which is opted in
+                    "preferences.weekly_digest": {"$ne": False}
+                },
+                {"name": 1, "email": 1}
+            ).to_list(length=None)
+
+            digests = [
+                DigestService._digest(user, stats[user["_id"]], org_names)
+                for user in users if user.get("email")
+            ]
+            if digests:
+                await JobQueue.enqueue(
+                    "send_weekly_digests", {"digests": digests, "week_label": week_label},
+                    priority=PRIORITY_LOW)
+                queued += len(digests)
+
+            await db["digest_runs"].update_one({"_id": run_id}, {"$set": {
+                "last_user_id": chunk[-1],
+                "emails_queued": queued,
+                "lease_until": datetime.utcnow() + timedelta(seconds=DIGEST_RUN_LEASE_SECONDS)
+            }})
+
+        summary = {
+            "week_start": week_start,
+            "organizations": len(org_names),
+            "users_with_activity": len(stats),
+            "emails_queued": queued
+        }
+        await db["digest_runs"].update_one({"_id": run_id}, {"$set": {
+            "status": "done",
+            "finished_at": datetime.utcnow(),
+            "lease_until": None,
+            **summary
+        }})
+        logger.info(f"Weekly digest {run_id}: {queued} emails queued for {len(stats)} active users")
+        return summary
+
+    @staticmethod
+    async def _claim_run(week_start: datetime, now: datetime) -> Optional[Dict[str, Any]]:
+        """Take the lease on this week's run; None if it is done or leased elsewhere"""
+        try:
+            return await db["digest_runs"].find_one_and_update(
+                {
+                    "_id": f"weekly:{week_start:%Y-%m-%d}",
+                    "status": {"$ne": "done"},
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+                },
+                {
+                    "$set": {
+                        "status": "running",
+                        "lease_until": now + timedelta(seconds=DIGEST_RUN_LEASE_SECONDS)
+                    },
+                    "$setOnInsert": {"started_at": now, "week_start": week_start}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None
+
+    @staticmethod
+    async def collect_stats(
+        week_start: datetime,
+        week_end: datetime,
+        now: datetime
+    ) -> Tuple[Dict[ObjectId, Dict[ObjectId, Dict[str, int]]], Dict[ObjectId, str]]:
+        """
+        Per user, per organization counts of open assigned, completed this
+        week, overdue and mentions this week. Users without any activity are
+        left out. Returns (stats, organization names).
+        """
+        stats: Dict[ObjectId, Dict[ObjectId, Dict[str, int]]] = {}
+        org_names: Dict[ObjectId, str] = {}
+
+        def counters(user_id: ObjectId, organization_id: ObjectId) -> Dict[str, int]:
+            return stats.setdefault(user_id, {}).setdefault(
+                organization_id, {field: 0 for field in STAT_FIELDS})
+
+        # Open or closed comes from status; completed_at (or updated_at where a
+        # path to done did not set it) only places closed tasks in the week
+        is_open = {"$not": [{"$in": ["$status", CLOSED_STATUSES]}]}
+        this_week = {"$gte": week_start, "$lt": week_end}
+        organizations = db["organizations"].find({"is_active": {"$ne": False}}, {"name": 1}).sort("_id", 1)
+        async for organization in organizations:
+            organization_id = organization["_id"]
+            org_names[organization_id] = organization.get("name", "")
+            rows = db["tasks"].aggregate([
+                {"$match": {
+                    "organization_id": organization_id,
+                    "assignee_id": {"$ne": None},
+                    "archived": {"$ne": True},
+                    "$or": [
+                        {"status": {"$nin": CLOSED_STATUSES}},
+                        {"completed_at": this_week},
+                        {"completed_at": None, "updated_at": this_week}
+                    ]
+                }},
+                {"$group": {
+                    "_id": "$assignee_id",
+                    "assigned": {"$sum": {"$cond": [is_open, 1, 0]}},
+                    "completed": {"$sum": {"$cond": [is_open, 0, 1]}},
+                    "overdue": {"$sum": {"$cond": [{"$and": [
+                        is_open,
+                        {"$gt": ["$due_date", None]},
+                        {"$lt": ["$due_date", now]}
+                    ]}, 1, 0]}}
+                }}
+            ])
+            async for row in rows:
+                user_counters = counters(row["_id"], organization_id)
+                for field in ("assigned", "completed", "overdue"):
+                    user_counters[field] = row[field]
+
+        mentions = db["notifications"].aggregate([
+            {"$match": {
+                "type": NotificationType.MENTION.value,
+                "created_at": {"$gte": week_start, "$lt": week_end}
+            }},
+            {"$group": {
+                "_id": {"user_id": "$recipient_id", "organization_id": "$data.organization_id"},
+                "count": {"$sum": 1}
+            }}
+        ])
+        async for row in mentions:
+            organization_id = row["_id"].get("organization_id")
+            if not organization_id or ObjectId(organization_id) not in org_names:
+                continue
+            counters(row["_id"]["user_id"], ObjectId(organization_id))["mentions"] = row["count"]
+
+        for user_id in list(stats):
+            stats[user_id] = {
+                organization_id: counts
+                for organization_id, counts in stats[user_id].items()
+                if any(counts.values())
+            }
+            if not stats[user_id]:
+                del stats[user_id]
+        return stats, org_names
+
+    @staticmethod
+    def _digest(
+        user: Dict[str, Any],
+        user_stats: Dict[ObjectId, Dict[str, int]],
+        org_names: Dict[ObjectId, str]
+    ) -> Dict[str, Any]:
+        return {
+            "email": user["email"],
+            "name": user.get("name"),
+            "organizations": [
+                {"name": org_names.get(organization_id, ""), **counts}
+                for organization_id, counts in sorted(
+                    user_stats.items(), key=lambda item: org_names.get(item[0], "").lower())
+            ]
+        }
@@ -1,23 +1,30 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 import secrets
-from app.config.config import FRONTEND_URL, EMAIL_USER, EMAIL_PASS
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from app.config.config import FRONTEND_URL
 from app.db.database import get_db
+from app.services.mail_delivery import mail_delivery, build_message
+from app.services.job_queue import JobQueue, PRIORITY_LOW
 
 db = get_db()
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=EMAIL_USER,
-    MAIL_PASSWORD=EMAIL_PASS,
-    MAIL_FROM=f"TaskForge <{EMAIL_USER}>",
-    MAIL_PORT=587,
-    MAIL_SERVER="smtp.gmail.com",
-    MAIL_FROM_NAME="TaskForge",
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True
+TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "templates" / "email"
+template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"])
 )
 
-fast_mail = FastMail(conf)
+# Compiled once per process, each send only renders
+TEMPLATES = {
+    name: template_env.get_template(f"{name}.html")
+    for name in ("verification", "invitation", "password_reset", "notification", "otp", "weekly_digest")
+}
+
+
+def render_email(template: str, **context) -> str:
+    return TEMPLATES[template].render(**context)
 
 
 def generate_verification_token() -> str:
@@ -26,105 +33,20 @@ def generate_verification_token() -> str:
 
 async def send_verification_email(email: str, token: str):
     verification_link = f"{FRONTEND_URL}/user/verify-email?token={token}"
-    html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Verify Your Email - TaskForge</title>
-        </head>
-        <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #0a0a0a;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff;">
-                <!-- Header -->
-                <div style="background: linear-gradient(135deg, #2563EB 0%, #1d4ed8 100%); padding: 40px 30px; text-align: center;">
-                    <div style="background: rgba(255,255,255,0.1); width: 80px; height: 80px; border-radius: 16px; display: inline-flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                        <svg width="32" height="32" viewBox="0 0 28 28" fill="none">
-                            <rect x="6" y="7" width="4" height="14" rx="2" fill="white" />
-                            <rect x="12" y="7" width="4" height="10" rx="2" fill="white" />
-                            <rect x="18" y="7" width="4" height="6" rx="2" fill="white" />
-                        </svg>
-                    </div>
-                    <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 700;">TaskForge</h1>
-                    <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Project Management Platform</p>
-                </div>
-                
-                <!-- Content -->
-                <div style="padding: 40px 30px;">
-                    <h2 style="color: #1f2937; margin: 0 0 20px 0; font-size: 24px; font-weight: 600;">Welcome to TaskForge!</h2>
-                    <p style="color: #4b5563; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                        Thank you for creating your TaskForge account. To get started with managing your projects and collaborating with your team, please verify your email address.
-                    </p>
-                    
-                    <!-- Verification Button -->
-                    <div style="text-align: center; margin: 40px 0;">
-                        <a href="{verification_link}" 
-                           style="background: #2563EB; color: white; padding: 16px 32px; text-decoration: none; border-radius: 8px; display: inline-block; font-weight: 600; font-size: 16px; box-shadow: 0 4px 12px rgba(37, 99, 235, 0.3);">
-                            Verify Email Address
-                        </a>
-                    </div>
-                    
-                    <!-- Features Preview -->
-                    <div style="background: #f8fafc; border-radius: 12px; padding: 24px; margin: 30px 0;">
-                        <h3 style="color: #1f2937; margin: 0 0 16px 0; font-size: 18px; font-weight: 600;">What's next?</h3>
-                        <div style="display: flex; align-items: flex-start; margin-bottom: 12px;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Create your first project and organize tasks</p>
-                        </div>
-                        <div style="display: flex; align-items: flex-start; margin-bottom: 12px;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Invite team members to collaborate</p>
-                        </div>
-                        <div style="display: flex; align-items: flex-start;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Track progress with boards and analytics</p>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Footer -->
-                <div style="background: #f9fafb; padding: 30px; border-top: 1px solid #e5e7eb;">
-                    <p style="color: #6b7280; font-size: 14px; margin: 0 0 10px 0;">
-                        If the button doesn't work, copy and paste this link into your browser:
-                    </p>
-                    <p style="color: #3b82f6; font-size: 14px; word-break: break-all; margin: 0 0 20px 0;">
-                        <a href="{verification_link}" style="color: #3b82f6; text-decoration: none;">{verification_link}</a>
-                    </p>
-                    <div style="border-top: 1px solid #e5e7eb; padding-top: 20px; margin-top: 20px;">
-                        <p style="color: #9ca3af; font-size: 12px; margin: 0; text-align: center;">
-                            This verification link will expire in 24 hours.<br>
-                            If you didn't create a TaskForge account, you can safely ignore this email.
-                        </p>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-    """
-
-    message = MessageSchema(
-        subject="Verify Your TaskForge Account",
-        recipients=[email],
-        body=html,
-        subtype="html"
-    )
-    await fast_mail.send_message(message)
+    html = render_email("verification", verification_link=verification_link)
+    await mail_delivery.send(build_message(email, "Verify Your TaskForge Account", html))
 
 
-async def send_invitation_email(
+def _invitation_message(
     email: str,
     organization_name: str,
     inviter_name: str,
     token: str,
-    role: str = "member",
-    message: str = None
-):
-    """Send invitation email with smart routing based on user existence"""
-
-    # Check if user already exists
-    existing_user = await db["users"].find_one({"email": email})
-
-    if existing_user:
+    role: str,
+    message: Optional[str],
+    user_exists: bool
+) -> EmailMessage:
+    if user_exists:
         # Existing user - direct accept invitation
         invitation_link = f"{FRONTEND_URL}/user/login?token={token}"
         action_text = "Accept Invitation"
@@ -139,224 +61,107 @@ async def send_invitation_email(
         header_title = f"Welcome to {organization_name}"
         header_subtitle = "Create your account to get started"
 
-    # Personal message section
-    personal_message_html = ""
-    if message:
-        personal_message_html = f"""
-            <div style="background: #ecfdf5; border: 1px solid #d1fae5; border-radius: 8px; padding: 20px; margin: 20px 0;">
-                <div style="display: flex; align-items: flex-start;">
-                    <div style="background: #10b981; color: white; width: 24px; height: 24px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 14px;">💬</div>
-                    <div>
-                        <p style="color: #065f46; margin: 0 0 8px 0; font-weight: 600; font-size: 14px;">Personal message from {inviter_name}:</p>
-                        <p style="color: #047857; margin: 0; font-size: 14px; font-style: italic;">"{message}"</p>
-                    </div>
-                </div>
-            </div>
-        """
+    html = render_email(
+        "invitation",
+        organization_name=organization_name,
+        inviter_name=inviter_name,
+        role=role,
+        message=message,
+        invitation_link=invitation_link,
+        action_text=action_text,
+        instruction=instruction,
+        header_title=header_title,
+        header_subtitle=header_subtitle
+    )
+    return build_message(email, f"Invitation to join {organization_name} - TaskForge", html)
 
-    html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Invitation to {organization_name} - TaskForge</title>
-        </head>
-        <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #0a0a0a;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff;">
-                <!-- Header -->
-                <div style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); padding: 40px 30px; text-align: center;">
-                    <div style="background: rgba(255,255,255,0.1); width: 80px; height: 80px; border-radius: 16px; display: inline-flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                        <svg width="32" height="32" viewBox="0 0 28 28" fill="none">
-                            <rect x="6" y="7" width="4" height="14" rx="2" fill="white" />
-                            <rect x="12" y="7" width="4" height="10" rx="2" fill="white" />
-                            <rect x="18" y="7" width="4" height="6" rx="2" fill="white" />
-                        </svg>
-                    </div>
-                    <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 700;">TaskForge</h1>
-                    <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Project Management Platform</p>
-                </div>
-                
-                <!-- Content -->
-                <div style="padding: 40px 30px;">
-                    <h2 style="color: #1f2937; margin: 0 0 20px 0; font-size: 24px; font-weight: 600;">{header_title}</h2>
-                    <p style="color: #4b5563; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                        {header_subtitle}
-                    </p>
-                    
-                    <!-- Invitation Details -->
-                    <div style="background: #f8fafc; border-radius: 12px; padding: 24px; margin: 20px 0;">
-                        <div style="display: flex; align-items: center; margin-bottom: 16px;">
-                            <div style="background: #3b82f6; color: white; width: 32px; height: 32px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; font-size: 16px;">👥</div>
-                            <div>
-                                <p style="color: #1f2937; margin: 0; font-weight: 600; font-size: 16px;">{organization_name}</p>
-                                <p style="color: #6b7280; margin: 0; font-size: 14px;">Organization</p>
-                            </div>
-                        </div>
-                        <div style="display: flex; align-items: center; margin-bottom: 16px;">
-                            <div style="background: #8b5cf6; color: white; width: 32px; height: 32px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; font-size: 16px;">👤</div>
-                            <div>
-                                <p style="color: #1f2937; margin: 0; font-weight: 600; font-size: 16px;">{inviter_name}</p>
-                                <p style="color: #6b7280; margin: 0; font-size: 14px;">Invited by</p>
-                            </div>
-                        </div>
-                        <div style="display: flex; align-items: center;">
-                            <div style="background: #f59e0b; color: white; width: 32px; height: 32px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; font-size: 16px;">🎯</div>
-                            <div>
-                                <p style="color: #1f2937; margin: 0; font-weight: 600; font-size: 16px;">{role.title()}</p>
-                                <p style="color: #6b7280; margin: 0; font-size: 14px;">Role</p>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    {personal_message_html}
-                    
-                    <p style="color: #4b5563; font-size: 16px; line-height: 1.6; margin: 20px 0;">
-                        {instruction}
-                    </p>
-                    
-                    <!-- Invitation Button -->
-                    <div style="text-align: center; margin: 40px 0;">
-                        <a href="{invitation_link}" 
-                           style="background: #10b981; color: white; padding: 16px 32px; text-decoration: none; border-radius: 8px; display: inline-block; font-weight: 600; font-size: 16px; box-shadow: 0 4px 12px rgba(16, 185, 129, 0.3);">
-                            {action_text}
-                        </a>
-                    </div>
-                    
-                    <!-- Organization Benefits -->
-                    <div style="background: #f8fafc; border-radius: 12px; padding: 24px; margin: 30px 0;">
-                        <h3 style="color: #1f2937; margin: 0 0 16px 0; font-size: 18px; font-weight: 600;">What you'll get access to:</h3>
-                        <div style="display: flex; align-items: flex-start; margin-bottom: 12px;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Collaborate on projects and manage tasks together</p>
-                        </div>
-                        <div style="display: flex; align-items: flex-start; margin-bottom: 12px;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Real-time communication and updates</p>
-                        </div>
-                        <div style="display: flex; align-items: flex-start; margin-bottom: 12px;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Access to shared resources and documentation</p>
-                        </div>
-                        <div style="display: flex; align-items: flex-start;">
-                            <div style="background: #10b981; color: white; width: 20px; height: 20px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 12px;">✓</div>
-                            <p style="color: #4b5563; margin: 0; font-size: 14px;">Analytics and progress tracking</p>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Footer -->
-                <div style="background: #f9fafb; padding: 30px; border-top: 1px solid #e5e7eb;">
-                    <p style="color: #6b7280; font-size: 14px; margin: 0 0 10px 0;">
-                        If the button doesn't work, copy and paste this link into your browser:
-                    </p>
-                    <p style="color: #3b82f6; font-size: 14px; word-break: break-all; margin: 0 0 20px 0;">
-                        <a href="{invitation_link}" style="color: #3b82f6; text-decoration: none;">{invitation_link}</a>
-                    </p>
-                    <div style="border-top: 1px solid #e5e7eb; padding-top: 20px; margin-top: 20px;">
-                        <p style="color: #9ca3af; font-size: 12px; margin: 0; text-align: center;">
-                            This invitation link will expire in 7 days.<br>
-                            If you didn't expect this invitation, you can safely ignore this email.
-                        </p>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-    """
 
-    message = MessageSchema(
-        subject=f"Invitation to join {organization_name} - TaskForge",
-        recipients=[email],
-        body=html,
-        subtype="html"
+async def send_invitation_email(
+    email: str,
+    organization_name: str,
+    inviter_name: str,
+    token: str,
+    role: str = "member",
+    message: str = None,
+    user_exists: Optional[bool] = None
+):
+    """Send invitation email with smart routing based on user existence"""
+
+    if user_exists is None:
+        # Check if user already exists
+        user_exists = await db["users"].find_one({"email": email}, {"_id": 1}) is not None
+
+    await mail_delivery.send(_invitation_message(
+        email, organization_name, inviter_name, token, role, message, user_exists))
+
+
+async def send_invitation_emails(
+    organization_name: str,
+    inviter_name: str,
+    role: str,
+    invitations: List[Dict[str, Any]],
+    message: str = None
+):
+    """
+    Send a batch of invitations (`email`, `token`, `user_exists` each) in one
+    delivery. Addresses that fail are queued again as single-invitation jobs
+    so a retry does not resend the ones that went out.
+    """
+    messages = [
+        _invitation_message(
+            invitation["email"], organization_name, inviter_name, invitation["token"],
+            role, message, invitation["user_exists"])
+        for invitation in invitations
+    ]
+    errors = await mail_delivery.send_many(messages, priority=PRIORITY_LOW)
+    for invitation, error in zip(invitations, errors):
+        if error:
+            await JobQueue.enqueue("send_invitation_email", {
+                "email": invitation["email"],
+                "organization_name": organization_name,
+                "inviter_name": inviter_name,
+                "token": invitation["token"],
+                "role": role,
+                "message": message,
+                "user_exists": invitation["user_exists"]
+            })
+
+
+def _weekly_digest_message(digest: Dict[str, Any], week_label: str) -> EmailMessage:
+    html = render_email(
+        "weekly_digest",
+        name=digest.get("name"),
+        week_label=week_label,
+        organizations=digest["organizations"],
+        dashboard_link=FRONTEND_URL
     )
-    await fast_mail.send_message(message)
+    return build_message(digest["email"], f"Your week in TaskForge ({week_label})", html)
+
+
+async def send_weekly_digests(digests: List[Dict[str, Any]], week_label: str):
+    """
+    Render and deliver a batch of digests (`email`, `name`, `organizations`
+    each) over pooled connections. Failed addresses go back on the queue as
+    single-digest jobs; a single digest that fails raises so the queue
+    retries it with backoff.
+    """
+    messages = [_weekly_digest_message(digest, week_label) for digest in digests]
+    errors = await mail_delivery.send_many(messages, priority=PRIORITY_LOW)
+    if len(digests) == 1 and errors[0]:
+        raise errors[0]
+    for digest, error in zip(digests, errors):
+        if error:
+            await JobQueue.enqueue(
+                "send_weekly_digests", {"digests": [digest], "week_label": week_label},
+                priority=PRIORITY_LOW)
 
 
 async def send_password_reset_email(email: str, token: str, user_name: str = None):
     """Send password reset email"""
     reset_link = f"{FRONTEND_URL}/reset-password?token={token}"
 
-    html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Reset Your Password - TaskForge</title>
-        </head>
-        <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #0a0a0a;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff;">
-                <!-- Header -->
-                <div style="background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%); padding: 40px 30px; text-align: center;">
-                    <div style="background: rgba(255,255,255,0.1); width: 80px; height: 80px; border-radius: 16px; display: inline-flex; align-items: center; justify-content: center; margin-bottom: 20px;">
-                        <svg width="32" height="32" viewBox="0 0 28 28" fill="none">
-                            <path d="M14 8v4m0 4h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z" stroke="white" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
-                        </svg>
-                    </div>
-                    <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 700;">TaskForge</h1>
-                    <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Password Reset Request</p>
-                </div>
-                
-                <!-- Content -->
-                <div style="padding: 40px 30px;">
-                    <h2 style="color: #1f2937; margin: 0 0 20px 0; font-size: 24px; font-weight: 600;">
-                        Reset Your Password{f", {user_name}" if user_name else ""}
-                    </h2>
-                    <p style="color: #4b5563; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                        We received a request to reset your password for your TaskForge account. If you made this request, click the button below to set a new password.
-                    </p>
-                    
-                    <!-- Reset Button -->
-                    <div style="text-align: center; margin: 40px 0;">
-                        <a href="{reset_link}" 
-                           style="background: #dc2626; color: white; padding: 16px 32px; text-decoration: none; border-radius: 8px; display: inline-block; font-weight: 600; font-size: 16px; box-shadow: 0 4px 12px rgba(220, 38, 38, 0.3);">
-                            Reset Password
-                        </a>
-                    </div>
-                    
-                    <!-- Security Notice -->
-                    <div style="background: #fef3c7; border: 1px solid #f59e0b; border-radius: 8px; padding: 20px; margin: 30px 0;">
-                        <div style="display: flex; align-items: flex-start;">
-                            <div style="background: #f59e0b; color: white; width: 24px; height: 24px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-right: 12px; flex-shrink: 0; font-size: 14px;">⚠️</div>
-                            <div>
-                                <p style="color: #92400e; margin: 0 0 8px 0; font-weight: 600; font-size: 14px;">Security Notice:</p>
-                                <p style="color: #b45309; margin: 0; font-size: 14px;">
-                                    If you didn't request this password reset, please ignore this email. Your password will not be changed unless you click the button above and create a new password.
-                                </p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- Footer -->
-                <div style="background: #f9fafb; padding: 30px; border-top: 1px solid #e5e7eb;">
-                    <p style="color: #6b7280; font-size: 14px; margin: 0 0 10px 0;">
-                        If the button doesn't work, copy and paste this link into your browser:
-                    </p>
-                    <p style="color: #3b82f6; font-size: 14px; word-break: break-all; margin: 0 0 20px 0;">
-                        <a href="{reset_link}" style="color: #3b82f6; text-decoration: none;">{reset_link}</a>
-                    </p>
-                    <div style="border-top: 1px solid #e5e7eb; padding-top: 20px; margin-top: 20px;">
-                        <p style="color: #9ca3af; font-size: 12px; margin: 0; text-align: center;">
-                            This password reset link will expire in 1 hour.<br>
-                            For security reasons, please reset your password as soon as possible.
-                        </p>
-                    </div>
-                </div>
-            </div>
-        </body>
-        </html>
-    """
-
-    message = MessageSchema(
-        subject="Reset Your TaskForge Password",
-        recipients=[email],
-        body=html,
-        subtype="html"
-    )
-    await fast_mail.send_message(message)
+    html = render_email("password_reset", reset_link=reset_link, user_name=user_name)
+    await mail_delivery.send(build_message(email, "Reset Your TaskForge Password", html))
 
 
 async def send_notification_email(
@@ -396,63 +201,13 @@ async def send_notification_email(
 
     scheme = color_schemes.get(notification_type, color_schemes["info"])
 
-    # Action button section
-    action_button_html = ""
-    if action_text and action_link:
-        action_button_html = f"""
-            <div style="text-align: center; margin: 40px 0;">
-                <a href="{action_link}" 
-                   style="background: {scheme['button_color']}; color: white; padding: 16px 32px; text-decoration: none; border-radius: 8px; display: inline-block; font-weight: 600; font-size: 16px; box-shadow: 0 4px 12px rgba({scheme['button_color'][1:]}, 0.3);">
-                    {action_text}
-                </a>
-            </div>
-        """
-
-    html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{subject} - TaskForge</title>
-        </head>
-        <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #0a0a0a;">
-            <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff;">
-                <!-- Header -->
-                <div style="background: {scheme['gradient']}; padding: 40px 30px; text-align: center;">
-                    <div style="background: rgba(255,255,255,0.1); width: 80px; height: 80px; border-radius: 16px; display: inline-flex; align-items: center; justify-content: center; margin-bottom: 20px; font-size: 32px;">
-                        {scheme['icon']}
-                    </div>
-                    <h1 style="color: white; margin: 0; font-size: 28px; font-weight: 700;">TaskForge</h1>
-                    <p style="color: rgba(255,255,255,0.9); margin: 10px 0 0 0; font-size: 16px;">Notification</p>
-                </div>
-                
-                <!-- Content -->
-                <div style="padding: 40px 30px;">
-                    <h2 style="color: #1f2937; margin: 0 0 20px 0; font-size: 24px; font-weight: 600;">{title}</h2>
-                    <div style="color: #4b5563; font-size: 16px; line-height: 1.6; margin: 0 0 20px 0;">
-                        {content}
-                    </div>
-                    
-                    {action_button_html}
-                </div>
-                
-                <!-- Footer -->
-                <div style="background: #f9fafb; padding: 30px; border-top: 1px solid #e5e7eb;">
-                    <p style="color: #9ca3af; font-size: 12px; margin: 0; text-align: center;">
-                        This is an automated notification from TaskForge.<br>
-                        If you have any questions, please contact our support team.
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-    """
-
-    message = MessageSchema(
-        subject=f"{subject} - TaskForge",
-        recipients=[email],
-        body=html,
-        subtype="html"
+    html = render_email(
+        "notification",
+        subject=subject,
+        title=title,
+        content=content,
+        action_text=action_text,
+        action_link=action_link,
+        scheme=scheme
     )
-    await fast_mail.send_message(message)
+    await mail_delivery.send(build_message(email, f"{subject} - TaskForge", html))
@@ -0,0 +1,250 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Any, List, AsyncIterator, Callable, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from app.db.database import get_db
+from app.config.config import EXPORT_BATCH_SIZE
+from app.utils.permissions import verify_user_access_to_project
+from app.services.activity_service import ActivityService
+from app.utils.logger import logger
+
+db = get_db()
+
+TASK_FIELDS = [
+    "id", "title", "status", "priority", "project", "assignee", "labels",
+    "due_date", "estimated_hours", "actual_hours", "created_at", "updated_at", "completed_at"
+]
+TASK_PROJECTION = {
+    "title": 1, "status": 1, "priority": 1, "project_id": 1, "assignee_id": 1, "labels": 1,
+    "due_date": 1, "estimated_hours": 1, "actual_hours": 1,
+    "created_at": 1, "updated_at": 1, "completed_at": 1
+}
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+ACTIVITY_FIELDS = ["id", "created_at", "type", "user", "project", "description"]
+ACTIVITY_PROJECTION = {
+    "type": 1, "actor": 1, "project_id": 1, "description": 1, "created_at": 1
+}
+
+
+def _format_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+# Leading characters a spreadsheet treats as the start of a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value: Any) -> Any:
+    """Quote user text that a spreadsheet would otherwise run as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ExportService:
+    """
+    Exports stream rows from a Motor cursor in batches, so memory use is
+    bounded by EXPORT_BATCH_SIZE and not by the size of the organization.
+    Access checks run before the stream is returned, so errors still become
+    normal HTTP responses instead of a truncated download.
+    """
+
+    @staticmethod
+    async def _name_maps(organization_id: ObjectId, project_ids: List[ObjectId]) -> Dict[str, Dict[ObjectId, str]]:
+        """Project and member names, bounded by org size rather than task count"""
+        projects = await db["projects"].find(
+            {"_id": {"$in": project_ids}}, {"name": 1}
+        ).to_list(length=None)
+        members = await db["users"].find(
+            {"organizations.organization_id": organization_id}, {"name": 1}
+        ).to_list(length=None)
+        return {
+            "projects": {p["_id"]: p.get("name", "") for p in projects},
+            "users": {u["_id"]: u.get("name", "") for u in members}
+        }
+
+    @staticmethod
+    async def _stream_rows(
+        collection: str,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        fields: List[str],
+        to_row: Callable[[Dict[str, Any]], Dict[str, Any]],
+        export_format: str,
+        sort: Optional[List[Tuple[str, int]]] = None
+    ) -> AsyncIterator[bytes]:
+        # Only sort on orders an index already provides; a blocking sort
+        # would have to hold the whole result set on the server
+        cursor = db[collection].find(query, projection).batch_size(EXPORT_BATCH_SIZE)
+        if sort:
+            cursor = cursor.sort(sort)
+        buffer = io.StringIO()
+        writer = None
+        if export_format == "csv":
+            writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+
+        pending = 0
+        try:
+            async for doc in cursor:
+                row = {key: _format_value(value) for key, value in to_row(doc).items()}
+                if writer:
+                    writer.writerow({key: _csv_safe(value) for key, value in row.items()})
+                else:
+                    buffer.write(json.dumps(row, default=str))
+                    buffer.write("\n")
+                pending += 1
+
+                if pending >= EXPORT_BATCH_SIZE:
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        except Exception as e:
+            logger.error(f"Export of {collection} failed mid-stream: {str(e)}")
+            raise
+        finally:
+            await cursor.close()
+
+    @staticmethod
+    def _task_rows(names: Dict[str, Dict[ObjectId, str]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        def to_row(task: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "id": task["_id"],
+                "title": task.get("title", ""),
+                "status": task.get("status"),
+                "priority": task.get("priority"),
+                "project": names["projects"].get(task.get("project_id"), ""),
+                "assignee": names["users"].get(task.get("assignee_id"), ""),
+                "labels": ";".join(task.get("labels") or []),
+                "due_date": task.get("due_date"),
+                "estimated_hours": task.get("estimated_hours"),
+                "actual_hours": task.get("actual_hours"),
+                "created_at": task.get("created_at"),
+                "updated_at": task.get("updated_at"),
+                "completed_at": task.get("completed_at")
+            }
+        return to_row
+
+    @staticmethod
+    async def export_project_tasks(
+        user_id: ObjectId,
+        project_id: ObjectId,
+        export_format: str = "csv",
+        include_archived: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Stream every task of a project"""
+        access = await verify_user_access_to_project(user_id, project_id)
+        project = access["project"]
+
+        query: Dict[str, Any] = {"project_id": project_id}
+        if not include_archived:
+            query["archived"] = False
+
+        names = await ExportService._name_maps(project["organization_id"], [project_id])
+        return ExportService._stream_rows(
+            "tasks", query, TASK_PROJECTION, TASK_FIELDS,
+            ExportService._task_rows(names), export_format)
+
+    @staticmethod
+    async def export_organization_tasks(
+        user_id: ObjectId,
+        organization_id: ObjectId,
+        export_format: str = "csv",
+        include_archived: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Stream the tasks of every organization project the user has joined"""
+        project_ids = await ActivityService.get_accessible_project_ids(user_id, organization_id)
+
+        query: Dict[str, Any] = {"organization_id": organization_id, "project_id": {"$in": project_ids}}
+        if not include_archived:
+            query["archived"] = False
+
+        names = await ExportService._name_maps(organization_id, project_ids)
+        return ExportService._stream_rows(
+            "tasks", query, TASK_PROJECTION, TASK_FIELDS,
+            ExportService._task_rows(names), export_format,
+            sort=[("organization_id", 1), ("_id", 1)])
+
+    @staticmethod
+    async def export_organization_activities(
+        user_id: ObjectId,
+        organization_id: ObjectId,
+        export_format: str = "csv",
+        project_id: Optional[ObjectId] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream raw activities (newer than the retention window) of the organization"""
+        project_ids = await ActivityService.get_accessible_project_ids(user_id, organization_id)
+        if project_id:
+            if project_id not in project_ids:
+                raise HTTPException(status_code=403, detail="Access denied to this project")
+            project_ids = [project_id]
+
+        query: Dict[str, Any] = {"organization_id": organization_id, "project_id": {"$in": project_ids}}
+        if date_from or date_to:
+            query["created_at"] = {}
+            if date_from:
+                query["created_at"]["$gte"] = date_from
+            if date_to:
+                query["created_at"]["$lte"] = date_to
+
+        names = await ExportService._name_maps(organization_id, project_ids)
+
+        def to_row(activity: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "id": activity["_id"],
+                "created_at": activity.get("created_at"),
+                "type": activity.get("type"),
+                "user": (activity.get("actor") or {}).get("name", ""),
+                "project": names["projects"].get(activity.get("project_id"), ""),
+                "description": activity.get("description", "")
+            }
+
+        return ExportService._stream_rows(
+            "activities", query, ACTIVITY_PROJECTION, ACTIVITY_FIELDS, to_row, export_format,
+            sort=[("created_at", 1), ("_id", 1)])
+
+    @staticmethod
+    async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Compress a byte stream incrementally into a single gzip member"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @staticmethod
+    def to_response(
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        export_format: str,
+        compress: bool = False
+    ) -> StreamingResponse:
+        filename = f"{filename}-{datetime.utcnow().strftime('%Y%m%d')}.{export_format}"
+        media_type = MEDIA_TYPES[export_format]
+        if compress:
+            chunks = ExportService.gzip_stream(chunks)
+            filename += ".gz"
+            media_type = "application/gzip"
+        return StreamingResponse(
+            chunks,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
@@ -0,0 +1,418 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Any, List, AsyncIterator, Iterator, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from app.db.database import get_db
+from app.db.enums import ActivityType
+from app.models.task import TaskCreate
+from app.config.config import IMPORT_BATCH_SIZE, IMPORT_MAX_ERRORS, IMPORT_MAX_RECORD_BYTES
+from app.utils.permissions import verify_user_access_to_project
+from app.services.task_service import TaskService
+from app.services.activity_service import ActivityService
+from app.services.workload_service import WorkloadService
+from app.services.autocomplete_service import AutocompleteService
+from app.utils.logger import logger
+
+db = get_db()
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class RecordTooLarge(Exception):
+    pass
+
+
+async def _iter_records(chunks: AsyncIterator[bytes], import_format: str) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Incrementally split an upload into records: NDJSON lines, or CSV records
+    (quoted fields may contain newlines, so a record ends only at a newline
+    with balanced quotes). Yields (row number, raw record).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record = ""
+    row_number = 0
+
+    def complete_records(text: str) -> Iterator[str]:
+        nonlocal record
+        # Only "\n" ends a line; splitlines() would also break on \x85, \u2028
+        # and other characters that may appear inside a value
+        start = 0
+        while start < len(text):
+            end = text.find("\n", start) + 1 or len(text)
+            record += text[start:end]
+            start = end
+            if len(record) > IMPORT_MAX_RECORD_BYTES:
+                raise RecordTooLarge()
+            if import_format == "ndjson" or record.count('"') % 2 == 0:
+                if record.strip():
+                    yield record
+                record = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # Keep the trailing partial line for the next chunk
+        cut = pending.rfind("\n") + 1
+        text, pending = pending[:cut], pending[cut:]
+        if len(pending) > IMPORT_MAX_RECORD_BYTES:
+            raise RecordTooLarge()
+        for raw in complete_records(text):
+            row_number += 1
+            yield row_number, raw
+
+    pending += decoder.decode(b"", final=True)
+    for raw in complete_records(pending + ("\n" if pending else "")):
+        row_number += 1
+        yield row_number, raw
+    if record.strip():
+        row_number += 1
+        yield row_number, record
+
+
+def _blank_to_none(value: Any) -> Any:
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+class ImportService:
+    """
+    Task imports run in two steps: create a job for a project, then stream
+    the file as the raw request body to that job. Rows are validated against
+    TaskCreate and written in insert_many batches. The next batch is only
+    read from the socket after the previous one is stored, and the job
+    document carries progress and row-level errors for polling.
+    """
+
+    @staticmethod
+    async def create_job(
+        user_id: ObjectId,
+        project_id: ObjectId,
+        import_format: str,
+        board_id: Optional[ObjectId] = None
+    ) -> Dict[str, Any]:
+        """Create a pending import job for a project"""
+        try:
+            access = await verify_user_access_to_project(user_id, project_id)
+
+            board_query = {"project_id": project_id}
+            if board_id:
+                board_query["_id"] = board_id
+            board = await db["boards"].find_one(board_query, {"_id": 1})
+            if not board:
+                raise HTTPException(status_code=404, detail="Board not found")
+
+            now = datetime.utcnow()
+            job = {
+                "project_id": project_id,
+                "organization_id": access["project"]["organization_id"],
+                "board_id": board["_id"],
+                "user_id": user_id,
+                "format": import_format,
+                "status": "pending",
+                "processed": 0,
+                "inserted": 0,
+                "failed": 0,
+                "errors": [],
+                "created_at": now,
+                "updated_at": now,
+                "finished_at": None
+            }
+            result = await db["import_jobs"].insert_one(job)
+            job["_id"] = result.inserted_id
+            return ImportService._format_job(job)
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to create import job: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to create import job: {str(e)}"
+            )
+
+    @staticmethod
+    async def get_job(user_id: ObjectId, job_id: ObjectId) -> Dict[str, Any]:
+        job = await db["import_jobs"].find_one({"_id": job_id, "user_id": user_id})
+        if not job:
+            raise HTTPException(status_code=404, detail="Import job not found")
+        return ImportService._format_job(job)
+
+    @staticmethod
+    async def run_job(
+        user_id: ObjectId,
+        job_id: ObjectId,
+        chunks: AsyncIterator[bytes]
+    ) -> Dict[str, Any]:
+        """Consume the uploaded body for a pending job"""
+        # Claim the job atomically so the same job cannot be fed twice
+        job = await db["import_jobs"].find_one_and_update(
+            {"_id": job_id, "user_id": user_id, "status": "pending"},
+            {"$set": {"status": "running", "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not job:
+            raise HTTPException(status_code=409, detail="Import job not found or already started")
+
+        try:
+            board = await db["boards"].find_one({"_id": job["board_id"]})
+            project = await db["projects"].find_one({"_id": job["project_id"]})
+            context = await ImportService._build_context(job, board, project)
+
+            batch: List[Tuple[int, Dict[str, Any]]] = []
+            async for row_number, raw in _iter_records(chunks, job["format"]):
+                parsed = ImportService._parse_record(raw, job["format"], context)
+                if parsed is None:
+                    continue  # CSV header
+                batch.append((row_number, parsed))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await ImportService._process_batch(job, batch, context)
+                    batch = []
+            if batch:
+                await ImportService._process_batch(job, batch, context)
+
+            status = "completed"
+        except RecordTooLarge:
+            await ImportService._record_errors(job, [{"row": None, "errors": ["Record exceeds maximum size"]}])
+            status = "failed"
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed: {str(e)}")
+            await ImportService._record_errors(job, [{"row": None, "errors": [str(e)]}])
+            status = "failed"
+
+        job = await db["import_jobs"].find_one_and_update(
+            {"_id": job_id},
+            {"$set": {"status": status, "finished_at": datetime.utcnow(), "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+        if job["inserted"]:
+            await WorkloadService.rebuild_project(
+                job["project_id"], bump_stats_version=True)
+            AutocompleteService.invalidate(job["organization_id"])
+            await ActivityService.log_activity(
+                user_id=user_id,
+                project_id=job["project_id"],
+                activity_type=ActivityType.TASK_CREATED,
+                description=f"Imported {job['inserted']} tasks",
+                metadata={"import_job_id": str(job_id), "failed": job["failed"]},
+                organization_id=job["organization_id"]
+            )
+
+        return ImportService._format_job(job)
+
+    @staticmethod
+    async def _build_context(job: Dict[str, Any], board: Dict[str, Any], project: Dict[str, Any]) -> Dict[str, Any]:
+        columns = board.get("columns", [])
+        column_lookup = {}
+        for column in columns:
+            column_lookup[column["id"].lower()] = column["id"]
+            column_lookup[column.get("name", column["id"]).lower()] = column["id"]
+
+        # Next free position per column, read once; positions are then handed out in memory
+        positions = await db["tasks"].aggregate([
+            {"$match": {"board_id": board["_id"], "archived": False}},
+            {"$group": {"_id": "$column_id", "max_position": {"$max": "$position"}}}
+        ]).to_list(length=None)
+
+        return {
+            "header": None,
+            "column_lookup": column_lookup,
+            "default_column": columns[0]["id"] if columns else "todo",
+            "next_position": {p["_id"]: (p["max_position"] or 0) + 1 for p in positions},
+            "member_ids": set(project.get("members", [])),
+            "assignees": {}
+        }
+
+    @staticmethod
+    def _parse_record(raw: str, import_format: str, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if import_format == "ndjson":
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError as e:
+                return {"_error": f"Invalid JSON: {e.msg}"}
+            return value if isinstance(value, dict) else {"_error": "Each line must be a JSON object"}
+
+        values = next(csv.reader([raw]), [])
+        if context["header"] is None:
+            context["header"] = [h.strip().lower() for h in values]
+            return None
+        return dict(zip(context["header"], values))
+
+    @staticmethod
+    async def _resolve_assignees(batch: List[Tuple[int, Dict[str, Any]]], context: Dict[str, Any]) -> None:
+        """Look up every unseen assignee of the batch in one query, among project members"""
+        cache = context["assignees"]
+        raw_keys = set()
+        for _, row in batch:
+            key = _blank_to_none(row.get("assignee") or row.get("assignee_email") or row.get("assignee_id"))
+            if isinstance(key, str) and key.strip().lower() not in cache:
+                raw_keys.add(key.strip())
+        if not raw_keys:
+            return
+
+        keys = {key.lower() for key in raw_keys}
+        object_ids = [ObjectId(k) for k in keys if ObjectId.is_valid(k)]
+        users = await db["users"].find(
+            {
+                "_id": {"$in": list(context["member_ids"])},
+                "$or": [
+                    {"email": {"$in": list(keys)}},
+                    {"name": {"$in": list(raw_keys)}},
+                    {"_id": {"$in": object_ids}}
+                ]
+            },
+            {"email": 1, "name": 1}
+        ).to_list(length=None)
+
+        for user in users:
+            for key in (str(user["_id"]), (user.get("email") or "").lower(), (user.get("name") or "").lower()):
+                if key:
+                    cache[key] = user["_id"]
+        for key in keys:
+            cache.setdefault(key, None)
+
+    @staticmethod
+    def _build_task(job: Dict[str, Any], row: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate one row against TaskCreate and turn it into a task document"""
+        if "_error" in row:
+            raise ValueError(row["_error"])
+
+        labels = row.get("labels") or []
+        if isinstance(labels, str):
+            labels = labels.split(";")
+        labels = list(dict.fromkeys(str(label).strip() for label in labels if str(label).strip()))
+
+        data = {
+            "title": _blank_to_none(row.get("title")),
+            "description": _blank_to_none(row.get("description")),
+            "due_date": _blank_to_none(row.get("due_date")),
+            "estimated_hours": _blank_to_none(row.get("estimated_hours")),
+            "labels": labels,
+            "project_id": str(job["project_id"]),
+            "board_id": str(job["board_id"])
+        }
+        priority = _blank_to_none(row.get("priority"))
+        if priority and str(priority).lower() != "none":
+            data["priority"] = str(priority).lower()
+        task_data = TaskCreate(**data)
+
+        column_key = _blank_to_none(row.get("column") or row.get("column_id") or row.get("status"))
+        column_id = context["default_column"]
+        if column_key:
+            column_id = context["column_lookup"].get(str(column_key).strip().lower())
+            if not column_id:
+                raise ValueError(f"Unknown column '{column_key}'")
+
+        assignee_id = None
+        assignee_key = _blank_to_none(row.get("assignee") or row.get("assignee_email") or row.get("assignee_id"))
+        if assignee_key:
+            assignee_id = context["assignees"].get(str(assignee_key).strip().lower())
+            if not assignee_id:
+                raise ValueError(f"Assignee '{assignee_key}' is not a project member")
+
+        position = context["next_position"].get(column_id, 0)
+        context["next_position"][column_id] = position + 1
+        now = datetime.utcnow()
+
+        return {
+            "title": task_data.title,
+            "description": task_data.description,
+            "status": TaskService._map_column_to_status(column_id),
+            "priority": task_data.priority,
+            "project_id": job["project_id"],
+            "organization_id": job["organization_id"],
+            "board_id": job["board_id"],
+            "column_id": column_id,
+            "creator_id": job["user_id"],
+            "assignee_id": assignee_id,
+            "reviewers": [],
+            "due_date": task_data.due_date,
+            "start_date": None,
+            "completed_at": None,
+            "estimated_hours": task_data.estimated_hours,
+            "actual_hours": None,
+            "labels": task_data.labels,
+            "attachments": [],
+            "comments": [],
+            "time_logs": [],
+            "dependencies": [],
+            "position": position,
+            "archived": False,
+            "version": 1,
+            "import_job_id": job["_id"],
+            "created_at": now,
+            "updated_at": now
+        }
+
+    @staticmethod
+    async def _process_batch(
+        job: Dict[str, Any],
+        batch: List[Tuple[int, Dict[str, Any]]],
+        context: Dict[str, Any]
+    ) -> None:
+        await ImportService._resolve_assignees(batch, context)
+
+        documents, document_rows, errors = [], [], []
+        for row_number, row in batch:
+            try:
+                documents.append(ImportService._build_task(job, row, context))
+                document_rows.append(row_number)
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "errors": [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+                })
+            except ValueError as e:
+                errors.append({"row": row_number, "errors": [str(e)]})
+
+        inserted = 0
+        if documents:
+            try:
+                result = await db["tasks"].insert_many(documents, ordered=False)
+                inserted = len(result.inserted_ids)
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                for write_error in e.details.get("writeErrors", []):
+                    errors.append({
+                        "row": document_rows[write_error["index"]],
+                        "errors": [write_error.get("errmsg", "Write failed")]
+                    })
+
+        await db["import_jobs"].update_one(
+            {"_id": job["_id"]},
+            {
+                "$inc": {"processed": len(batch), "inserted": inserted, "failed": len(errors)},
+                "$push": {"errors": {"$each": errors, "$slice": IMPORT_MAX_ERRORS}},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        )
+
+    @staticmethod
+    async def _record_errors(job: Dict[str, Any], errors: List[Dict[str, Any]]) -> None:
+        await db["import_jobs"].update_one(
+            {"_id": job["_id"]},
+            {"$push": {"errors": {"$each": errors, "$slice": IMPORT_MAX_ERRORS}}}
+        )
+
+    @staticmethod
+    def _format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(job["_id"]),
+            "project_id": str(job["project_id"]),
+            "board_id": str(job["board_id"]),
+            "format": job["format"],
+            "status": job["status"],
+            "processed": job.get("processed", 0),
+            "inserted": job.get("inserted", 0),
+            "failed": job.get("failed", 0),
+            "errors": job.get("errors", []),
+            "created_at": job["created_at"],
+            "finished_at": job.get("finished_at")
+        }
@@ -0,0 +1,220 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from app.db.database import get_db
+from app.config.config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_MAX_SECONDS,
+    JOB_DONE_RETENTION_HOURS
+)
+from app.utils.logger import logger
+
+db = get_db()
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"
+
+# Higher runs first
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+# Set by a worker running in this process so new jobs are picked up without
+# waiting for the next poll
+_local_wakeup: Optional[asyncio.Event] = None
+
+
+def set_local_wakeup(event: Optional[asyncio.Event]) -> None:
+    global _local_wakeup
+    _local_wakeup = event
+
+
+class JobQueue:
+    """
+    Durable queue of out-of-band work in the `jobs` collection.
+
+    A worker claims the highest priority due job with one find_one_and_update
+    that moves it to "running" under a lease (`lease_id`, `lease_until`).
+    Completion and failure only apply while the lease is still held, so a
+    job whose lease expired and was handed to another worker cannot be
+    finished twice. Failed jobs are retried with exponential backoff and
+    moved to "dead" once `max_attempts` is used up; dead jobs stay in the
+    collection until someone requeues them.
+    """
+
+    @staticmethod
+    async def enqueue(
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = PRIORITY_NORMAL,
+        run_at: Optional[datetime] = None,
+        max_attempts: int = JOB_MAX_ATTEMPTS
+    ) -> ObjectId:
+        """Queue a job and return its id; the caller does not wait for it to run"""
+        now = datetime.utcnow()
+        result = await db["jobs"].insert_one({
+            "type": job_type,
+            "payload": payload,
+            "status": STATUS_QUEUED,
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": run_at or now,
+            "lease_id": None,
+            "lease_until": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        if _local_wakeup is not None:
+            _local_wakeup.set()
+        return result.inserted_id
+
+    @staticmethod
+    async def claim(
+        worker_id: str,
+        job_types: List[str],
+        lease_seconds: int = JOB_LEASE_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """Lease the next due job of one of `job_types`, or None if there is none"""
+        if not job_types:
+            return None
+        now = datetime.utcnow()
+        return await db["jobs"].find_one_and_update(
+            {"status": STATUS_QUEUED, "type": {"$in": job_types}, "run_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": STATUS_RUNNING,
+                    "lease_id": ObjectId(),
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", -1), ("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    def _lease_filter(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {"_id": job["_id"], "status": STATUS_RUNNING, "lease_id": job["lease_id"]}
+
+    @staticmethod
+    async def extend_lease(job: Dict[str, Any], lease_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        """Heartbeat for long-running jobs. Returns False if the lease was lost."""
+        now = datetime.utcnow()
+        result = await db["jobs"].update_one(
+            JobQueue._lease_filter(job),
+            {"$set": {"lease_until": now + timedelta(seconds=lease_seconds), "updated_at": now}}
+        )
+        return result.modified_count == 1
+
+    @staticmethod
+    async def complete(job: Dict[str, Any]) -> bool:
+        now = datetime.utcnow()
+        result = await db["jobs"].update_one(
+            JobQueue._lease_filter(job),
+            {"$set": {
+                "status": STATUS_DONE,
+                "lease_id": None,
+                "lease_until": None,
+                "completed_at": now,
+                "updated_at": now,
+                # Finished jobs are removed by the TTL index on expire_at
+                "expire_at": now + timedelta(hours=JOB_DONE_RETENTION_HOURS)
+            }}
+        )
+        return result.modified_count == 1
+
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """Exponential backoff with jitter: base * 2^(attempts - 1), capped"""
+        delay = min(JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)), JOB_RETRY_MAX_SECONDS)
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    async def fail(job: Dict[str, Any], error: str) -> str:
+        """Schedule a retry, or dead-letter the job when it is out of attempts. Returns the new status."""
+        now = datetime.utcnow()
+        update: Dict[str, Any] = {
+            "lease_id": None,
+            "lease_until": None,
+            "last_error": error[:2000],
+            "updated_at": now
+        }
+        if job["attempts"] >= job.get("max_attempts", JOB_MAX_ATTEMPTS):
+            status = STATUS_DEAD
+            update.update({"status": STATUS_DEAD, "dead_at": now})
+        else:
+            status = STATUS_QUEUED
+            update.update({
+                "status": STATUS_QUEUED,
+                "run_at": now + timedelta(seconds=JobQueue.retry_delay(job["attempts"]))
+            })
+
+        result = await db["jobs"].update_one(JobQueue._lease_filter(job), {"$set": update})
+        if result.modified_count == 0:
+            logger.warning(f"Job {job['_id']} lease was lost before it failed: {error}")
+        elif status == STATUS_DEAD:
+            logger.error(f"Job {job['_id']} ({job['type']}) moved to dead letter: {error}")
+        return status
+
+    @staticmethod
+    async def release_expired_leases() -> int:
+        """
+        Hand jobs back whose worker died or stalled past `lease_until`. Jobs
+        that already used every attempt are dead-lettered instead.
+        """
+        now = datetime.utcnow()
+        expired = {"status": STATUS_RUNNING, "lease_until": {"$lt": now}}
+        reset = {"lease_id": None, "lease_until": None, "updated_at": now,
+                 "last_error": "Lease expired"}
+
+        dead = await db["jobs"].update_many(
+            {**expired, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+            {"$set": {**reset, "status": STATUS_DEAD, "dead_at": now}}
+        )
+        requeued = await db["jobs"].update_many(
+            expired,
+            {"$set": {**reset, "status": STATUS_QUEUED, "run_at": now}}
+        )
+        released = dead.modified_count + requeued.modified_count
+        if released:
+            logger.warning(
+                f"Released {released} expired job leases "
+                f"({dead.modified_count} dead-lettered)")
+        return released
+
+    @staticmethod
+    async def requeue_dead(job_id: ObjectId) -> None:
+        """Give a dead-lettered job a fresh set of attempts"""
+        now = datetime.utcnow()
+        result = await db["jobs"].update_one(
+            {"_id": job_id, "status": STATUS_DEAD},
+            {"$set": {"status": STATUS_QUEUED, "attempts": 0, "run_at": now, "updated_at": now},
+             "$unset": {"dead_at": ""}}
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Dead job not found")
+
+    @staticmethod
+    async def get_counts() -> Dict[str, Dict[str, int]]:
+        """Number of jobs per type and status"""
+        rows = await db["jobs"].aggregate([
+            {"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        return counts
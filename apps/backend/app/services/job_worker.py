@@ -0,0 +1,190 @@
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set
+from app.config.config import (
+    JOB_LEASE_SECONDS,
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_DEFAULT_CONCURRENCY
+)
+from app.services.email_service import (
+    send_verification_email,
+    send_invitation_email,
+    send_invitation_emails,
+    send_weekly_digests
+)
+from app.services.otp_service import send_otp_email
+from app.services.job_queue import JobQueue, STATUS_DEAD, set_local_wakeup
+from app.services.mail_delivery import mail_delivery
+from app.utils.logger import logger
+
+# Job type -> coroutine function called with the job payload as keyword arguments
+JOB_HANDLERS: Dict[str, Callable[..., Awaitable]] = {
+    "send_otp_email": send_otp_email,
+    "send_verification_email": send_verification_email,
+    "send_invitation_email": send_invitation_email,
+    "send_invitation_emails": send_invitation_emails,
+    "send_weekly_digests": send_weekly_digests,
+}
+
+# Jobs of one type running at the same time in one worker (JOB_DEFAULT_CONCURRENCY otherwise)
+JOB_CONCURRENCY: Dict[str, int] = {
+    "send_otp_email": 8,
+}
+
+
+class JobWorker:
+    """
+    Claims jobs from the queue and runs them with at most
+    `concurrency[type]` jobs of each type in flight. Runs inside the API
+    process (started from main.py) or on its own with
+    `python -m app.services.job_worker`.
+    """
+
+    def __init__(
+        self,
+        handlers: Dict[str, Callable[..., Awaitable]] = JOB_HANDLERS,
+        concurrency: Optional[Dict[str, int]] = None,
+        poll_interval: float = JOB_POLL_INTERVAL_SECONDS,
+        lease_seconds: int = JOB_LEASE_SECONDS
+    ):
+        self.handlers = handlers
+        concurrency = JOB_CONCURRENCY if concurrency is None else concurrency
+        self.concurrency = {
+            job_type: concurrency.get(job_type, JOB_DEFAULT_CONCURRENCY) for job_type in handlers
+        }
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._in_flight: Dict[str, int] = {job_type: 0 for job_type in handlers}
+        self._jobs: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._metrics = {"claimed": 0, "succeeded": 0, "retried": 0, "dead": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        set_local_wakeup(self._wakeup)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Job worker {self.worker_id} started")
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop claiming and give running jobs `timeout` seconds to finish"""
+        if self._task is None:
+            return
+        self._stopping = True
+        set_local_wakeup(None)
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+        if self._jobs:
+            _, pending = await asyncio.wait(self._jobs, timeout=timeout)
+            for task in pending:
+                # Their leases expire and another worker picks them up again
+                task.cancel()
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+    def _free_types(self) -> List[str]:
+        return [
+            job_type for job_type, limit in self.concurrency.items()
+            if self._in_flight[job_type] < limit
+        ]
+
+    async def run_once(self) -> int:
+        """Claim jobs until there is nothing due or no free slot. Returns the number started."""
+        started = 0
+        while not self._stopping:
+            job = await JobQueue.claim(self.worker_id, self._free_types(), self.lease_seconds)
+            if not job:
+                break
+            self._metrics["claimed"] += 1
+            self._in_flight[job["type"]] += 1
+            task = asyncio.create_task(self._execute(job))
+            self._jobs.add(task)
+            task.add_done_callback(self._jobs.discard)
+            started += 1
+        return started
+
+    async def _heartbeat(self, job: Dict[str, Any]) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await JobQueue.extend_lease(job, self.lease_seconds):
+                logger.warning(f"Job {job['_id']} lost its lease while running")
+                return
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self.handlers[job["type"]](**job.get("payload", {}))
+            heartbeat.cancel()
+            await JobQueue.complete(job)
+            self._metrics["succeeded"] += 1
+        except asyncio.CancelledError:
+            heartbeat.cancel()
+            raise
+        except Exception as e:
+            heartbeat.cancel()
+            logger.error(f"Job {job['_id']} ({job['type']}) attempt {job['attempts']} failed: {str(e)}")
+            try:
+                status = await JobQueue.fail(job, str(e))
+                self._metrics["dead" if status == STATUS_DEAD else "retried"] += 1
+            except Exception as fail_error:
+                logger.error(f"Failed to record failure of job {job['_id']}: {str(fail_error)}")
+        finally:
+            self._in_flight[job["type"]] -= 1
+            if self._wakeup:
+                self._wakeup.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_release = 0.0
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                if loop.time() >= next_release:
+                    await JobQueue.release_expired_leases()
+                    next_release = loop.time() + self.lease_seconds
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Job worker loop error: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "in_flight": dict(self._in_flight),
+            "running": self.running
+        }
+
+
+job_worker = JobWorker()
+
+
+async def main() -> None:
+    worker = JobWorker()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    worker.start()
+    await stop.wait()
+    await worker.stop()
+    await mail_delivery.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,270 @@
+import asyncio
+import time
+from collections import deque
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Dict, Any, List, Optional, Sequence
+import aiosmtplib
+from app.config.config import (
+    EMAIL_USER,
+    EMAIL_PASS,
+    MAIL_SERVER,
+    MAIL_PORT,
+    MAIL_STARTTLS,
+    MAIL_SSL_TLS,
+    MAIL_FROM_NAME,
+    MAIL_FROM_ADDRESS,
+    MAIL_POOL_SIZE,
+    MAIL_MAX_MESSAGES_PER_CONNECTION,
+    MAIL_IDLE_TIMEOUT_SECONDS,
+    MAIL_TIMEOUT_SECONDS,
+    MAIL_RATE_PER_MINUTE,
+    MAIL_PRIORITY_RESERVE
+)
+from app.services.job_queue import PRIORITY_NORMAL
+from app.utils.logger import logger
+
+
+def build_message(to: str, subject: str, html: str, sender: Optional[str] = None) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((MAIL_FROM_NAME, sender or MAIL_FROM_ADDRESS))
+    message["To"] = to
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(html, subtype="html")
+    return message
+
+
+class RateBudget:
+    """
+    Token bucket: `rate_per_minute` sends on average, bursts of up to `burst`.
+    0 disables it. Sends below PRIORITY_NORMAL (bulk invitations, digests)
+    only take a token while more than `reserve` are left, so OTP and other
+    transactional mail does not wait behind a bulk batch.
+
+    The budget lives in memory, so the limit applies per process: the API
+    and every job worker process each send up to `rate_per_minute`.
+    """
+
+    def __init__(self, rate_per_minute: int, burst: Optional[int] = None, reserve: int = MAIL_PRIORITY_RESERVE):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, rate_per_minute // 6))
+        # Bulk sends must still be able to go out once the bucket is full
+        self.reserve = max(0, min(reserve, int(self.capacity) - 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self, priority: int = PRIORITY_NORMAL) -> bool:
+        """Take a token if one is available for `priority` right now"""
+        return self._wait_time(priority) == 0
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        # No lock: nothing awaits between the check and the take, and a
+        # waiting bulk sender must not hold up a transactional one
+        while True:
+            wait = self._wait_time(priority)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _wait_time(self, priority: int) -> float:
+        """Takes a token and returns 0, or returns how long until one is available"""
+        if self.rate <= 0:
+            return 0
+        needed = 1 + (self.reserve if priority < PRIORITY_NORMAL else 0)
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= needed:
+            self._tokens -= 1
+            return 0
+        return (needed - self._tokens) / self.rate
+
+
+class PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Up to `size` authenticated SMTP connections that are reused across
+    sends. A connection is retired after `max_messages` messages or when it
+    sat idle longer than `idle_timeout` (servers drop idle sessions).
+    """
+
+    def __init__(
+        self,
+        hostname: str = MAIL_SERVER,
+        port: int = MAIL_PORT,
+        username: Optional[str] = EMAIL_USER,
+        password: Optional[str] = EMAIL_PASS,
+        start_tls: bool = MAIL_STARTTLS,
+        use_tls: bool = MAIL_SSL_TLS,
+        size: int = MAIL_POOL_SIZE,
+        max_messages: int = MAIL_MAX_MESSAGES_PER_CONNECTION,
+        idle_timeout: float = MAIL_IDLE_TIMEOUT_SECONDS,
+        timeout: float = MAIL_TIMEOUT_SECONDS
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.use_tls = use_tls
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: List[PooledConnection] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _open(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    @staticmethod
+    async def _quit(connection: PooledConnection) -> None:
+        try:
+            await connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    async def acquire(self) -> PooledConnection:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                fresh = time.monotonic() - connection.last_used < self.idle_timeout
+                if fresh and connection.smtp.is_connected:
+                    return connection
+                await self._quit(connection)
+            return await self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, connection: PooledConnection, broken: bool = False) -> None:
+        try:
+            if broken or connection.sent >= self.max_messages:
+                await self._quit(connection)
+            else:
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._quit(connection)
+
+
+class MailDelivery:
+    """
+    Sends messages over the pooled connections within the rate budget.
+    `send_many` spreads a batch over up to `pool.size` connections, each
+    sending its share back to back in one SMTP session. A sender that has
+    to wait for the rate budget returns its connection to the pool first,
+    so a throttled bulk batch never holds every slot. A message that hits
+    a dropped connection is retried once on a new one.
+    """
+
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None, budget: Optional[RateBudget] = None):
+        self.pool = pool or SMTPConnectionPool()
+        self.budget = budget or RateBudget(MAIL_RATE_PER_MINUTE)
+        self._metrics = {"sent": 0, "failed": 0}
+
+    async def send(self, message: EmailMessage, priority: int = PRIORITY_NORMAL) -> None:
+        errors = await self.send_many([message], priority=priority)
+        if errors[0]:
+            raise errors[0]
+
+    async def _send_one(self, connection: PooledConnection, message: EmailMessage) -> None:
+        await connection.smtp.send_message(message)
+        connection.sent += 1
+
+    async def send_many(
+        self,
+        messages: Sequence[EmailMessage],
+        priority: int = PRIORITY_NORMAL
+    ) -> List[Optional[Exception]]:
+        """
+        Deliver a batch. `priority` uses the job queue levels; bulk mail
+        passes PRIORITY_LOW. Returns one entry per message: None when sent,
+        else the error.
+        """
+        results: List[Optional[Exception]] = [None] * len(messages)
+        pending = deque(enumerate(messages))
+
+        async def sender() -> None:
+            connection: Optional[PooledConnection] = None
+            try:
+                while pending:
+                    index, message = pending.popleft()
+                    if not self.budget.try_acquire(priority):
+                        # Give the slot back while throttled so other sends can use it
+                        if connection is not None:
+                            await self.pool.release(connection)
+                            connection = None
+                        await self.budget.acquire(priority)
+                    try:
+                        if connection is None:
+                            connection = await self.pool.acquire()
+                        try:
+                            await self._send_one(connection, message)
+                        except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                            await self.pool.release(connection, broken=True)
+                            connection = None
+                            connection = await self.pool.acquire()
+                            await self._send_one(connection, message)
+                    except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                        # The server refused this message; the session is still usable
+                        results[index] = e
+                    except Exception as e:
+                        results[index] = e
+                        if connection is not None:
+                            await self.pool.release(connection, broken=True)
+                            connection = None
+                    if connection is not None and connection.sent >= self.pool.max_messages:
+                        await self.pool.release(connection)
+                        connection = None
+            finally:
+                if connection is not None:
+                    await self.pool.release(connection)
+
+        if messages:
+            await asyncio.gather(*(sender() for _ in range(min(self.pool.size, len(messages)))))
+
+        failed = [error for error in results if error]
+        self._metrics["sent"] += len(messages) - len(failed)
+        self._metrics["failed"] += len(failed)
+        if failed:
+            logger.error(f"Failed to deliver {len(failed)} of {len(messages)} emails: {failed[0]}")
+        return results
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "connections_opened": self.pool.connections_opened,
+            "idle_connections": len(self.pool._idle)
+        }
+
+
+mail_delivery = MailDelivery()
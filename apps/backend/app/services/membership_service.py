@@ -0,0 +1,388 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateMany, UpdateOne
+from app.db.database import get_db
+from app.utils.logger import logger
+from app.utils.pagination import count_matching
+from app.utils.search import escape_regex
+
+db = get_db()
+
+SCOPE_ORGANIZATION = "organization"
+SCOPE_PROJECT = "project"
+
+BACKFILL_NAME = "backfill_memberships"
+
+PROFILE_PROJECTION = {"name": 1, "email": 1, "avatar_url": 1}
+
+# Set once the backfill has finished; until then a missing row may just mean
+# the user has not been migrated yet, so lookups fall back to the user document.
+_backfill_completed = False
+
+
+class MembershipService:
+    """
+    One document per (user, organization) and (user, project) membership in
+    the `memberships` collection, indexed on (user_id, scope_id),
+    (scope_id, role) and (user_id, organization_id). Access checks are a
+    single indexed lookup instead of loading user and project documents and
+    scanning their arrays. The arrays on users and projects are still written
+    for older readers.
+
+    Rows also carry a copy of the member's profile (name, email, avatar) with
+    lowercased search keys, so member pages are served from this collection
+    alone. The actor snapshot sweep keeps the copy in sync with the users.
+    """
+
+    @staticmethod
+    def profile_fields(user: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        name = (user or {}).get("name") or ""
+        email = (user or {}).get("email") or ""
+        return {
+            "name": name,
+            "email": email,
+            "avatar_url": (user or {}).get("avatar_url"),
+            "search_name": name.strip().lower(),
+            "search_email": email.strip().lower()
+        }
+
+    @staticmethod
+    def _row_update(
+        scope_type: str,
+        organization_id: ObjectId,
+        role: Any,
+        status: str = "active",
+        invited_by: Optional[ObjectId] = None,
+        joined_at: Optional[datetime] = None,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            "$set": {"role": role, "status": status, "updated_at": now, **(profile or {})},
+            "$setOnInsert": {
+                "scope_type": scope_type,
+                "organization_id": organization_id,
+                "invited_by": invited_by,
+                "joined_at": joined_at or now
+            }
+        }
+
+    @staticmethod
+    async def add(
+        user_id: ObjectId,
+        scope_type: str,
+        scope_id: ObjectId,
+        organization_id: ObjectId,
+        role: Any,
+        invited_by: Optional[ObjectId] = None,
+        user: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Create or reactivate one membership. Pass `user` when the caller already loaded it."""
+        if user is None:
+            user = await db["users"].find_one({"_id": user_id}, PROFILE_PROJECTION)
+        await db["memberships"].update_one(
+            {"user_id": user_id, "scope_id": scope_id},
+            MembershipService._row_update(
+                scope_type, organization_id, role, invited_by=invited_by,
+                profile=MembershipService.profile_fields(user)),
+            upsert=True
+        )
+
+    @staticmethod
+    async def add_many(
+        users: List[Dict[str, Any]],
+        scope_type: str,
+        scope_id: ObjectId,
+        organization_id: ObjectId,
+        role: Any,
+        invited_by: Optional[ObjectId] = None
+    ) -> None:
+        """Add several already loaded users to the same scope with one bulk_write"""
+        if not users:
+            return
+        await db["memberships"].bulk_write([
+            UpdateOne(
+                {"user_id": user["_id"], "scope_id": scope_id},
+                MembershipService._row_update(
+                    scope_type, organization_id, role, invited_by=invited_by,
+                    profile=MembershipService.profile_fields(user)),
+                upsert=True
+            )
+            for user in users
+        ], ordered=False)
+
+    @staticmethod
+    async def remove_user(user_id: ObjectId) -> None:
+        await db["memberships"].delete_many({"user_id": user_id})
+
+    @staticmethod
+    async def get_many(user_id: ObjectId, scope_ids: List[ObjectId]) -> Dict[ObjectId, Dict[str, Any]]:
+        """Active memberships of a user in the given scopes, keyed by scope_id"""
+        query = {"user_id": user_id, "scope_id": {"$in": scope_ids}}
+        rows = await db["memberships"].find(query, {"scope_id": 1, "role": 1, "status": 1}).to_list(length=None)
+        if len(rows) < len(scope_ids) and await MembershipService._sync_legacy_user(user_id):
+            rows = await db["memberships"].find(query, {"scope_id": 1, "role": 1, "status": 1}).to_list(length=None)
+        return {row["scope_id"]: row for row in rows if row.get("status") == "active"}
+
+    @staticmethod
+    async def get(user_id: ObjectId, scope_id: ObjectId) -> Optional[Dict[str, Any]]:
+        memberships = await MembershipService.get_many(user_id, [scope_id])
+        return memberships.get(scope_id)
+
+    @staticmethod
+    async def require_organization_member(user_id: ObjectId, organization_id: ObjectId) -> Dict[str, Any]:
+        membership = await MembershipService.get(user_id, organization_id)
+        if not membership:
+            raise HTTPException(
+                status_code=403,
+                detail="User not member of organization or access denied"
+            )
+        return membership
+
+    @staticmethod
+    async def get_organization_scope(
+        user_id: ObjectId,
+        organization_id: ObjectId
+    ) -> Tuple[Optional[Dict[str, Any]], List[ObjectId]]:
+        """
+        The user's organization membership and the ids of the organization
+        projects they joined, from one query on (user_id, organization_id).
+        """
+        query = {"user_id": user_id, "organization_id": organization_id, "status": "active"}
+        projection = {"scope_type": 1, "scope_id": 1, "role": 1}
+        rows = await db["memberships"].find(query, projection).to_list(length=None)
+        if not rows and await MembershipService._sync_legacy_user(user_id):
+            rows = await db["memberships"].find(query, projection).to_list(length=None)
+
+        organization_membership = next(
+            (row for row in rows if row["scope_type"] == SCOPE_ORGANIZATION), None)
+        project_ids = [row["scope_id"] for row in rows if row["scope_type"] == SCOPE_PROJECT]
+        return organization_membership, project_ids
+
+    @staticmethod
+    async def get_scope_member_ids(scope_id: ObjectId, role: Any = None) -> List[ObjectId]:
+        """Active members of an organization or project, optionally with one role"""
+        query: Dict[str, Any] = {"scope_id": scope_id, "status": "active"}
+        if role is not None:
+            query["role"] = role
+        rows = await db["memberships"].find(query, {"user_id": 1}).to_list(length=None)
+        return [row["user_id"] for row in rows]
+
+    @staticmethod
+    async def get_scope_member_profiles(scope_id: ObjectId, scope_type: str) -> List[Dict[str, Any]]:
+        """Active members of a scope with the profile copy (user_id, name, email, avatar_url)"""
+        await MembershipService._sync_legacy_scope(scope_id, scope_type)
+        return await db["memberships"].find(
+            {"scope_id": scope_id, "status": "active"},
+            {"user_id": 1, "name": 1, "email": 1, "avatar_url": 1}
+        ).to_list(length=None)
+
+    @staticmethod
+    async def list_scope_members(
+        scope_id: ObjectId,
+        scope_type: str,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        count_mode: str = "exact"
+    ) -> Dict[str, Any]:
+        """
+        One page of an organization's or project's members ordered by name.
+        `search` is a case-insensitive prefix of the name or email; both
+        branches are range scans on the (scope_id, search_*) indexes.
+        """
+        await MembershipService._sync_legacy_scope(scope_id, scope_type)
+
+        query: Dict[str, Any] = {"scope_id": scope_id}
+        term = (search or "").strip().lower()
+        if term:
+            prefix = {"$regex": "^" + escape_regex(term)}
+            query["$or"] = [{"search_name": prefix}, {"search_email": prefix}]
+
+        total, total_capped = await count_matching(db["memberships"], query, count_mode)
+        rows = await db["memberships"].find(query, {
+            "user_id": 1, "name": 1, "email": 1, "avatar_url": 1,
+            "role": 1, "status": 1, "joined_at": 1
+        }).sort([("search_name", 1), ("user_id", 1)]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+
+        return {
+            "members": rows[:limit],
+            "total": total,
+            "total_capped": total_capped,
+            "limit": limit,
+            "offset": offset,
+            "has_more": len(rows) > limit
+        }
+
+    @staticmethod
+    def profile_operations(users: List[Dict[str, Any]]) -> List[UpdateMany]:
+        """Rewrite the profile copy on every membership of the given users"""
+        return [
+            UpdateMany({"user_id": user["_id"]}, {"$set": MembershipService.profile_fields(user)})
+            for user in users
+        ]
+
+    # Migration from the membership arrays on user documents
+
+    @staticmethod
+    async def _legacy_operations(users: List[Dict[str, Any]]) -> List[UpdateOne]:
+        project_ids = [
+            proj["project_id"] for user in users for proj in user.get("joined_projects", [])
+        ]
+        project_orgs = {}
+        if project_ids:
+            projects = await db["projects"].find(
+                {"_id": {"$in": project_ids}}, {"organization_id": 1}
+            ).to_list(length=None)
+            project_orgs = {p["_id"]: p["organization_id"] for p in projects}
+
+        operations = []
+        for user in users:
+            profile = MembershipService.profile_fields(user)
+            for org in user.get("organizations", []):
+                operations.append(UpdateOne(
+                    {"user_id": user["_id"], "scope_id": org["organization_id"]},
+                    {"$set": profile, "$setOnInsert": {
+                        "scope_type": SCOPE_ORGANIZATION,
+                        "organization_id": org["organization_id"],
+                        "role": org.get("role"),
+                        "status": org.get("status", "active"),
+                        "invited_by": org.get("invited_by"),
+                        "joined_at": org.get("joined_at"),
+                        "updated_at": datetime.utcnow()
+                    }},
+                    upsert=True
+                ))
+            for proj in user.get("joined_projects", []):
+                organization_id = project_orgs.get(proj["project_id"])
+                if not organization_id:
+                    continue  # project was deleted
+                operations.append(UpdateOne(
+                    {"user_id": user["_id"], "scope_id": proj["project_id"]},
+                    {"$set": profile, "$setOnInsert": {
+                        "scope_type": SCOPE_PROJECT,
+                        "organization_id": organization_id,
+                        "role": proj.get("role"),
+                        "status": proj.get("status", "active"),
+                        "invited_by": proj.get("invited_by"),
+                        "joined_at": proj.get("joined_at"),
+                        "updated_at": datetime.utcnow()
+                    }},
+                    upsert=True
+                ))
+        return operations
+
+    @staticmethod
+    async def _backfill_pending() -> bool:
+        global _backfill_completed
+        if not _backfill_completed:
+            state = await db["migration_state"].find_one({"_id": BACKFILL_NAME}, {"completed": 1})
+            _backfill_completed = bool(state and state.get("completed"))
+        return not _backfill_completed
+
+    @staticmethod
+    async def _sync_legacy_user(user_id: ObjectId) -> bool:
+        """Copy one user's memberships while the backfill has not finished. Returns True if it ran."""
+        if not await MembershipService._backfill_pending():
+            return False
+
+        user = await db["users"].find_one(
+            {"_id": user_id}, {"organizations": 1, "joined_projects": 1, **PROFILE_PROJECTION})
+        if not user:
+            return False
+        operations = await MembershipService._legacy_operations([user])
+        if operations:
+            await db["memberships"].bulk_write(operations, ordered=False)
+        return True
+
+    @staticmethod
+    async def _sync_legacy_scope(scope_id: ObjectId, scope_type: str) -> None:
+        """
+        While the backfill has not finished, copy the memberships of everyone
+        in the scope's `members` array that has no row with a profile yet, so
+        member pages are complete and sorted before the migration has run.
+        """
+        if not await MembershipService._backfill_pending():
+            return
+
+        collection = "organizations" if scope_type == SCOPE_ORGANIZATION else "projects"
+        scope = await db[collection].find_one({"_id": scope_id}, {"members": 1})
+        member_ids = (scope or {}).get("members", [])
+        if not member_ids:
+            return
+        synced = set(await db["memberships"].distinct(
+            "user_id", {"scope_id": scope_id, "search_name": {"$exists": True}}))
+        missing = [member_id for member_id in member_ids if member_id not in synced]
+        if not missing:
+            return
+
+        users = await db["users"].find(
+            {"_id": {"$in": missing}}, {"organizations": 1, "joined_projects": 1, **PROFILE_PROJECTION}
+        ).to_list(length=None)
+        operations = await MembershipService._legacy_operations(users)
+        if operations:
+            await db["memberships"].bulk_write(operations, ordered=False)
+
+    @staticmethod
+    async def backfill(batch_size: int = 500) -> Dict[str, int]:
+        """
+        Create membership rows from users.organizations and
+        users.joined_projects, then fill in the profile copy on rows that
+        were written before memberships carried one.
+        """
+        state = await db["migration_state"].find_one({"_id": BACKFILL_NAME}) or {}
+        total = 0
+        if state.get("completed"):
+            logger.info(f"{BACKFILL_NAME} rows already copied, checking profiles only")
+        else:
+            last_user_id = state.get("last_user_id")
+            while True:
+                query = {"_id": {"$gt": last_user_id}} if last_user_id else {}
+                users = await db["users"].find(
+                    query, {"organizations": 1, "joined_projects": 1, **PROFILE_PROJECTION}
+                ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+                if not users:
+                    break
+
+                operations = await MembershipService._legacy_operations(users)
+                if operations:
+                    result = await db["memberships"].bulk_write(operations, ordered=False)
+                    total += result.upserted_count
+
+                last_user_id = users[-1]["_id"]
+                await db["migration_state"].update_one(
+                    {"_id": BACKFILL_NAME},
+                    {"$set": {"last_user_id": last_user_id}},
+                    upsert=True
+                )
+                logger.info(f"{BACKFILL_NAME}: processed users up to {last_user_id} ({total} memberships so far)")
+
+            await db["migration_state"].update_one(
+                {"_id": BACKFILL_NAME}, {"$set": {"completed": True}}, upsert=True)
+
+        profiles = await MembershipService._backfill_profiles(batch_size)
+        logger.info(f"{BACKFILL_NAME} completed: {total} memberships, {profiles} profiles filled in")
+        return {"memberships": total, "profiles": profiles}
+
+    @staticmethod
+    async def _backfill_profiles(batch_size: int) -> int:
+        """Copy the profile onto membership rows that have none, a batch of users at a time"""
+        filled = 0
+        while True:
+            rows = await db["memberships"].find(
+                {"search_name": {"$exists": False}}, {"user_id": 1}
+            ).limit(batch_size).to_list(length=batch_size)
+            if not rows:
+                break
+
+            user_ids = list(dict.fromkeys(row["user_id"] for row in rows))
+            users = await db["users"].find({"_id": {"$in": user_ids}}, PROFILE_PROJECTION).to_list(length=None)
+            found = {user["_id"]: user for user in users}
+            # A deleted user gets an empty profile so its rows are not picked up again
+            operations = MembershipService.profile_operations(
+                [found.get(user_id, {"_id": user_id}) for user_id in user_ids])
+            result = await db["memberships"].bulk_write(operations, ordered=False)
+            filled += result.modified_count
+        return filled
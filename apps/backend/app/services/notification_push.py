@@ -0,0 +1,201 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo import CursorType
+from app.db.database import get_db
+from app.config.config import (
+    NOTIFICATION_BROADCAST_BACKEND,
+    NOTIFICATION_EVENTS_COLLECTION,
+    NOTIFICATION_STREAM_QUEUE_SIZE,
+    NOTIFICATION_STREAM_MAX_PER_USER
+)
+from app.utils.logger import logger
+
+db = get_db()
+
+# Put on a connection's queue to make its stream end; the client reconnects
+# and reloads the list through the REST endpoint
+CLOSE = None
+
+Deliver = Callable[[str, Dict[str, Any]], None]
+
+
+class ConnectionRegistry:
+    """
+    Open notification streams in this worker, keyed by user id. Every stream
+    has its own bounded queue; a stream that falls behind is closed rather
+    than buffered without limit.
+    """
+
+    def __init__(self, queue_size: int = NOTIFICATION_STREAM_QUEUE_SIZE,
+                 max_per_user: int = NOTIFICATION_STREAM_MAX_PER_USER):
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        self._connections: Dict[str, List[asyncio.Queue]] = {}
+        self._metrics = {"connected": 0, "delivered": 0, "closed_slow": 0, "closed_excess": 0}
+
+    def connect(self, user_id: Any) -> asyncio.Queue:
+        queues = self._connections.setdefault(str(user_id), [])
+        if len(queues) >= self.max_per_user:
+            # Oldest tab goes first
+            self._close(queues.pop(0))
+            self._metrics["closed_excess"] += 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queues.append(queue)
+        self._metrics["connected"] += 1
+        return queue
+
+    def disconnect(self, user_id: Any, queue: asyncio.Queue) -> None:
+        queues = self._connections.get(str(user_id))
+        if not queues:
+            return
+        if queue in queues:
+            queues.remove(queue)
+        if not queues:
+            del self._connections[str(user_id)]
+
+    def deliver(self, user_id: Any, event: Dict[str, Any]) -> None:
+        """Hand an event to every stream the user has open in this worker"""
+        for queue in list(self._connections.get(str(user_id), [])):
+            try:
+                queue.put_nowait(event)
+                self._metrics["delivered"] += 1
+            except asyncio.QueueFull:
+                self.disconnect(user_id, queue)
+                self._close(queue)
+                self._metrics["closed_slow"] += 1
+
+    def close_all(self) -> None:
+        for queues in self._connections.values():
+            for queue in queues:
+                self._close(queue)
+        self._connections.clear()
+
+    @staticmethod
+    def _close(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(CLOSE)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self._metrics,
+            "users": len(self._connections),
+            "streams": sum(len(queues) for queues in self._connections.values())
+        }
+
+
+class LocalBroadcaster:
+    """Delivers in the publishing process only. For a single worker and for tests."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    async def publish(self, events: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        if self._deliver is None:
+            return
+        for user_id, event in events:
+            self._deliver(user_id, event)
+
+
+class MongoBroadcaster:
+    """
+    Fans events out to every worker through a capped collection. Publishing
+    is one insert_many; each worker tails the collection with a tailable
+    await cursor and delivers to its own connections. Processes that never
+    start the tail (the job worker) can still publish.
+    """
+
+    def __init__(self, collection_name: str = NOTIFICATION_EVENTS_COLLECTION, retry_seconds: float = 1.0):
+        self.collection_name = collection_name
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, deliver: Deliver) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._tail(deliver))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def publish(self, events: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        if not events:
+            return
+        now = datetime.utcnow()
+        await db[self.collection_name].insert_many([
+            {"user_id": str(user_id), "event": event, "created_at": now}
+            for user_id, event in events
+        ], ordered=False)
+
+    async def _tail(self, deliver: Deliver) -> None:
+        collection = db[self.collection_name]
+        # Only events published after this worker started
+        last = await collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else None
+        while True:
+            try:
+                query = {"_id": {"$gt": last_id}} if last_id else {}
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for doc in cursor:
+                        last_id = doc["_id"]
+                        deliver(doc["user_id"], doc["event"])
+                # An empty capped collection gives a dead cursor; try again shortly
+                await asyncio.sleep(self.retry_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification broadcast tail failed: {str(e)}")
+                await asyncio.sleep(self.retry_seconds)
+
+
+BROADCASTERS: Dict[str, Callable[[], Any]] = {
+    "local": LocalBroadcaster,
+    "mongo": MongoBroadcaster
+}
+
+
+class NotificationPush:
+    """Connection registry of this worker plus the cross-worker broadcaster"""
+
+    def __init__(self, broadcaster: Any = None, registry: Optional[ConnectionRegistry] = None):
+        self.broadcaster = broadcaster or BROADCASTERS[NOTIFICATION_BROADCAST_BACKEND]()
+        self.registry = registry or ConnectionRegistry()
+        self._metrics = {"published": 0, "failed_publishes": 0}
+
+    def start(self) -> None:
+        self.broadcaster.start(self.registry.deliver)
+
+    async def stop(self) -> None:
+        await self.broadcaster.stop()
+        self.registry.close_all()
+
+    async def publish(self, events: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Send (user_id, event) pairs to connected users. Never raises."""
+        if not events:
+            return
+        try:
+            await self.broadcaster.publish(events)
+            self._metrics["published"] += len(events)
+        except Exception as e:
+            self._metrics["failed_publishes"] += 1
+            logger.error(f"Failed to publish notification events: {str(e)}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self._metrics, **self.registry.get_metrics()}
+
+
+notification_push = NotificationPush()
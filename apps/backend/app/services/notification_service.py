@@ -0,0 +1,335 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.db.database import get_db
+from app.db.enums import NotificationType
+from app.utils.logger import logger
+from app.utils.pagination import keyset_filter, split_page
+from app.services.notification_push import notification_push
+from app.services.workload_service import CLOSED_STATUSES
+from app.config.config import (
+    NOTIFICATION_DUE_SOON_HOURS,
+    NOTIFICATION_REMINDER_BATCH_SIZE,
+    NOTIFICATION_REMINDER_LEASE_SECONDS
+)
+
+db = get_db()
+
+REMINDER_STATE_ID = "due_reminders"
+
+NOTIFICATION_PROJECTION = {
+    "type": 1, "sender_id": 1, "title": 1, "message": 1, "data": 1,
+    "read": 1, "read_at": 1, "created_at": 1
+}
+
+
+class NotificationService:
+    """
+    Notifications are written in batches with insert_many. Each user's
+    unread count is kept in `notification_counters` ({_id: user_id, unread})
+    and moved with $inc on every insert and mark-read, so the badge is a
+    single _id lookup instead of a count over the user's notifications.
+    """
+
+    @staticmethod
+    def build(
+        notification_type: NotificationType,
+        recipient_id: ObjectId,
+        title: str,
+        message: str,
+        sender_id: Optional[ObjectId] = None,
+        data: Optional[Dict[str, Any]] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        return {
+            "_id": ObjectId(),
+            "type": notification_type,
+            "recipient_id": recipient_id,
+            "sender_id": sender_id,
+            "title": title,
+            "message": message,
+            "data": data or {},
+            "read": False,
+            "read_at": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+    @staticmethod
+    async def notify_many(notifications: List[Dict[str, Any]]) -> int:
+        """
+        Insert built notifications with one insert_many and bump the unread
+        counter of every recipient with one bulk_write, then push them to
+        connected clients. Failures are logged, never raised: a missing
+        notification must not fail the task write that triggered it.
+        Returns the number inserted.
+        """
+        if not notifications:
+            return 0
+        try:
+            result = await db["notifications"].insert_many(notifications, ordered=False)
+            per_recipient = Counter(n["recipient_id"] for n in notifications)
+            await db["notification_counters"].bulk_write([
+                UpdateOne(
+                    {"_id": recipient_id},
+                    {"$inc": {"unread": count}, "$set": {"updated_at": datetime.utcnow()}},
+                    upsert=True
+                )
+                for recipient_id, count in per_recipient.items()
+            ], ordered=False)
+            await notification_push.publish([
+                (n["recipient_id"], {"type": "notification", "notification": NotificationService._format(n)})
+                for n in notifications
+            ])
+            return len(result.inserted_ids)
+        except Exception as e:
+            logger.error(f"Failed to create notifications: {str(e)}")
+            return 0
+
+    # Triggers
+
+    @staticmethod
+    async def notify_task_assigned(sender_id: ObjectId, tasks: List[Dict[str, Any]]) -> int:
+        """One notification per task for its assignee, skipping self-assignment"""
+        now = datetime.utcnow()
+        return await NotificationService.notify_many([
+            NotificationService.build(
+                NotificationType.TASK_ASSIGNED,
+                task["assignee_id"],
+                "Task assigned to you",
+                f"You were assigned to '{task.get('title', 'a task')}'",
+                sender_id=sender_id,
+                data=NotificationService._task_data(task),
+                now=now
+            )
+            for task in tasks
+            if task.get("assignee_id") and task["assignee_id"] != sender_id
+        ])
+
+    @staticmethod
+    async def notify_mentions(
+        sender_id: ObjectId,
+        task: Dict[str, Any],
+        mentioned_ids: List[ObjectId],
+        project_members: Optional[List[ObjectId]] = None
+    ) -> int:
+        """Notify mentioned users once each; only project members when the list is given"""
+        now = datetime.utcnow()
+        recipients = [
+            user_id for user_id in dict.fromkeys(mentioned_ids)
+            if user_id != sender_id and (project_members is None or user_id in project_members)
+        ]
+        return await NotificationService.notify_many([
+            NotificationService.build(
+                NotificationType.MENTION,
+                user_id,
+                "You were mentioned",
+                f"You were mentioned in '{task.get('title', 'a task')}'",
+                sender_id=sender_id,
+                data=NotificationService._task_data(task),
+                now=now
+            )
+            for user_id in recipients
+        ])
+
+    @staticmethod
+    async def send_due_reminders(now: Optional[datetime] = None) -> Optional[int]:
+        """
+        Notify assignees of open tasks due within NOTIFICATION_DUE_SOON_HOURS.
+        Tasks remember the due date they were reminded for in
+        `due_reminder_for`, so a task is reminded once per due date and again
+        if it is rescheduled. A batch is only marked once all of its
+        notifications were created. Runs as a periodic task in every web
+        worker; a lease in migration_state lets one sweep run at a time, so
+        no task is reminded twice. Returns None while another worker holds it.
+        """
+        now = now or datetime.utcnow()
+        if not await NotificationService._claim_reminder_sweep(now):
+            return None
+        try:
+            return await NotificationService._send_due_reminders(now)
+        finally:
+            await db["migration_state"].update_one(
+                {"_id": REMINDER_STATE_ID}, {"$set": {"lease_until": None, "last_run_at": datetime.utcnow()}})
+
+    @staticmethod
+    async def _claim_reminder_sweep(now: datetime) -> bool:
+        """Take the sweep lease; False while another worker holds it"""
+        try:
+            state = await db["migration_state"].find_one_and_update(
+                {
+                    "_id": REMINDER_STATE_ID,
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}]
+                },
+                {"$set": {"lease_until": now + timedelta(seconds=NOTIFICATION_REMINDER_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return state is not None
+        except DuplicateKeyError:
+            return False
+
+    @staticmethod
+    async def _send_due_reminders(now: datetime) -> int:
+        query = {
+            "due_date": {"$gt": now, "$lte": now + timedelta(hours=NOTIFICATION_DUE_SOON_HOURS)},
+            "assignee_id": {"$ne": None},
+            "archived": {"$ne": True},
+            # completed_at is not set on every path to done, status is
+            "status": {"$nin": CLOSED_STATUSES},
+            "$expr": {"$ne": [{"$ifNull": ["$due_reminder_for", None]}, "$due_date"]}
+        }
+        projection = {"title": 1, "project_id": 1, "organization_id": 1, "assignee_id": 1, "due_date": 1}
+
+        total = 0
+        while True:
+            tasks = await db["tasks"].find(query, projection).sort("due_date", 1).limit(
+                NOTIFICATION_REMINDER_BATCH_SIZE).to_list(length=NOTIFICATION_REMINDER_BATCH_SIZE)
+            if not tasks:
+                break
+            created = await NotificationService.notify_many([
+                NotificationService.build(
+                    NotificationType.TASK_DUE,
+                    task["assignee_id"],
+                    "Task due soon",
+                    f"'{task.get('title', 'A task')}' is due {task['due_date']:%Y-%m-%d %H:%M} UTC",
+                    data=NotificationService._task_data(task),
+                    now=now
+                )
+                for task in tasks
+            ])
+            total += created
+            if created != len(tasks):
+                # Leave the batch unmarked so the next run reminds these tasks again
+                logger.error(f"Only {created} of {len(tasks)} due date reminders were created, retrying next run")
+                break
+            await db["tasks"].update_many(
+                {"_id": {"$in": [task["_id"] for task in tasks]}},
+                [{"$set": {"due_reminder_for": "$due_date"}}]
+            )
+            if len(tasks) < NOTIFICATION_REMINDER_BATCH_SIZE:
+                break
+        if total:
+            logger.info(f"Sent {total} due date reminders")
+        return total
+
+    @staticmethod
+    def _task_data(task: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "task_id": str(task["_id"]),
+            "project_id": str(task["project_id"]) if task.get("project_id") else None,
+            "organization_id": str(task["organization_id"]) if task.get("organization_id") else None
+        }
+
+    # Reads and mark-read
+
+    @staticmethod
+    async def get_unread_count(user_id: ObjectId) -> int:
+        counter = await db["notification_counters"].find_one({"_id": user_id}, {"unread": 1})
+        return max((counter or {}).get("unread", 0), 0)
+
+    @staticmethod
+    async def list_notifications(
+        user_id: ObjectId,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        unread_only: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Newest first, paged by (created_at, _id) on the
+        (recipient_id, [read,] created_at, _id) indexes. Pass the returned
+        `next_cursor` back as `cursor` for the next page.
+        """
+        try:
+            query: Dict[str, Any] = {"recipient_id": user_id}
+            if unread_only:
+                query["read"] = False
+            if cursor:
+                query.update(keyset_filter("created_at", cursor))
+
+            rows = await db["notifications"].find(query, NOTIFICATION_PROJECTION).sort(
+                [("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+            notifications, next_cursor = split_page(rows, limit, "created_at")
+
+            return {
+                "notifications": [NotificationService._format(n) for n in notifications],
+                "unread_count": await NotificationService.get_unread_count(user_id),
+                "limit": limit,
+                "has_more": next_cursor is not None,
+                "next_cursor": next_cursor
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to list notifications: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to list notifications: {str(e)}"
+            )
+
+    @staticmethod
+    async def mark_read(
+        user_id: ObjectId,
+        notification_ids: Optional[List[ObjectId]] = None
+    ) -> Dict[str, Any]:
+        """
+        Mark the given notifications, or all of the user's unread ones, read
+        with one update_many. The counter is decremented by the number of
+        documents that actually flipped, so repeated or concurrent calls
+        cannot drive it below the real unread count.
+        """
+        try:
+            query: Dict[str, Any] = {"recipient_id": user_id, "read": False}
+            if notification_ids is not None:
+                if not notification_ids:
+                    return {"updated_count": 0, "unread_count": await NotificationService.get_unread_count(user_id)}
+                query["_id"] = {"$in": list(set(notification_ids))}
+
+            now = datetime.utcnow()
+            result = await db["notifications"].update_many(
+                query, {"$set": {"read": True, "read_at": now, "updated_at": now}})
+            if result.modified_count:
+                await db["notification_counters"].update_one(
+                    {"_id": user_id},
+                    {"$inc": {"unread": -result.modified_count}, "$set": {"updated_at": now}}
+                )
+
+            unread_count = await NotificationService.get_unread_count(user_id)
+            if result.modified_count:
+                # Keeps the badge in the user's other tabs in step
+                await notification_push.publish([
+                    (user_id, {"type": "unread_count", "unread_count": unread_count})
+                ])
+            return {
+                "updated_count": result.modified_count,
+                "unread_count": unread_count
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to mark notifications read: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to mark notifications read: {str(e)}"
+            )
+
+    @staticmethod
+    def _format(notification: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": str(notification["_id"]),
+            "type": notification["type"],
+            "sender_id": str(notification["sender_id"]) if notification.get("sender_id") else None,
+            "title": notification["title"],
+            "message": notification["message"],
+            "data": notification.get("data") or {},
+            "read": notification.get("read", False),
+            "read_at": notification.get("read_at"),
+            "created_at": notification["created_at"]
+        }
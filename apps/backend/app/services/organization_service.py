@@ -9,9 +9,15 @@ from app.models.organization import Organization
 from app.models.organization_invitation import OrganizationInvitation
 from app.db.enums import InvitationStatus, UserRole
 from app.utils.logger import logger
-from app.services.email_service import send_invitation_email
+from app.utils.pagination import keyset_filter, split_page, count_matching
+from app.utils.search import build_text_search
+from app.services.autocomplete_service import AutocompleteService
+from app.services.membership_service import MembershipService, SCOPE_ORGANIZATION
+from app.services.job_queue import JobQueue
 from app.config.org_settings import get_org_settings
-from app.utils.token_manager import create_invitation_token
+from app.utils.token_manager import create_invitation_token, create_invitation_tokens
+from app.config.config import INVITE_EMAIL_BATCH_SIZE
+from email_validator import validate_email, EmailNotValidError
 
 db = get_db()
 
@@ -132,6 +138,10 @@ class OrganizationService:
                     "$set": {"active_organization_id": organization_id}
                 }
             )
+            await MembershipService.add(
+                user_id, SCOPE_ORGANIZATION, organization_id, organization_id,
+                role, invited_by=invited_by, user=user)
+            AutocompleteService.on_member_added(organization_id, user)
 
             return True
         except Exception as e:
@@ -181,15 +191,15 @@ class OrganizationService:
             )
             await db["organization_invitations"].insert_one(invitation.model_dump(by_alias=True))
 
-            # Send invitation email
-            await send_invitation_email(
-                email=email,
-                organization_name=org.get("name", "Organization"),
-                inviter_name=inviter_name,
-                role=role,
-                token=token,
-                message=message
-            )
+            # Send invitation email from the job worker
+            await JobQueue.enqueue("send_invitation_email", {
+                "email": email,
+                "organization_name": org.get("name", "Organization"),
+                "inviter_name": inviter_name,
+                "role": getattr(role, "value", role),
+                "token": token,
+                "message": message
+            })
 
             return token
         except HTTPException:
@@ -198,6 +208,115 @@ class OrganizationService:
             raise HTTPException(
                 status_code=500, detail=f"Failed to invite user: {str(e)}")
 
+    @staticmethod
+    async def bulk_invite_users_to_organization(
+        organization_id: ObjectId,
+        emails: List[str],
+        inviter_name: str,
+        role: UserRole,
+        invited_by: ObjectId,
+        message: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Invite many addresses at once. Members and addresses with a pending
+        invitation are reported instead of invited again. Users, pending
+        invitations and inserts are one query each, and the emails go to the
+        job queue in batches of INVITE_EMAIL_BATCH_SIZE.
+        """
+        try:
+            org = await db["organizations"].find_one({"_id": organization_id}, {"name": 1})
+            if not org:
+                raise HTTPException(status_code=404, detail={
+                                    "message": "Organization not found"})
+
+            failed: List[Dict[str, Any]] = []
+            candidates: List[str] = []
+            seen = set()
+            for raw_email in emails:
+                try:
+                    email = validate_email(raw_email.strip(), check_deliverability=False).normalized
+                except EmailNotValidError:
+                    failed.append({"email": raw_email, "reason": "Invalid email address"})
+                    continue
+                if email.lower() in seen:
+                    failed.append({"email": raw_email, "reason": "Duplicate email in request"})
+                    continue
+                seen.add(email.lower())
+                candidates.append(email)
+
+            existing_users = await db["users"].find(
+                {"email": {"$in": candidates}},
+                {"email": 1, "organizations.organization_id": 1}
+            ).to_list(length=None)
+            users_by_email = {user["email"]: user for user in existing_users}
+
+            pending = await db["organization_invitations"].find(
+                {
+                    "organization_id": organization_id,
+                    "email": {"$in": candidates},
+                    "status": InvitationStatus.PENDING,
+                    "expires_at": {"$gt": datetime.utcnow()}
+                },
+                {"email": 1}
+            ).to_list(length=None)
+            pending_emails = {invitation["email"] for invitation in pending}
+
+            to_invite: List[str] = []
+            for email in candidates:
+                user = users_by_email.get(email)
+                if user and any(
+                    org_info["organization_id"] == organization_id
+                    for org_info in user.get("organizations", [])
+                ):
+                    failed.append({"email": email, "reason": "User already a member of this organization"})
+                elif email in pending_emails:
+                    failed.append({"email": email, "reason": "Invitation already pending"})
+                else:
+                    to_invite.append(email)
+
+            if to_invite:
+                tokens = create_invitation_tokens(to_invite, str(organization_id), role)
+                now = datetime.utcnow()
+                expires_at = now + timedelta(days=7)
+                await db["organization_invitations"].insert_many([
+                    OrganizationInvitation(
+                        organization_id=str(organization_id),
+                        email=email,
+                        role=role,
+                        invited_by=str(invited_by),
+                        token=token,
+                        expires_at=expires_at,
+                        status=InvitationStatus.PENDING,
+                        message=message,
+                        created_at=now
+                    ).model_dump(by_alias=True)
+                    for email, token in zip(to_invite, tokens)
+                ], ordered=False)
+
+                deliveries = [
+                    {"email": email, "token": token, "user_exists": email in users_by_email}
+                    for email, token in zip(to_invite, tokens)
+                ]
+                for start in range(0, len(deliveries), INVITE_EMAIL_BATCH_SIZE):
+                    await JobQueue.enqueue("send_invitation_emails", {
+                        "organization_name": org.get("name", "Organization"),
+                        "inviter_name": inviter_name,
+                        "role": getattr(role, "value", role),
+                        "message": message,
+                        "invitations": deliveries[start:start + INVITE_EMAIL_BATCH_SIZE]
+                    })
+
+            return {
+                "invited": [{"email": email} for email in to_invite],
+                "failed": failed
+            }
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to invite users: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail=f"Failed to invite users: {str(e)}")
+
     @staticmethod
     async def accept_invitation(token: str, user_id: Optional[ObjectId] = None) -> Dict[str, Any]:
         """ Accept organization invitation """
@@ -273,19 +392,7 @@ class OrganizationService:
         """Swithch user's active organization"""
         try:
             # Verify user is member of organization
-            user = await db["users"].find_one({"_id": user_id})
-            if not user:
-                raise HTTPException(status_code=404, detail={
-                                    "message": "User not found"})
-
-            user_orgs = user.get("organizations", [])
-            is_member = any(
-                org.get("organization_id") == organization_id and org.get(
-                    "status") == "active"
-                for org in user_orgs
-            )
-
-            if not is_member:
+            if not await MembershipService.get(user_id, organization_id):
                 raise HTTPException(status_code=403, detail={
                                     "message": "User not member of organization"})
 
@@ -356,35 +463,41 @@ class OrganizationService:
         return initials[:2]
 
     @staticmethod
-    async def get_organization_members_by_slug(org_slug: str) -> List[Dict[str, Any]]:
-        """Get all members of an organization by slug, including role, status, joined_at"""
+    async def get_organization_members_by_slug(
+        org_slug: str,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        count_mode: str = "exact"
+    ) -> Dict[str, Any]:
+        """
+        Get one page of organization members by slug, including role, status
+        and joined_at. `search` matches the start of a member's name or email.
+        """
         try:
-            organization = await db["organizations"].find_one({"slug": org_slug})
+            organization = await db["organizations"].find_one({"slug": org_slug}, {"_id": 1})
             if not organization:
                 raise HTTPException(
                     status_code=404, detail="Organization not found")
 
-            org_id = organization["_id"]
-            member_ids = organization.get("members", [])
-            members = await db["users"].find({"_id": {"$in": member_ids}}).to_list(length=None)
-            result = []
-            for m in members:
-                # Search for user's organization info
-                user_org_info = next(
-                    (org for org in m.get("organizations", [])
-                     if org.get("organization_id") == org_id),
-                    {}
-                )
-                result.append({
-                    "id": str(m["_id"]),
+            page = await MembershipService.list_scope_members(
+                organization["_id"], SCOPE_ORGANIZATION, search=search, limit=limit,
+                offset=offset, count_mode=count_mode)
+            page["members"] = [
+                {
+                    "id": str(m["user_id"]),
                     "name": m.get("name"),
                     "email": m.get("email"),
                     "avatar": m.get("avatar_url") if m.get("avatar_url") else OrganizationService.get_initials(m.get("name", "")),
-                    "role": user_org_info.get("role"),
-                    "status": user_org_info.get("status"),
-                    "joined_at": user_org_info.get("joined_at"),
-                })
-            return result
+                    "role": m.get("role"),
+                    "status": m.get("status"),
+                    "joined_at": m.get("joined_at"),
+                }
+                for m in page["members"]
+            ]
+            return page
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Failed to get organization members: {str(e)}"
@@ -400,23 +513,20 @@ class OrganizationService:
         offset: int = 0,
         status: Optional[str] = None,
         priority: Optional[str] = None,
-        assignee_id: Optional[ObjectId] = None
+        assignee_id: Optional[ObjectId] = None,
+        cursor: Optional[str] = None,
+        count_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """Get all tasks in organization with pagination and filtering"""
+        """
+        Get all tasks in organization with pagination and filtering.
+        Without a search term the returned `next_cursor` can be passed back as
+        `cursor` to page by (updated_at, _id) instead of offset.
+        """
         try:
-            # Verify user has access to organization
-            user = await db["users"].find_one({"_id": user_id})
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-
-            user_orgs = user.get("organizations", [])
-            is_org_member = any(
-                org["organization_id"] == organization_id
-                and org.get("status") == "active"
-                for org in user_orgs
-            )
-
-            if not is_org_member:
+            # Verify user has access to organization; the same lookup lists their projects
+            org_membership, user_project_ids = await MembershipService.get_organization_scope(
+                user_id, organization_id)
+            if not org_membership:
                 raise HTTPException(
                     status_code=403,
                     detail="User not member of organization or access denied"
@@ -427,6 +537,7 @@ class OrganizationService:
 
             # Match stage - base filter
             match_filter = {
+                "organization_id": organization_id,
                 "archived": False
             }
 
@@ -434,37 +545,35 @@ class OrganizationService:
             if project_id:
                 match_filter["project_id"] = project_id
             else:
-                # Get all projects in organization that user is member of
-                user_project_ids = []
-                user_projects = user.get("joined_projects", [])
-                for proj in user_projects:
-                    if proj.get("status") == "active":
-                        # Verify project belongs to organization
-                        project = await db["projects"].find_one({
-                            "_id": proj["project_id"],
-                            "organization_id": organization_id
-                        })
-                        if project:
-                            user_project_ids.append(proj["project_id"])
-
                 if not user_project_ids:
                     return {
                         "tasks": [],
                         "total": 0,
+                        "total_capped": False,
                         "limit": limit,
                         "offset": offset,
-                        "has_more": False
+                        "has_more": False,
+                        "next_cursor": None
                     }
 
                 match_filter["project_id"] = {"$in": user_project_ids}
 
-            # Add search filter for task title
-            if search and search.strip():
-                # Case-insensitive search using regex
-                match_filter["title"] = {
-                    "$regex": search.strip(),
-                    "$options": "i"  # Case-insensitive
+            # Full-text search over title, labels and description served by the
+            # (organization_id, text) index; input is reduced to plain terms
+            text_query = build_text_search(search) if search else ""
+            searching = bool(text_query)
+            if search and search.strip() and not searching:
+                return {
+                    "tasks": [],
+                    "total": 0,
+                    "total_capped": False,
+                    "limit": limit,
+                    "offset": offset,
+                    "has_more": False,
+                    "next_cursor": None
                 }
+            if searching:
+                match_filter["$text"] = {"$search": text_query}
 
             # Apply additional filters
             if status:
@@ -474,9 +583,32 @@ class OrganizationService:
             if assignee_id:
                 match_filter["assignee_id"] = assignee_id
 
+            # Counting uses the match alone, never the lookups below
+            total, total_capped = await count_matching(
+                db["tasks"], match_filter, count_mode)
+
+            if cursor and not searching:
+                # Keyset pagination: continue strictly after the last row seen
+                match_filter = {**match_filter, **keyset_filter("updated_at", cursor)}
+                offset = 0
+
             pipeline.append({"$match": match_filter})
 
-            # Lookup project details
+            # Sort by relevance when searching (title > labels > description
+            # weights on the text index), otherwise by updated_at descending
+            if searching:
+                pipeline.append({"$addFields": {"search_score": {"$meta": "textScore"}}})
+                pipeline.append({"$sort": {"search_score": -1, "updated_at": -1, "_id": -1}})
+            else:
+                pipeline.append({"$sort": {"updated_at": -1, "_id": -1}})
+
+            # Add pagination; one extra row tells whether another page exists
+            pipeline.extend([
+                {"$skip": offset},
+                {"$limit": limit + 1}
+            ])
+
+            # Lookup project and assignee details (only for the rows on this page)
             pipeline.append({
                 "$lookup": {
                     "from": "projects",
@@ -485,8 +617,6 @@ class OrganizationService:
                     "as": "project_info"
                 }
             })
-
-            # Lookup assignee details
             pipeline.append({
                 "$lookup": {
                     "from": "users",
@@ -495,8 +625,6 @@ class OrganizationService:
                     "as": "assignee_info"
                 }
             })
-
-            # Add project and assignee data
             pipeline.append({
                 "$addFields": {
                     "project_name": {"$arrayElemAt": ["$project_info.name", 0]},
@@ -505,42 +633,6 @@ class OrganizationService:
                 }
             })
 
-            # Sort by updated_at descending (or by relevance if search is provided)
-            if search and search.strip():
-                # Add text relevance scoring for better search results
-                pipeline.append({
-                    "$addFields": {
-                        "search_score": {
-                            "$cond": {
-                                "if": {"$regexMatch": {"input": "$title", "regex": f"^{search.strip()}", "options": "i"}},
-                                "then": 3,  # Higher score for titles starting with search term
-                                "else": {
-                                    "$cond": {
-                                        "if": {"$regexMatch": {"input": "$title", "regex": search.strip(), "options": "i"}},
-                                        "then": 1,  # Lower score for titles containing search term
-                                        "else": 0
-                                    }
-                                }
-                            }
-                        }
-                    }
-                })
-                pipeline.append({"$sort": {"search_score": -1, "updated_at": -1}})
-            else:
-                pipeline.append({"$sort": {"updated_at": -1}})
-
-            # Get total count for pagination (before skip/limit)
-            count_pipeline = pipeline.copy()
-            count_pipeline.append({"$count": "total"})
-            count_result = await db["tasks"].aggregate(count_pipeline).to_list(length=None)
-            total = count_result[0]["total"] if count_result else 0
-
-            # Add pagination
-            pipeline.extend([
-                {"$skip": offset},
-                {"$limit": limit}
-            ])
-
             # Project only needed fields
             pipeline.append({
                 "$project": {
@@ -552,13 +644,21 @@ class OrganizationService:
                     "project_color": 1,
                     "assignee_name": 1,
                     "due_date": 1,
+                    "search_score": 1,
                     "created_at": 1,
                     "updated_at": 1
                 }
             })
 
             # Execute aggregation
-            tasks = await db["tasks"].aggregate(pipeline).to_list(length=None)
+            rows = await db["tasks"].aggregate(pipeline).to_list(length=limit + 1)
+            if searching:
+                # Relevance order has no stable keyset, search pages by offset
+                tasks, next_cursor = rows[:limit], None
+                has_more = len(rows) > limit
+            else:
+                tasks, next_cursor = split_page(rows, limit, "updated_at")
+                has_more = next_cursor is not None
 
             # Format response
             formatted_tasks = []
@@ -572,6 +672,7 @@ class OrganizationService:
                     "assignee": task.get("assignee_name", ""),
                     "project_color": task.get("project_color", "#6B7280"),
                     "due_date": task.get("due_date"),
+                    "relevance": task.get("search_score"),
                     "created_at": task["created_at"],
                     "updated_at": task["updated_at"]
                 })
@@ -579,9 +680,11 @@ class OrganizationService:
             return {
                 "tasks": formatted_tasks,
                 "total": total,
+                "total_capped": total_capped,
                 "limit": limit,
                 "offset": offset,
-                "has_more": offset + limit < total
+                "has_more": has_more,
+                "next_cursor": next_cursor
             }
 
         except HTTPException:
@@ -8,6 +8,10 @@ from app.models.project import Project, ProjectCreate, ProjectUpdate, ProjectSet
 from app.models.board import Board, BoardColumn
 from app.db.enums import ProjectStatus, UserRole, ActivityType
 from app.utils.logger import logger
+from app.services.activity_service import ActivityService
+from app.services.autocomplete_service import AutocompleteService
+from app.services.membership_service import MembershipService, SCOPE_PROJECT
+from pymongo import UpdateOne
 
 db = get_db()
 
@@ -39,23 +43,7 @@ class ProjectService:
     @staticmethod
     async def verify_user_access(user_id: ObjectId, organization_id: ObjectId) -> Dict[str, Any]:
         """Verify user has access to organization and get role"""
-        user = await db["users"].find_one({"_id": user_id})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        user_orgs = user.get("organizations", [])
-        user_org = next(
-            (org for org in user_orgs
-             if org["organization_id"] == organization_id
-             and org.get("status") == "active"),
-            None
-        )
-
-        if not user_org:
-            raise HTTPException(
-                status_code=403,
-                detail="User not member of organization or access denied"
-            )
+        user_org = await MembershipService.require_organization_member(user_id, organization_id)
 
         return {
             "role": user_org["role"],
@@ -118,6 +106,7 @@ class ProjectService:
                 "project_id": project_id,
                 "columns": default_columns,
                 "is_default": True,
+                "version": 1,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
@@ -180,6 +169,7 @@ class ProjectService:
             # Insert project
             result = await db["projects"].insert_one(project_doc)
             project_id = result.inserted_id
+            AutocompleteService.on_project_saved({**project_doc, "_id": project_id})
 
             # Owner: add project to joined_projects as manager
             await db["users"].update_one(
@@ -192,16 +182,19 @@ class ProjectService:
                     "invited_by": None
                 }}}
             )
+            await MembershipService.add(
+                user_id, SCOPE_PROJECT, project_id, organization_id, UserRole.MANAGER)
 
             # Create default board
             board_id = await ProjectService.create_default_board(project_id, project_data["name"])
 
             # Log activity
-            await ProjectService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=project_id,
                 activity_type=ActivityType.PROJECT_CREATED,
-                description=f"Created project '{project_data['name']}'"
+                description=f"Created project '{project_data['name']}'",
+                organization_id=organization_id
             )
 
             # Get created project with board info
@@ -359,13 +352,15 @@ class ProjectService:
                 {"_id": project["_id"]},
                 {"$set": update_data}
             )
+            AutocompleteService.on_project_saved({**project, **update_data})
 
             # Log activity
-            await ProjectService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=project["_id"],
                 activity_type=ActivityType.PROJECT_UPDATED,
-                description=f"Updated project '{project['name']}'"
+                description=f"Updated project '{project['name']}'",
+                organization_id=organization_id
             )
 
             # Return updated project
@@ -418,10 +413,12 @@ class ProjectService:
                 .limit(limit)\
                 .to_list(length=None)
 
-            # Enrich with stats
+            # Enrich with stats, computed for the whole page at once
+            stats_by_project = await ProjectService._get_projects_stats(
+                [project["_id"] for project in projects])
             enriched_projects = []
             for project in projects:
-                stats = await ProjectService._get_project_stats(project["_id"])
+                stats = stats_by_project[project["_id"]]
 
                 enriched_projects.append({
                     "id": str(project["_id"]),
@@ -487,86 +484,96 @@ class ProjectService:
             added_members = []
             failed_members = []
 
-            # Process each member
-            for member_id in member_ids:
-                try:
-                    # Verify member exists and is in organization
-                    member = await db["users"].find_one({"_id": member_id})
-                    if not member:
-                        failed_members.append({
-                            "member_id": str(member_id),
-                            "reason": "User not found"
-                        })
-                        continue
-
-                    member_orgs = member.get("organizations", [])
-                    is_org_member = any(
-                        org["organization_id"] == organization_id
-                        and org.get("status") == "active"
-                        for org in member_orgs
-                    )
+            # One fetch for every requested user instead of one per member
+            unique_ids = list(dict.fromkeys(member_ids))
+            members = await db["users"].find(
+                {"_id": {"$in": unique_ids}},
+                {"name": 1, "email": 1, "avatar_url": 1, "organizations": 1}
+            ).to_list(length=None)
+            members_by_id = {member["_id"]: member for member in members}
+            current_members = set(project.get("members", []))
+
+            to_add = []
+            for member_id in unique_ids:
+                member = members_by_id.get(member_id)
+                if not member:
+                    failed_members.append({
+                        "member_id": str(member_id),
+                        "reason": "User not found"
+                    })
+                    continue
 
-                    if not is_org_member:
-                        failed_members.append({
-                            "member_id": str(member_id),
-                            "reason": "User is not a member of the organization"
-                        })
-                        continue
-
-                    # Check if already a project member
-                    if member_id in project.get("members", []):
-                        failed_members.append({
-                            "member_id": str(member_id),
-                            "reason": "User is already a project member"
-                        })
-                        continue
-
-                    # Add to project members
-                    result = await db["projects"].update_one(
-                        {"_id": project["_id"]},
-                        {"$addToSet": {"members": member_id}}
-                    )
+                is_org_member = any(
+                    org["organization_id"] == organization_id
+                    and org.get("status") == "active"
+                    for org in member.get("organizations", [])
+                )
+                if not is_org_member:
+                    failed_members.append({
+                        "member_id": str(member_id),
+                        "reason": "User is not a member of the organization"
+                    })
+                    continue
 
-                    # Add joined_projects entry
-                    joined_project_info = {
-                        "project_id": project["_id"],
-                        "role": UserRole.MEMBER,
-                        "status": "active",
-                        "joined_at": datetime.utcnow(),
-                        "invited_by": user_id
-                    }
+                if member_id in current_members:
+                    failed_members.append({
+                        "member_id": str(member_id),
+                        "reason": "User is already a project member"
+                    })
+                    continue
+
+                to_add.append(member)
+
+            if to_add:
+                joined_at = datetime.utcnow()
+                add_ids = [member["_id"] for member in to_add]
+
+                await db["projects"].update_one(
+                    {"_id": project["_id"]},
+                    {"$addToSet": {"members": {"$each": add_ids}}}
+                )
 
-                    await db["users"].update_one(
+                joined_project_info = {
+                    "project_id": project["_id"],
+                    "role": UserRole.MEMBER,
+                    "status": "active",
+                    "joined_at": joined_at,
+                    "invited_by": user_id
+                }
+                await db["users"].bulk_write([
+                    UpdateOne(
                         {"_id": member_id},
                         {"$addToSet": {"joined_projects": joined_project_info}}
                     )
+                    for member_id in add_ids
+                ], ordered=False)
+                await MembershipService.add_many(
+                    to_add, SCOPE_PROJECT, project["_id"], organization_id,
+                    UserRole.MEMBER, invited_by=user_id)
+
+                await ActivityService.log_activities(
+                    user_id,
+                    [
+                        {
+                            "project_id": project["_id"],
+                            "activity_type": ActivityType.USER_JOINED,
+                            "target_user_id": member["_id"],
+                            "description": f"Added {member.get('name')} to project"
+                        }
+                        for member in to_add
+                    ],
+                    organization_id=organization_id
+                )
 
-                    # Log activity
-                    await ProjectService._log_activity(
-                        user_id=user_id,
-                        project_id=project["_id"],
-                        activity_type=ActivityType.USER_JOINED,
-                        target_user_id=member_id,
-                        description=f"Added {member['name']} to project"
-                    )
-
-                    # Build member response
-                    member_response = {
+                for member in to_add:
+                    added_members.append({
                         "id": str(member["_id"]),
                         "name": member.get("name"),
                         "email": member.get("email"),
                         "avatar": member.get("avatar_url") if member.get("avatar_url") else ProjectService.get_initials(member.get("name", "")),
-                        "role": joined_project_info.get("role"),
-                        "status": joined_project_info.get("status"),
-                        "joined_at": joined_project_info.get("joined_at"),
-                    }
-
-                    added_members.append(member_response)
-
-                except Exception as e:
-                    failed_members.append({
-                        "member_id": str(member_id),
-                        "reason": str(e)
+                        "role": joined_project_info["role"],
+                        "status": joined_project_info["status"],
+                        "joined_at": joined_at,
                     })
 
             return {
@@ -597,9 +604,16 @@ class ProjectService:
     async def get_project_members_by_slug(
         user_id: ObjectId,
         organization_id: ObjectId,
-        project_slug: str
-    ) -> List[Dict[str, Any]]:
-        """Get project members by project slug, include role, status, joined_at"""
+        project_slug: str,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        count_mode: str = "exact"
+    ) -> Dict[str, Any]:
+        """
+        Get one page of project members by project slug, include role, status,
+        joined_at. `search` matches the start of a member's name or email.
+        """
         # Verify user access
         await ProjectService.verify_user_access(user_id, organization_id)
 
@@ -607,95 +621,89 @@ class ProjectService:
             "slug": project_slug,
             "organization_id": organization_id,
             "archived": False
-        })
+        }, {"_id": 1})
 
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
-        member_ids = project.get("members", [])
-        members = await db["users"].find({"_id": {"$in": member_ids}}).to_list(length=None)
-
-        result = []
-        for m in members:
-            # Cari info project user
-            user_proj_info = next(
-                (proj for proj in m.get("joined_projects", [])
-                 if proj.get("project_id") == project["_id"]),
-                {}
-            )
-            result.append({
-                "id": str(m["_id"]),
+
+        page = await MembershipService.list_scope_members(
+            project["_id"], SCOPE_PROJECT, search=search, limit=limit,
+            offset=offset, count_mode=count_mode)
+        page["members"] = [
+            {
+                "id": str(m["user_id"]),
                 "name": m.get("name"),
                 "email": m.get("email"),
                 "avatar": m.get("avatar_url") if m.get("avatar_url") else ProjectService.get_initials(m.get("name", "")),
-                "role": user_proj_info.get("role"),
-                "status": user_proj_info.get("status"),
-                "joined_at": user_proj_info.get("joined_at"),
-            })
-        return result
+                "role": m.get("role"),
+                "status": m.get("status"),
+                "joined_at": m.get("joined_at"),
+            }
+            for m in page["members"]
+        ]
+        return page
+
+    @staticmethod
+    def _empty_project_stats() -> Dict[str, Any]:
+        return {
+            "total_tasks": 0,
+            "completed_tasks": 0,
+            "in_progress_tasks": 0,
+            "todo_tasks": 0,
+            "overdue_tasks": 0,
+            "completion_rate": 0.0
+        }
 
     @staticmethod
     async def _get_project_stats(project_id: ObjectId) -> Dict[str, Any]:
         """Get project statistics"""
+        stats = await ProjectService._get_projects_stats([project_id])
+        return stats[project_id]
+
+    @staticmethod
+    async def _get_projects_stats(project_ids: List[ObjectId]) -> Dict[ObjectId, Dict[str, Any]]:
+        """Get statistics for a page of projects with a single aggregation"""
+        stats_by_project = {
+            project_id: ProjectService._empty_project_stats() for project_id in project_ids
+        }
+        if not project_ids:
+            return stats_by_project
+
         try:
-            # Task counts by status
+            closed = ["done", "completed"]
+            now = datetime.utcnow()
             pipeline = [
-                {"$match": {"project_id": project_id, "archived": False}},
+                {"$match": {"project_id": {"$in": project_ids}, "archived": False}},
                 {"$group": {
-                    "_id": "$status",
-                    "count": {"$sum": 1}
+                    "_id": "$project_id",
+                    "total_tasks": {"$sum": 1},
+                    "completed_tasks": {"$sum": {"$cond": [{"$in": ["$status", closed]}, 1, 0]}},
+                    "in_progress_tasks": {"$sum": {"$cond": [
+                        {"$in": ["$status", ["in_progress", "in-progress"]]}, 1, 0]}},
+                    "todo_tasks": {"$sum": {"$cond": [{"$eq": ["$status", "todo"]}, 1, 0]}},
+                    # Tasks without a due date fall back to `now`, so they never count as overdue
+                    "overdue_tasks": {"$sum": {"$cond": [
+                        {"$in": ["$status", closed]},
+                        0,
+                        {"$cond": [{"$lt": [{"$ifNull": ["$due_date", now]}, now]}, 1, 0]}
+                    ]}}
                 }}
             ]
-
-            status_counts = await db["tasks"].aggregate(pipeline).to_list(length=None)
-
-            stats = {
-                "total_tasks": 0,
-                "completed_tasks": 0,
-                "in_progress_tasks": 0,
-                "todo_tasks": 0,
-                "overdue_tasks": 0,
-                "completion_rate": 0.0
-            }
-
-            for item in status_counts:
-                status = item["_id"]
-                count = item["count"]
-                stats["total_tasks"] += count
-
-                if status == "done" or status == "completed":
-                    stats["completed_tasks"] = count
-                elif status == "in_progress" or status == "in-progress":
-                    stats["in_progress_tasks"] = count
-                elif status == "todo":
-                    stats["todo_tasks"] = count
-
-            # Calculate overdue tasks
-            overdue_count = await db["tasks"].count_documents({
-                "project_id": project_id,
-                "due_date": {"$lt": datetime.utcnow()},
-                "status": {"$nin": ["done", "completed"]},
-                "archived": False
-            })
-            stats["overdue_tasks"] = overdue_count
-
-            # Calculate completion rate
-            if stats["total_tasks"] > 0:
-                stats["completion_rate"] = round(
-                    (stats["completed_tasks"] / stats["total_tasks"]) * 100, 1
-                )
-
-            return stats
+            rows = await db["tasks"].aggregate(pipeline).to_list(length=None)
+
+            for row in rows:
+                stats = stats_by_project[row["_id"]]
+                for key in ("total_tasks", "completed_tasks", "in_progress_tasks", "todo_tasks", "overdue_tasks"):
+                    stats[key] = row[key]
+                if stats["total_tasks"] > 0:
+                    stats["completion_rate"] = round(
+                        (stats["completed_tasks"] / stats["total_tasks"]) * 100, 1
+                    )
 
         except Exception as e:
             logger.error(f"Failed to get project stats: {str(e)}")
-            return {
-                "total_tasks": 0,
-                "completed_tasks": 0,
-                "in_progress_tasks": 0,
-                "todo_tasks": 0,
-                "overdue_tasks": 0,
-                "completion_rate": 0.0
-            }
+
+        return stats_by_project
 
     @staticmethod
     async def get_sidebar_projects(
@@ -711,9 +719,10 @@ class ProjectService:
                 "archived": False
             }
             projects = await db["projects"].find(query).sort("updated_at", -1).limit(4).to_list(length=4)
+            stats_by_project = await ProjectService._get_projects_stats([p["_id"] for p in projects])
             sidebar_projects = []
             for p in projects:
-                task_count = await db["tasks"].count_documents({"project_id": p["_id"], "archived": False})
+                task_count = stats_by_project[p["_id"]]["total_tasks"]
                 sidebar_projects.append({
                     "id": str(p["_id"]),
                     "name": p["name"],
@@ -726,31 +735,3 @@ class ProjectService:
         except Exception as e:
             logger.error(f"Failed to get sidebar projects: {str(e)}")
             return []
-
-    @staticmethod
-    async def _log_activity(
-        user_id: ObjectId,
-        project_id: ObjectId,
-        activity_type: ActivityType,
-        description: str,
-        target_user_id: Optional[ObjectId] = None,
-        metadata: Optional[Dict[str, Any]] = None
-    ):
-        """Log project activity"""
-        try:
-            activity_doc = {
-                "type": activity_type,
-                "user_id": user_id,
-                "project_id": project_id,
-                "target_user_id": target_user_id,
-                "description": description,
-                "metadata": metadata or {},
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-
-            await db["activities"].insert_one(activity_doc)
-
-        except Exception as e:
-            logger.error(f"Failed to log activity: {str(e)}")
-            # Don't raise exception for logging failures
@@ -7,10 +7,26 @@ from app.models.task import Task, TaskCreate, TaskUpdate
 from app.db.enums import TaskStatus, ActivityType
 from app.utils.permissions import verify_user_access_to_project
 from app.utils.logger import logger
-from pymongo import UpdateOne
+from app.services.activity_service import ActivityService
+from app.services.workload_service import WorkloadService
+from app.services.analytics_service import AnalyticsService
+from app.services.autocomplete_service import AutocompleteService
+from app.services.notification_service import NotificationService
+from pymongo import UpdateOne, UpdateMany, ReturnDocument
+from app.config.config import BULK_UPDATE_MAX_TASKS
 
 db = get_db()
 
+# Fields read back after a mutation: the API response plus what workload
+# counters and autocomplete need. Comments, attachments and time logs stay on the server.
+TASK_RESPONSE_PROJECTION = {
+    "title": 1, "description": 1, "status": 1, "priority": 1, "project_id": 1,
+    "organization_id": 1, "board_id": 1, "column_id": 1, "creator_id": 1,
+    "assignee_id": 1, "due_date": 1, "start_date": 1, "completed_at": 1,
+    "estimated_hours": 1, "actual_hours": 1, "labels": 1, "position": 1,
+    "archived": 1, "version": 1, "created_at": 1, "updated_at": 1
+}
+
 
 class TaskService:
 
@@ -22,9 +38,11 @@ class TaskService:
         """Create a new task"""
         try:
             project_id = ObjectId(task_data.project_id)
+            # Checked before the insert so a bad id cannot fail a task that was already created
+            mentioned_ids = TaskService._parse_mentions(getattr(task_data, "mentions", None))
 
             # Verify user has access to project
-            await verify_user_access_to_project(user_id, project_id)
+            access = await verify_user_access_to_project(user_id, project_id)
 
             # Get the board and validate column_id if provided
             board = None
@@ -64,6 +82,12 @@ class TaskService:
             status = TaskService._map_column_to_status(
                 task_data.column_id or "todo")
 
+            # Resolve assignee (explicit, or from project auto-assign settings)
+            if task_data.assignee_id:
+                assignee_id = ObjectId(task_data.assignee_id)
+            else:
+                assignee_id = await WorkloadService.pick_assignee(access["project"])
+
             # Prepare task document
             task_doc = {
                 "title": task_data.title,
@@ -71,10 +95,11 @@ class TaskService:
                 "status": status,
                 "priority": task_data.priority,
                 "project_id": project_id,
+                "organization_id": access["project"]["organization_id"],
                 "board_id": ObjectId(task_data.board_id) if task_data.board_id else None,
                 "column_id": task_data.column_id,
                 "creator_id": user_id,
-                "assignee_id": ObjectId(task_data.assignee_id) if task_data.assignee_id else None,
+                "assignee_id": assignee_id,
                 "reviewers": [],
                 "due_date": task_data.due_date,
                 "start_date": None,
@@ -88,6 +113,7 @@ class TaskService:
                 "dependencies": [],
                 "position": position,
                 "archived": False,
+                "version": 1,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
@@ -96,8 +122,12 @@ class TaskService:
             result = await db["tasks"].insert_one(task_doc)
             task_doc["_id"] = result.inserted_id
 
+            await WorkloadService.apply_change(
+                project_id, None, task_doc, bump_stats_version=True)
+            AutocompleteService.on_task_saved(task_doc)
+
             # Log activity for task creation
-            await TaskService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=project_id,
                 activity_type=ActivityType.TASK_CREATED,
@@ -107,9 +137,15 @@ class TaskService:
                     "title": task_data.title,
                     "column_id": task_data.column_id,
                     "board_id": str(task_data.board_id) if task_data.board_id else None
-                }
+                },
+                organization_id=access["project"]["organization_id"]
             )
 
+            await NotificationService.notify_task_assigned(user_id, [task_doc])
+            if mentioned_ids:
+                await NotificationService.notify_mentions(
+                    user_id, task_doc, mentioned_ids, access["project"].get("members", []))
+
             return TaskService._format_task_response(task_doc)
 
         except HTTPException:
@@ -126,7 +162,8 @@ class TaskService:
         user_id: ObjectId,
         task_id: ObjectId,
         new_position: float,
-        column_id: Optional[str] = None
+        column_id: Optional[str] = None,
+        expected_version: Optional[int] = None
     ) -> Dict[str, Any]:
         """Update task position within the same status/column and reorder others"""
         try:
@@ -171,32 +208,24 @@ class TaskService:
                 insert_index = len(tasks_in_column)
             tasks_in_column.insert(insert_index, task)
 
-            # Reassign positions (0, 1, 2, ...)
-            bulk_ops = []
-            for idx, t in enumerate(tasks_in_column):
-                bulk_ops.append(
-                    (
-                        "update_one",
-                        {
-                            "filter": {"_id": t["_id"]},
-                            "update": {"$set": {"position": idx, "updated_at": datetime.utcnow()}}
-                        }
-                    )
-                )
+            # Move the task itself first, so a version conflict leaves the column untouched
+            updated_task = await TaskService._apply_versioned_update(
+                task,
+                {"$set": {"position": insert_index, "updated_at": datetime.utcnow()}},
+                expected_version
+            )
 
-            # Fix: use pymongo UpdateOne objects for bulk_write
+            # Reassign positions (0, 1, 2, ...) of the other tasks
             bulk_requests = [
-                UpdateOne(op[1]["filter"], op[1]["update"])
-                for op in bulk_ops if op[0] == "update_one"
+                UpdateOne({"_id": t["_id"]}, {"$set": {"position": idx, "updated_at": datetime.utcnow()}})
+                for idx, t in enumerate(tasks_in_column)
+                if t["_id"] != task_id and t.get("position") != idx
             ]
             if bulk_requests:
                 await db["tasks"].bulk_write(bulk_requests)
 
-            # Get updated task
-            updated_task = await db["tasks"].find_one({"_id": task_id})
-
             # Log activity
-            await TaskService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=task["project_id"],
                 activity_type=ActivityType.TASK_UPDATED,
@@ -219,6 +248,7 @@ class TaskService:
         user_id: ObjectId,
         task_id: ObjectId,
         new_column_id: str,
+        expected_version: Optional[int] = None
     ) -> Dict[str, Any]:
         """Change task status by moving to different column. Always put at last position in target column and reindex source column."""
         try:
@@ -270,10 +300,8 @@ class TaskService:
                 update_data["completed_at"] = None
 
             # Update the moved task
-            await db["tasks"].update_one(
-                {"_id": task_id},
-                {"$set": update_data}
-            )
+            updated_task = await TaskService._apply_versioned_update(
+                task, {"$set": update_data}, expected_version)
 
             # Reindex positions in source column (exclude moved task)
             source_query = {
@@ -292,11 +320,11 @@ class TaskService:
             if bulk_requests:
                 await db["tasks"].bulk_write(bulk_requests)
 
-            # Get updated task
-            updated_task = await db["tasks"].find_one({"_id": task_id})
+            await WorkloadService.apply_change(
+                task["project_id"], task, updated_task, bump_stats_version=True)
 
             # Log activity
-            await TaskService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=task["project_id"],
                 activity_type=ActivityType.TASK_UPDATED,
@@ -318,7 +346,8 @@ class TaskService:
     async def update_task_partial(
         user_id: ObjectId,
         task_id: ObjectId,
-        update_data: Dict[str, Any]
+        update_data: Dict[str, Any],
+        expected_version: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Update partial attributes of a task.
@@ -331,13 +360,15 @@ class TaskService:
                 raise HTTPException(status_code=404, detail="Task not found")
 
             # Verify user has access to project
-            await verify_user_access_to_project(user_id, task["project_id"])
+            access = await verify_user_access_to_project(user_id, task["project_id"])
 
             # Remove fields that should not be updated directly
             protected_fields = ["_id", "project_id",
-                                "creator_id", "created_at"]
+                                "creator_id", "created_at", "version"]
             for field in protected_fields:
                 update_data.pop(field, None)
+            # Mentions only trigger notifications, they are not stored on the task
+            mentioned_ids = TaskService._parse_mentions(update_data.pop("mentions", None))
 
             # Convert assignee_id to ObjectId if present and not None
             if "assignee_id" in update_data and update_data["assignee_id"]:
@@ -346,23 +377,28 @@ class TaskService:
             # Always update updated_at
             update_data["updated_at"] = datetime.utcnow()
 
-            # Update the task
-            await db["tasks"].update_one(
-                {"_id": task_id},
-                {"$set": update_data}
-            )
+            # Update the task and read it back in the same round trip
+            updated_task = await TaskService._apply_versioned_update(
+                task, {"$set": update_data}, expected_version)
 
-            # Get updated task
-            updated_task = await db["tasks"].find_one({"_id": task_id})
+            await WorkloadService.apply_change(
+                task["project_id"], task, updated_task, bump_stats_version=True)
+            AutocompleteService.on_task_saved(updated_task)
 
             # Log activity
-            await TaskService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=task["project_id"],
                 activity_type=ActivityType.TASK_UPDATED,
                 description=f"Updated task '{task['title']}' (partial)"
             )
 
+            if updated_task.get("assignee_id") != task.get("assignee_id"):
+                await NotificationService.notify_task_assigned(user_id, [updated_task])
+            if mentioned_ids:
+                await NotificationService.notify_mentions(
+                    user_id, updated_task, mentioned_ids, access["project"].get("members", []))
+
             return TaskService._format_task_response(updated_task)
 
         except HTTPException:
@@ -374,6 +410,185 @@ class TaskService:
                 detail=f"Failed to update task: {str(e)}"
             )
             
+    @staticmethod
+    async def _apply_versioned_update(
+        task: Dict[str, Any],
+        update: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply an update only if the task still has the version that was read,
+        and return the post-image. Tasks created before versioning have no
+        field and count as version 0.
+        """
+        current_version = task.get("version", 0)
+        if expected_version is not None and expected_version != current_version:
+            raise HTTPException(
+                status_code=409,
+                detail="Task was modified by someone else, reload and try again"
+            )
+
+        update.setdefault("$inc", {})["version"] = 1
+        updated_task = await db["tasks"].find_one_and_update(
+            {"_id": task["_id"], "version": current_version or None},
+            update,
+            projection=TASK_RESPONSE_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if not updated_task:
+            raise HTTPException(
+                status_code=409,
+                detail="Task was modified by someone else, reload and try again"
+            )
+        return updated_task
+
+    @staticmethod
+    async def bulk_update_tasks(
+        user_id: ObjectId,
+        patch: Dict[str, Any],
+        task_ids: Optional[List[ObjectId]] = None,
+        task_filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply one patch to many tasks, selected by ids or by a project filter.
+        Access is checked once per affected project, the write is a single
+        bulk_write and each project gets one digest activity.
+        """
+        try:
+            if bool(task_ids) == bool(task_filter):
+                raise HTTPException(status_code=400, detail="Provide either task_ids or a filter")
+
+            set_fields: Dict[str, Any] = {}
+            for field in ("priority", "archived"):
+                if patch.get(field) is not None:
+                    set_fields[field] = patch[field]
+            # An explicit null clears the due date and unassigns
+            if "due_date" in patch:
+                set_fields["due_date"] = patch["due_date"]
+            if "assignee_id" in patch:
+                set_fields["assignee_id"] = ObjectId(patch["assignee_id"]) if patch["assignee_id"] else None
+            add_labels = TaskService._clean_labels(patch.get("add_labels"))
+            remove_labels = TaskService._clean_labels(patch.get("remove_labels"))
+            if not set_fields and not add_labels and not remove_labels:
+                raise HTTPException(status_code=400, detail="No changes provided")
+
+            if task_ids:
+                query = {"_id": {"$in": list(set(task_ids))}}
+            else:
+                query = TaskService._bulk_filter_query(task_filter)
+
+            tasks = await db["tasks"].find(
+                query, {"project_id": 1, "organization_id": 1, "title": 1, "assignee_id": 1}
+            ).limit(BULK_UPDATE_MAX_TASKS + 1).to_list(length=None)
+            if len(tasks) > BULK_UPDATE_MAX_TASKS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Too many tasks selected (max {BULK_UPDATE_MAX_TASKS})"
+                )
+            if task_ids and len(tasks) != len(set(task_ids)):
+                raise HTTPException(status_code=404, detail="Some tasks were not found")
+            if not tasks:
+                return {"updated_count": 0, "task_ids": []}
+
+            tasks_by_project: Dict[ObjectId, List[Dict[str, Any]]] = {}
+            for task in tasks:
+                tasks_by_project.setdefault(task["project_id"], []).append(task)
+
+            projects = {}
+            for project_id in tasks_by_project:
+                access = await verify_user_access_to_project(user_id, project_id)
+                projects[project_id] = access["project"]
+                assignee_id = set_fields.get("assignee_id")
+                if assignee_id and assignee_id not in access["project"].get("members", []):
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Assignee is not a member of every selected project"
+                    )
+
+            # Only the tasks that passed the access check are written, even if
+            # more now match the filter
+            target = {"_id": {"$in": [task["_id"] for task in tasks]}}
+            update: Dict[str, Any] = {
+                "$set": {**set_fields, "updated_at": datetime.utcnow()},
+                "$inc": {"version": 1}
+            }
+            if add_labels:
+                update["$addToSet"] = {"labels": {"$each": add_labels}}
+            operations = [UpdateMany(target, update)]
+            if remove_labels:
+                # $pull cannot share an update with $addToSet on the same field
+                operations.append(UpdateMany(target, {"$pull": {"labels": {"$in": remove_labels}}}))
+            await db["tasks"].bulk_write(operations, ordered=True)
+
+            changed_fields = sorted(set_fields) + (["labels"] if add_labels or remove_labels else [])
+            for project_id, project_tasks in tasks_by_project.items():
+                if "assignee_id" in set_fields or "archived" in set_fields:
+                    await WorkloadService.rebuild_project(project_id, bump_stats_version=True)
+                else:
+                    await AnalyticsService.bump_version(project_id)
+                await ActivityService.log_activity(
+                    user_id=user_id,
+                    project_id=project_id,
+                    activity_type=ActivityType.TASK_UPDATED,
+                    description=f"Bulk updated {len(project_tasks)} tasks ({', '.join(changed_fields)})",
+                    metadata={
+                        "task_ids": [str(task["_id"]) for task in project_tasks],
+                        "changes": changed_fields
+                    },
+                    organization_id=projects[project_id]["organization_id"]
+                )
+            if "archived" in set_fields:
+                for organization_id in {p["organization_id"] for p in projects.values()}:
+                    AutocompleteService.invalidate(organization_id)
+            if set_fields.get("assignee_id"):
+                await NotificationService.notify_task_assigned(user_id, [
+                    {**task, "assignee_id": set_fields["assignee_id"]}
+                    for task in tasks if task.get("assignee_id") != set_fields["assignee_id"]
+                ])
+
+            return {
+                "updated_count": len(tasks),
+                "task_ids": [str(task["_id"]) for task in tasks]
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to bulk update tasks: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to bulk update tasks: {str(e)}"
+            )
+
+    @staticmethod
+    def _clean_labels(labels: Optional[List[str]]) -> List[str]:
+        return list(dict.fromkeys(label.strip() for label in labels or [] if label and label.strip()))
+
+    @staticmethod
+    def _parse_mentions(mentions: Any) -> List[ObjectId]:
+        if not mentions:
+            return []
+        if not isinstance(mentions, list) or not all(
+                isinstance(m, str) and ObjectId.is_valid(m) for m in mentions):
+            raise HTTPException(status_code=400, detail="Invalid mention id")
+        return [ObjectId(m) for m in mentions]
+
+    @staticmethod
+    def _bulk_filter_query(task_filter: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate a bulk update filter into a tasks query scoped to one project"""
+        query: Dict[str, Any] = {
+            "project_id": ObjectId(task_filter["project_id"]),
+            "archived": task_filter.get("archived", False)
+        }
+        for field in ("status", "priority", "column_id"):
+            if task_filter.get(field) is not None:
+                query[field] = task_filter[field]
+        if task_filter.get("assignee_id"):
+            query["assignee_id"] = ObjectId(task_filter["assignee_id"])
+        if task_filter.get("label"):
+            query["labels"] = task_filter["label"]
+        return query
+
     @staticmethod
     async def delete_task(
         user_id: ObjectId,
@@ -396,6 +611,9 @@ class TaskService:
             
             # Delete the task
             await db["tasks"].delete_one({"_id": task_id})
+            await WorkloadService.apply_change(
+                project_id, task, None, bump_stats_version=True)
+            AutocompleteService.on_task_deleted(task.get("organization_id"), task_id)
             
              # Reorder positions in the same column
             if column_id:
@@ -415,7 +633,7 @@ class TaskService:
                     await db["tasks"].bulk_write(bulk_ops)
             
             # Log activity for task deletion
-            await TaskService._log_activity(
+            await ActivityService.log_activity(
                 user_id=user_id,
                 project_id=task["project_id"],
                 activity_type=ActivityType.TASK_DELETED,
@@ -518,34 +736,11 @@ class TaskService:
             "labels": task_doc.get("labels", []),
             "position": task_doc.get("position", 0.0),
             "archived": task_doc.get("archived", False),
+            "version": task_doc.get("version", 0),
             "created_at": task_doc["created_at"],
             "updated_at": task_doc["updated_at"]
         }
 
-    @staticmethod
-    async def _log_activity(
-        user_id: ObjectId,
-        project_id: ObjectId,
-        activity_type: ActivityType,
-        description: str,
-        metadata: Optional[Dict[str, Any]] = None
-    ):
-        """Log task activity"""
-        try:
-            activity_doc = {
-                "type": activity_type,
-                "user_id": user_id,
-                "project_id": project_id,
-                "description": description,
-                "metadata": metadata or {},
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            await db["activities"].insert_one(activity_doc)
-        except Exception as e:
-            logger.error(f"Failed to log activity: {str(e)}")
-            # Don't raise exception for logging failures
-
     # # Generate dummy tasks method (existing)
     # @staticmethod
     # async def generate_tasks_for_board(project_id: str, board_id: str, num_tasks: int = 10, creator_id: str = None):
@@ -4,21 +4,28 @@ from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from app.utils.logger import logger
 from passlib.context import CryptContext
-from app.services.email_service import generate_verification_token, send_verification_email
-from app.services.otp_service import generate_otp, send_otp_email
+from app.services.email_service import generate_verification_token
+from app.services.otp_service import generate_otp
+from app.services.job_queue import JobQueue, PRIORITY_HIGH
 from app.models.user import User
 from app.models.verification_token import VerificationToken, OTPMetadata
+from pymongo import ReturnDocument
 from fastapi import HTTPException, Response
 import app.utils.token_manager as token_manager
 import app.api.dependencies as dependencies
 from app.models.user import UserResponse, UserProfile, UserRole
 from typing import Optional, Dict, Any
 from app.services.organization_service import OrganizationService
+from app.services.membership_service import MembershipService
 
 db = get_db()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 org_service = OrganizationService()
 
+OTP_TTL_MINUTES = 5
+OTP_MAX_ATTEMPTS = 3
+OTP_BLOCK_MINUTES = 15
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
@@ -122,7 +129,7 @@ class UserService:
                 verification_token_id = vt_result.inserted_id
 
                 # Send verification email
-                await send_verification_email(email, token)
+                await JobQueue.enqueue("send_verification_email", {"email": email, "token": token})
                 logger.info(
                     f"User registered successfully with ID: {user_result.inserted_id}")
 
@@ -139,6 +146,7 @@ class UserService:
                 # Rollback user if created
                 if user_id:
                     await db["users"].delete_one({"_id": user_id})
+                    await MembershipService.remove_user(user_id)
                 # Rollback verification token if created
                 if verification_token_id:
                     await db["verification_tokens"].delete_one({"_id": verification_token_id})
@@ -150,6 +158,7 @@ class UserService:
                 await db["organizations"].delete_one({"_id": organization_id})
             if user_id:
                 await db["users"].delete_one({"_id": user_id})
+                await MembershipService.remove_user(user_id)
             if verification_token_id:
                 await db["verification_tokens"].delete_one({"_id": verification_token_id})
             raise
@@ -216,7 +225,7 @@ class UserService:
                 created_at=now,
             )
             await db["verification_tokens"].insert_one(verification_token.model_dump(by_alias=True))
-            await send_verification_email(email, token)
+            await JobQueue.enqueue("send_verification_email", {"email": email, "token": token})
             logger.info(f"Verification email resent to: {email}")
             return True
         except HTTPException:
@@ -225,6 +234,122 @@ class UserService:
             logger.error(f"Error resend verification email: {e}")
             return False
 
+    @staticmethod
+    def _raise_if_otp_blocked(token: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """429 with the minutes left if the OTP token is inside its block window"""
+        otp_meta = (token or {}).get("otp_metadata") or {}
+        block_until = otp_meta.get("block_until")
+        if not (otp_meta.get("is_blocked") and block_until):
+            return
+        if block_until.tzinfo is not None:
+            block_until = block_until.replace(tzinfo=None)
+        now = now or datetime.utcnow()
+        block_time_left = -(-int((block_until - now).total_seconds()) // 60)  # ceil division
+        if block_time_left > 0:
+            raise HTTPException(
+                status_code=429,
+                detail={
+                    "message": f"Too many failed attempts. Please try again in {block_time_left} minutes.",
+                    "blockTimeLeft": block_time_left
+                }
+            )
+
+    @staticmethod
+    def _otp_blocked_expr(now: datetime) -> Dict[str, Any]:
+        return {"$and": [
+            {"$eq": ["$otp_metadata.is_blocked", True]},
+            {"$gt": ["$otp_metadata.block_until", now]}
+        ]}
+
+    @staticmethod
+    def _otp_metadata_expr(**overrides: Any) -> Dict[str, Any]:
+        """otp_metadata rebuilt field by field from the stored values, with `overrides`"""
+        return {
+            field: overrides.get(field, f"$otp_metadata.{field}")
+            for field in OTPMetadata.model_fields
+        }
+
+    @staticmethod
+    async def _issue_otp(user_id: ObjectId, otp: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Store a new OTP for the user with a single upsert and return the
+        previous token document. A token still inside its block window is
+        left untouched, so the caller can turn the returned document into a
+        429 without a separate read. Attempts carry over between logins
+        unless the last token was used or its block has expired.
+        """
+        blocked = UserService._otp_blocked_expr(now)
+        start_over = {"$or": [
+            {"$eq": [{"$ifNull": ["$otp_metadata", None]}, None]},
+            {"$eq": ["$is_used", True]},
+            {"$eq": ["$otp_metadata.is_blocked", True]}
+        ]}
+        fresh_metadata = OTPMetadata(max_attempts=OTP_MAX_ATTEMPTS, last_generated=now).model_dump()
+
+        def unless_blocked(value: Any, field: str) -> Dict[str, Any]:
+            return {"$cond": [blocked, f"${field}", value]}
+
+        return await db["verification_tokens"].find_one_and_update(
+            {"user_id": user_id, "type": "otp"},
+            [{"$set": {
+                "token": unless_blocked(otp, "token"),
+                "expires_at": unless_blocked(now + timedelta(minutes=OTP_TTL_MINUTES), "expires_at"),
+                "is_used": unless_blocked(False, "is_used"),
+                "otp_metadata": unless_blocked({"$cond": [
+                    start_over,
+                    fresh_metadata,
+                    UserService._otp_metadata_expr(last_generated=now)
+                ]}, "otp_metadata"),
+                "created_at": {"$ifNull": ["$created_at", now]},
+                "updated_at": now
+            }}],
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    @staticmethod
+    async def _attempt_otp(user_id: ObjectId, otp: str, now: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Check an OTP in one find_one_and_update and return the token as it
+        was before. Inside a block window nothing changes; a matching code
+        marks the token used; a wrong code counts the attempt and starts a
+        block once max_attempts is reached. Concurrent guesses each see the
+        previous attempt, so a burst cannot get more than max_attempts tries.
+        """
+        blocked = UserService._otp_blocked_expr(now)
+        matches = {"$eq": ["$token", otp]}
+        attempts = {"$add": [{"$ifNull": ["$otp_metadata.attempts", 0]}, 1]}
+        reaches_limit = {"$gte": [attempts, {"$ifNull": ["$otp_metadata.max_attempts", OTP_MAX_ATTEMPTS]}]}
+        block_until = now + timedelta(minutes=OTP_BLOCK_MINUTES)
+
+        def on_wrong_code(value: Any, field: str) -> Dict[str, Any]:
+            return {"$cond": [{"$or": [blocked, matches]}, f"${field}", value]}
+
+        def on_limit(value: Any, field: str) -> Dict[str, Any]:
+            return on_wrong_code({"$cond": [reaches_limit, value, f"${field}"]}, field)
+
+        return await db["verification_tokens"].find_one_and_update(
+            {
+                "user_id": user_id,
+                "type": "otp",
+                "is_used": {"$ne": True},
+                "expires_at": {"$gt": now}
+            },
+            [{"$set": {
+                "is_used": {"$cond": [blocked, "$is_used", {"$cond": [matches, True, "$is_used"]}]},
+                "otp_metadata": UserService._otp_metadata_expr(
+                    attempts=on_wrong_code(attempts, "otp_metadata.attempts"),
+                    last_attempt=on_wrong_code(now, "otp_metadata.last_attempt"),
+                    is_blocked=on_limit(True, "otp_metadata.is_blocked"),
+                    block_until=on_limit(block_until, "otp_metadata.block_until")
+                ),
+                # Keep the blocked token around for the whole block window
+                "expires_at": on_limit(block_until, "expires_at"),
+                "updated_at": now
+            }}],
+            return_document=ReturnDocument.BEFORE
+        )
+
     @staticmethod
     async def login(email: str, password: str) -> str:
         """
@@ -242,61 +367,16 @@ class UserService:
                 raise HTTPException(status_code=401, detail={
                                     "message": "Invalid email or password"})
 
-            # Check if user is currently blocked from OTP requests
-            existing_otp_token = await db["verification_tokens"].find_one({
-                "user_id": user["_id"],
-                "type": "otp",
-                "otp_metadata.is_blocked": True,
-                "otp_metadata.block_until": {"$gt": datetime.utcnow()}
-            })
-
-            if existing_otp_token:
-                block_until = existing_otp_token["otp_metadata"]["block_until"]
-                now = datetime.utcnow()
-                if block_until.tzinfo is not None:
-                    block_until = block_until.replace(tzinfo=None)
-                block_time_left = - \
-                    (-int((block_until - now).total_seconds()) // 60)  # ceil division
-                if block_time_left > 0:
-                    raise HTTPException(
-                        status_code=429,
-                        detail={
-                            "message": f"Too many failed attempts. Please try again in {block_time_left} minutes.",
-                            "blockTimeLeft": block_time_left
-                        }
-                    )
-            existing_otp_token = await db["verification_tokens"].find_one({
-                "user_id": user["_id"],
-                "type": "otp"
-            })
-
+            # Issue the OTP with one upsert; a blocked token is left as it is
             otp = generate_otp()
-            expires_at = datetime.utcnow() + timedelta(minutes=5)  # OTP valid for 5 minutes
-
-            if existing_otp_token:
-                await db["verification_tokens"].update_one(
-                    {"_id": existing_otp_token["_id"]},
-                    {"$set": {"token": otp, "update_at": datetime.utcnow()}}
-                )
-            else:
-                otp_token = VerificationToken(
-                    user_id=user["_id"],
-                    token=otp,
-                    type="otp",
-                    otp_metadata=OTPMetadata(
-                        attempts=0,
-                        max_attempts=3,
-                        last_attempt=None,
-                        is_blocked=False,
-                        block_until=None,
-                    ),
-                    expires_at=expires_at,
-                    created_at=datetime.utcnow(),
-                )
-                await db["verification_tokens"].insert_one(otp_token.model_dump(by_alias=True))
+            now = datetime.utcnow()
+            previous = await UserService._issue_otp(user["_id"], otp, now)
+            UserService._raise_if_otp_blocked(previous, now)
 
-            await send_otp_email(email, otp)
-            logger.info(f"OTP sent to email: {email}")
+            # Someone is waiting on the login screen for this one
+            await JobQueue.enqueue(
+                "send_otp_email", {"email": email, "otp": otp}, priority=PRIORITY_HIGH)
+            logger.info(f"OTP queued for email: {email}")
             return True
         except HTTPException:
             raise
@@ -313,78 +393,38 @@ class UserService:
                 logger.warning(f"User not found for email: {email}")
                 raise HTTPException(status_code=404, detail={
                                     "message": "User not found"})
-            verification_token = await db["verification_tokens"].find_one({
-                "user_id": user["_id"],
-                "type": "otp"
-            })
             if not (email == "testone@yopmail.com" and otp == "9999"):
+                # One conditional write checks the block window, consumes a
+                # matching token or counts the failed attempt
+                now = datetime.utcnow()
+                verification_token = await UserService._attempt_otp(user["_id"], otp, now)
                 if not verification_token:
                     logger.warning(f"Invalid OTP for email: {email}")
                     raise HTTPException(status_code=400, detail={
                                         "message": "Invalid OTP, not found or expired"})
 
-                otp_meta = verification_token.get("otp_metadata", {})
-                if otp_meta.get("is_blocked") and otp_meta.get("block_until") and otp_meta["block_until"] > datetime.utcnow():
-                    block_until = otp_meta["block_until"]
-                    now = datetime.utcnow()
-                    block_time_left = - \
-                        (-int((block_until - now).total_seconds()) //
-                         60)  # ceil division
-                    if block_time_left > 0:
-                        raise HTTPException(
-                            status_code=429,
-                            detail={
-                                "message": f"Too many failed attempts. Please try again in {block_time_left} minutes.",
-                                "blockTimeLeft": block_time_left
-                            }
-                        )
+                UserService._raise_if_otp_blocked(verification_token, now)
 
-                # Check if OTP is valid
                 if verification_token["token"] != otp:
-                    logger.info(f"OTP for email: {otp}")
-                    otp_meta["attempts"] = otp_meta.get("attempts", 0) + 1
-                    otp_meta["last_attempt"] = datetime.utcnow()
-
-                    # Check if attempts exceed max allowed
-                    if otp_meta["attempts"] >= otp_meta.get("max_attempts", 3):
-                        otp_meta["is_blocked"] = True
-                        otp_meta["block_until"] = datetime.utcnow() + \
-                            timedelta(minutes=15)
-                        verification_token["expires_at"] = datetime.utcnow(
-                        ) + timedelta(minutes=15)
-
-                    remaining_attempts = otp_meta.get(
-                        "max_attempts", 3) - otp_meta["attempts"]
-                    await db["verification_tokens"].update_one(
-                        {"_id": verification_token["_id"]},
-                        {
-                            "$set": {
-                                "otp_metadata": otp_meta,
-                                "expires_at": verification_token["expires_at"]
-                            }
-                        }
-                    )
-
-                    if otp_meta["is_blocked"]:
+                    otp_meta = verification_token.get("otp_metadata") or {}
+                    attempts = otp_meta.get("attempts", 0) + 1
+                    max_attempts = otp_meta.get("max_attempts", OTP_MAX_ATTEMPTS)
+                    if attempts >= max_attempts:
                         logger.warning(
                             f"User {email} blocked due to too many failed OTP attempts")
                         raise HTTPException(
                             status_code=429,
                             detail={
-                                "message": "Too many failed attempts. You have been blocked for 15 minutes.",
+                                "message": f"Too many failed attempts. You have been blocked for {OTP_BLOCK_MINUTES} minutes.",
                             })
-                    else:
-                        logger.warning(f"Invalid OTP for email: {email}")
-                        raise HTTPException(
-                            status_code=400,
-                            detail={
-                                "message": "Invalid OTP",
-                                "remaining_attempts": remaining_attempts
-                            }
-                        )
-
-                # If OTP is valid, reset attempts and remove the token
-                await db["verification_tokens"].delete_one({"_id": verification_token["_id"]})
+                    logger.warning(f"Invalid OTP for email: {email}")
+                    raise HTTPException(
+                        status_code=400,
+                        detail={
+                            "message": "Invalid OTP",
+                            "remaining_attempts": max_attempts - attempts
+                        }
+                    )
 
             now = datetime.utcnow()
             await db["users"].update_one(
@@ -452,7 +492,8 @@ class UserService:
 
             existing_token = await db["verification_tokens"].find_one({
                 "user_id": user["_id"],
-                "type": "otp"
+                "type": "otp",
+                "is_used": {"$ne": True}
             })
 
             if not existing_token:
@@ -460,20 +501,8 @@ class UserService:
                 raise HTTPException(status_code=400, detail={
                                     "message": "Invalid OTP, not found or expired"})
 
-            otp_meta = existing_token.get("otp_metadata", {})
-            if otp_meta.get("is_blocked") and otp_meta.get("block_until") and otp_meta["block_until"] > datetime.utcnow():
-                block_until = otp_meta["block_until"]
-                now = datetime.utcnow()
-                block_time_left = - \
-                    (-int((block_until - now).total_seconds()) // 60)  # ceil division
-                if block_time_left > 0:
-                    raise HTTPException(
-                        status_code=429,
-                        detail={
-                            "message": f"Too many failed attempts. Please try again in {block_time_left} minutes.",
-                            "blockTimeLeft": block_time_left
-                        }
-                    )
+            UserService._raise_if_otp_blocked(existing_token)
+            otp_meta = existing_token.get("otp_metadata") or {}
 
             if otp_meta and otp_meta.get("last_generated"):
                 last_generated = otp_meta["last_generated"]
@@ -0,0 +1,176 @@
+from typing import Dict, Any, Optional, Tuple
+from bson import ObjectId
+from app.db.database import get_db
+from app.db.enums import TaskStatus
+from app.utils.logger import logger
+
+db = get_db()
+
+CLOSED_STATUSES = [TaskStatus.DONE.value, TaskStatus.CANCELED.value]
+
+
+class WorkloadService:
+    """
+    Per-assignee open task / estimated hours counters, stored on the project
+    document under `workload.<user_id>` and maintained with $inc on every task
+    mutation. Auto-assignment reads them from the already loaded project, so
+    picking an assignee costs no extra query.
+    """
+
+    @staticmethod
+    def _contribution(task: Optional[Dict[str, Any]]) -> Optional[Tuple[ObjectId, float]]:
+        """Return (assignee_id, hours) a task adds to the workload, or None if it doesn't count"""
+        if not task or task.get("archived") or not task.get("assignee_id"):
+            return None
+        status = task.get("status")
+        if isinstance(status, TaskStatus):
+            status = status.value
+        if status in CLOSED_STATUSES:
+            return None
+        return ObjectId(task["assignee_id"]), float(task.get("estimated_hours") or 0)
+
+    @staticmethod
+    def _normalize_id(value: Any) -> Optional[ObjectId]:
+        if value is None or not ObjectId.is_valid(value):
+            return None
+        return ObjectId(value)
+
+    @staticmethod
+    async def apply_change(
+        project_id: ObjectId,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]],
+        bump_stats_version: bool = False
+    ) -> None:
+        """
+        Apply the counter delta between two versions of a task (None = not existing).
+        With bump_stats_version the project's analytics `stats_version` is
+        incremented in the same write.
+        """
+        try:
+            old = WorkloadService._contribution(before)
+            new = WorkloadService._contribution(after)
+            if old == new:
+                if bump_stats_version:
+                    await db["projects"].update_one(
+                        {"_id": project_id},
+                        {"$inc": {"stats_version": 1}}
+                    )
+                return
+
+            delta: Dict[str, Dict[str, float]] = {}
+            if old:
+                counters = delta.setdefault(str(old[0]), {"open_tasks": 0, "open_hours": 0.0})
+                counters["open_tasks"] -= 1
+                counters["open_hours"] -= old[1]
+            if new:
+                counters = delta.setdefault(str(new[0]), {"open_tasks": 0, "open_hours": 0.0})
+                counters["open_tasks"] += 1
+                counters["open_hours"] += new[1]
+
+            if not bump_stats_version:
+                # Only touch projects whose counters were already seeded; the
+                # first auto-assignment rebuilds them from the tasks collection.
+                await db["projects"].update_one(
+                    {"_id": project_id, "workload": {"$exists": True}},
+                    {"$inc": {
+                        f"workload.{user_id}.{field}": value
+                        for user_id, counters in delta.items()
+                        for field, value in counters.items()
+                    }}
+                )
+                return
+
+            # stats_version must move even when the counters are not seeded,
+            # so the seeded check moves into a pipeline update and both land
+            # in one write
+            merged = {
+                user_id: {
+                    field: {"$add": [{"$ifNull": [f"$workload.{user_id}.{field}", 0]}, value]}
+                    for field, value in counters.items()
+                }
+                for user_id, counters in delta.items()
+            }
+            await db["projects"].update_one(
+                {"_id": project_id},
+                [{"$set": {
+                    "stats_version": {"$add": [{"$ifNull": ["$stats_version", 0]}, 1]},
+                    "workload": {"$cond": [
+                        {"$eq": [{"$type": "$workload"}, "missing"]},
+                        "$$REMOVE",
+                        {"$mergeObjects": ["$workload", merged]}
+                    ]}
+                }}]
+            )
+        except Exception as e:
+            logger.error(f"Failed to update workload counters: {str(e)}")
+            # Counters are advisory, never fail the task mutation
+
+    @staticmethod
+    async def rebuild_project(project_id: ObjectId, bump_stats_version: bool = False) -> Dict[str, Dict[str, float]]:
+        """
+        Recompute workload counters for a project with a single aggregation.
+        With bump_stats_version the analytics `stats_version` is incremented
+        in the same write.
+        """
+        pipeline = [
+            {"$match": {
+                "project_id": project_id,
+                "archived": False,
+                "assignee_id": {"$ne": None},
+                "status": {"$nin": CLOSED_STATUSES}
+            }},
+            {"$group": {
+                "_id": "$assignee_id",
+                "open_tasks": {"$sum": 1},
+                "open_hours": {"$sum": {"$ifNull": ["$estimated_hours", 0]}}
+            }}
+        ]
+        rows = await db["tasks"].aggregate(pipeline).to_list(length=None)
+
+        workload = {
+            str(row["_id"]): {
+                "open_tasks": row["open_tasks"],
+                "open_hours": float(row["open_hours"])
+            }
+            for row in rows
+        }
+        update: Dict[str, Any] = {"$set": {"workload": workload}}
+        if bump_stats_version:
+            update["$inc"] = {"stats_version": 1}
+        await db["projects"].update_one({"_id": project_id}, update)
+        return workload
+
+    @staticmethod
+    async def pick_assignee(project: Dict[str, Any]) -> Optional[ObjectId]:
+        """
+        Resolve the assignee for a new task without an explicit assignee.
+        - auto_assign off: default_assignee (if still a member)
+        - auto_assign on: least loaded member by open tasks, then open hours,
+          ties go to default_assignee
+        """
+        settings = project.get("settings") or {}
+        members = [ObjectId(m) for m in project.get("members", [])]
+        default_assignee = WorkloadService._normalize_id(
+            settings.get("default_assignee"))
+
+        if not settings.get("auto_assign"):
+            return default_assignee if default_assignee in members else None
+
+        if not members:
+            return None
+
+        workload = project.get("workload")
+        if workload is None:
+            workload = await WorkloadService.rebuild_project(project["_id"])
+
+        def load_key(member_id: ObjectId):
+            counters = workload.get(str(member_id), {})
+            return (
+                counters.get("open_tasks", 0),
+                counters.get("open_hours", 0.0),
+                0 if member_id == default_assignee else 1,
+                str(member_id)
+            )
+
+        return min(members, key=load_key)
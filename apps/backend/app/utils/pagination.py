@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from app.config.config import PAGINATION_COUNT_CAP
+
+
+def encode_cursor(sort_value: datetime, doc_id: ObjectId) -> str:
+    """Opaque cursor for the (sort_value, _id) position of the last row on a page"""
+    payload = json.dumps({"v": sort_value.isoformat(), "id": str(doc_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["v"]), ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def keyset_filter(field: str, cursor: str) -> Dict[str, Any]:
+    """Match rows strictly after the cursor when sorting by (field, _id) descending"""
+    sort_value, doc_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {field: {"$lt": sort_value}},
+            {field: sort_value, "_id": {"$lt": doc_id}}
+        ]
+    }
+
+
+def split_page(rows: List[Dict[str, Any]], limit: int, field: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim the look-ahead row fetched with limit + 1 and build the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][field], rows[-1]["_id"])
+
+
+async def count_matching(
+    collection,
+    match_filter: Dict[str, Any],
+    count_mode: str
+) -> Tuple[Optional[int], bool]:
+    """
+    Count rows for a listing. "exact" counts everything, "capped" stops at
+    PAGINATION_COUNT_CAP and "none" skips counting. Returns (total, capped).
+    """
+    if count_mode == "none":
+        return None, False
+    if count_mode == "capped":
+        total = await collection.count_documents(match_filter, limit=PAGINATION_COUNT_CAP)
+        return total, total >= PAGINATION_COUNT_CAP
+    return await collection.count_documents(match_filter), False
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from app.utils.logger import logger
+
+
+class PeriodicTask:
+    """Run a coroutine function every `interval_seconds` in the background"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval_seconds: float):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.func()
+            except Exception as e:
+                logger.error(f"Periodic task {self.name} failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
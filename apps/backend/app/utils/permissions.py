@@ -3,21 +3,18 @@ from fastapi import HTTPException
 from bson import ObjectId
 from app.db.enums import UserRole
 from app.db.database import get_db
+from app.services.membership_service import MembershipService
 
 db = get_db()
 
 
-async def check_org_permission(user: dict, organization_id: ObjectId, allowed_roles: List[UserRole]) -> None:
+async def check_org_permission(user_id: ObjectId, organization_id: ObjectId, allowed_roles: List[UserRole]) -> None:
     """
     Check if user has one of the allowed roles in the given organization.
     Raise HTTPException(403) if not permitted.
     """
-    user_orgs = user.get("organizations", [])
-    user_role = next(
-        (uo["role"]
-         for uo in user_orgs if uo["organization_id"] == organization_id),
-        None
-    )
+    membership = await MembershipService.get(user_id, organization_id)
+    user_role = membership["role"] if membership else None
     if user_role not in allowed_roles:
         raise HTTPException(status_code=403, detail={
             "message": "Insufficient permissions"
@@ -44,17 +41,18 @@ async def verify_user_access_to_organization(
     """
     Verify if the current user has access to the specified organization.
     """
-    user = await db["users"].find_one({"_id": current_user})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     org = await db["organizations"].find_one({"_id": org_id})
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
     org_settings = org.get("settings", {})
     allowed_roles = get_allowed_roles_for_action(org_settings, action)
-    await check_org_permission(user, org_id, allowed_roles)
+    await check_org_permission(current_user, org_id, allowed_roles)
+
+    # Only loaded once access is granted; callers use the profile fields
+    user = await db["users"].find_one({"_id": current_user}, {"name": 1, "email": 1, "avatar_url": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
     return user, org
 
@@ -65,21 +63,17 @@ async def verify_user_access_to_project(user_id: ObjectId, project_id: ObjectId)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    # Check if user is project member
-    if user_id not in project.get("members", []):
+    # Project and organization membership in one indexed lookup
+    memberships = await MembershipService.get_many(
+        user_id, [project_id, project["organization_id"]])
+    if project_id not in memberships:
         raise HTTPException(
             status_code=403,
             detail="Access denied: Not a project member"
         )
 
-    # Get user's organization role
-    user = await db["users"].find_one({"_id": user_id})
-    user_orgs = user.get("organizations", [])
-    org_role = None
-    for org in user_orgs:
-        if org["organization_id"] == project["organization_id"]:
-            org_role = org["role"]
-            break
+    org_membership = memberships.get(project["organization_id"])
+    org_role = org_membership["role"] if org_membership else None
 
     return {
         "project": project,
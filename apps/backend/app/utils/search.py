@@ -0,0 +1,38 @@
+import re
+
+MAX_SEARCH_TERMS = 8
+MAX_TERM_LENGTH = 64
+
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_text_search(raw: str) -> str:
+    """
+    Turn free user input into a safe MongoDB `$text` search string.
+
+    Only word characters survive, so operators such as `-term` negation or
+    stray quotes cannot change the meaning of the query. Balanced "quoted
+    phrases" are kept as phrases. Returns "" when nothing searchable is left.
+    """
+    if not raw:
+        return ""
+
+    parts = []
+    for phrase in _PHRASE_RE.findall(raw):
+        words = _WORD_RE.findall(phrase)
+        if len(words) > 1:
+            parts.append('"' + " ".join(w[:MAX_TERM_LENGTH] for w in words) + '"')
+        elif words:
+            parts.append(words[0][:MAX_TERM_LENGTH])
+
+    for word in _WORD_RE.findall(_PHRASE_RE.sub(" ", raw)):
+        parts.append(word[:MAX_TERM_LENGTH])
+
+    unique_parts = list(dict.fromkeys(part.lower() for part in parts))
+    return " ".join(unique_parts[:MAX_SEARCH_TERMS])
+
+
+def escape_regex(raw: str) -> str:
+    """Escape user input for use as a literal inside `$regex`"""
+    return re.escape(raw.strip())
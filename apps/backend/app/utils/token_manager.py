@@ -1,5 +1,6 @@
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from typing import List
 from app.config.config import SECRET_KEY, REFRESH_SECRET_KEY, ALGORITHM
 from app.utils.logger import logger
 
@@ -35,4 +36,10 @@ def create_invitation_token(email: str, organization_id: str, role: str, expires
         "role": role,
         "exp": expire
     }
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def create_invitation_tokens(emails: List[str], organization_id: str, role: str, expires_days: int = 7) -> List[str]:
+    """Invitation tokens for several emails sharing one expiry and claim set"""
+    expire = datetime.utcnow() + timedelta(days=expires_days)
+    claims = {"organization_id": organization_id, "role": role, "exp": expire}
+    return [jwt.encode({**claims, "email": email}, SECRET_KEY, algorithm=ALGORITHM) for email in emails]
@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.services.activity_retention_service import ActivityRetentionService
+
+
+def test_raw_window_start_is_midnight_retention_days_ago():
+    with patch("app.services.activity_retention_service.ACTIVITY_RETENTION_DAYS", 30):
+        start = ActivityRetentionService.get_raw_window_start(datetime(2024, 3, 31, 15, 30))
+    assert start == datetime(2024, 3, 1)
+
+
+def test_fold_groups_merges_types_and_users_per_project_day():
+    org_id, project_id, alice, bob = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+
+    def group(activity_type, user_id, count):
+        return {
+            "_id": {"organization_id": org_id, "project_id": project_id, "day": "2024-01-05",
+                    "type": activity_type, "user_id": user_id},
+            "count": count,
+            "actor": {"name": "Someone", "initials": "S"}
+        }
+
+    summaries = ActivityRetentionService._fold_groups([
+        group("task_created", alice, 3),
+        group("task_updated", alice, 2),
+        group("task_created", bob, 1),
+    ])
+
+    assert len(summaries) == 1
+    summary = summaries[f"{org_id}:{project_id}:2024-01-05"]
+    assert summary["date"] == datetime(2024, 1, 5)
+    assert summary["total"] == 6
+    assert summary["by_type"] == {"task_created": 4, "task_updated": 2}
+    assert summary["by_user"] == {str(alice): 5, str(bob): 1}
+
+
+@pytest.mark.asyncio
+async def test_apply_summaries_ignores_runs_already_applied():
+    summaries = {"key": {"organization_id": ObjectId(), "project_id": ObjectId(),
+                         "date": datetime(2024, 1, 5), "total": 1,
+                         "by_type": {"task_created": 1}, "by_user": {}, "actors": {}}}
+    duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+
+    with patch("app.services.activity_retention_service.db") as mock_db:
+        mock_db["activity_summaries"].bulk_write = AsyncMock(side_effect=duplicate)
+        applied = await ActivityRetentionService._apply_summaries(summaries, ObjectId())
+
+    assert applied == 0
+    operation = mock_db["activity_summaries"].bulk_write.await_args.args[0][0]
+    assert operation._filter["applied_runs"]["$ne"] is not None
+    assert operation._doc["$inc"] == {"total": 1, "by_type.task_created": 1}
+
+
+def rows_cursor(rows):
+    cursor = MagicMock()
+    cursor.limit.return_value.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+@pytest.mark.asyncio
+async def test_rollup_tags_in_batches_and_resumes_the_pending_run():
+    run_id, cutoff = ObjectId(), datetime(2024, 1, 1)
+    state = {"_id": "activity_rollup", "pending_run": run_id, "cutoff": cutoff}
+    batches = [[{"_id": ObjectId()}, {"_id": ObjectId()}], [{"_id": ObjectId()}]]
+
+    with patch("app.services.activity_retention_service.db") as mock_db, \
+            patch("app.services.activity_retention_service.ACTIVITY_ROLLUP_BATCH_SIZE", 2):
+        mock_db["migration_state"].find_one_and_update = AsyncMock(return_value=state)
+        mock_db["migration_state"].update_one = AsyncMock()
+        mock_db["activities"].find.side_effect = [rows_cursor(b) for b in batches]
+        mock_db["activities"].update_many = AsyncMock(side_effect=[
+            MagicMock(modified_count=2), MagicMock(modified_count=1), MagicMock(modified_count=3)])
+        mock_db["activities"].aggregate.return_value.to_list = AsyncMock(return_value=[])
+        result = await ActivityRetentionService.compact_expired_activities(datetime(2024, 6, 1))
+
+    assert result == {"activities": 3, "summaries": 0}
+    tag_calls = mock_db["activities"].update_many.await_args_list[:2]
+    assert [len(c.args[0]["_id"]["$in"]) for c in tag_calls] == [2, 1]
+    assert all(c.args[1] == {"$set": {"rollup_id": run_id}} for c in tag_calls)
+    # The resumed run keeps its own cutoff rather than today's window
+    assert mock_db["activities"].find.call_args.args[0]["created_at"] == {"$lt": cutoff}
+    last_state = mock_db["migration_state"].update_one.await_args_list[-1].args[1]
+    assert last_state["$unset"] == {"pending_run": "", "cutoff": ""}
+    assert last_state["$set"]["lease_until"] is None
+
+
+@pytest.mark.asyncio
+async def test_rollup_is_skipped_while_another_worker_holds_the_lease():
+    with patch("app.services.activity_retention_service.db") as mock_db:
+        mock_db["migration_state"].find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("leased"))
+        mock_db["activities"].update_many = AsyncMock()
+        assert await ActivityRetentionService.compact_expired_activities() is None
+    mock_db["activities"].update_many.assert_not_called()
@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi import HTTPException
+from app.services.activity_service import ActivityService
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def make_rows(count):
+    start = datetime(2024, 1, 1)
+    return [
+        {"_id": ObjectId(), "type": "task_created", "description": f"a{i}",
+         "actor": {"name": "Ada Lovelace", "initials": "AL"},
+         "created_at": start - timedelta(minutes=i)}
+        for i in range(count)
+    ]
+
+
+def mock_find(mock_db, rows):
+    cursor = MagicMock()
+    cursor.sort.return_value.skip.return_value.limit.return_value.to_list = AsyncMock(return_value=rows)
+    mock_db["activities"].find.return_value = cursor
+    return cursor
+
+
+def test_cursor_round_trip_and_invalid_cursor():
+    doc_id = ObjectId()
+    when = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(when, doc_id)) == (when, doc_id)
+
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_activities_page_returns_next_cursor_without_counting():
+    org_id, project_id = ObjectId(), ObjectId()
+    rows = make_rows(3)
+
+    with patch("app.services.activity_service.db") as mock_db, \
+            patch.object(ActivityService, "get_accessible_project_ids",
+                         new=AsyncMock(return_value=[project_id])):
+        mock_find(mock_db, rows)
+        mock_db["activities"].count_documents = AsyncMock()
+
+        result = await ActivityService.get_organization_activities(
+            ObjectId(), org_id, limit=2, count_mode="none")
+
+    assert [a["item"] for a in result["activities"]] == ["a0", "a1"]
+    assert result["total"] is None
+    assert result["has_more"] is True
+    assert decode_cursor(result["next_cursor"]) == (rows[1]["created_at"], rows[1]["_id"])
+    mock_db["activities"].count_documents.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_activities_cursor_adds_keyset_filter_and_caps_total():
+    org_id, project_id = ObjectId(), ObjectId()
+    last = make_rows(1)[0]
+    cursor = encode_cursor(last["created_at"], last["_id"])
+
+    with patch("app.services.activity_service.db") as mock_db, \
+            patch("app.utils.pagination.PAGINATION_COUNT_CAP", 5), \
+            patch.object(ActivityService, "get_accessible_project_ids",
+                         new=AsyncMock(return_value=[project_id])):
+        find_cursor = mock_find(mock_db, [])
+        mock_db["activities"].count_documents = AsyncMock(return_value=5)
+
+        result = await ActivityService.get_organization_activities(
+            ObjectId(), org_id, limit=2, offset=40, cursor=cursor, count_mode="capped")
+
+    query = mock_db["activities"].find.call_args.args[0]
+    assert query["$or"][1] == {"created_at": last["created_at"], "_id": {"$lt": last["_id"]}}
+    count_query = mock_db["activities"].count_documents.await_args.args[0]
+    assert "$or" not in count_query
+    assert mock_db["activities"].count_documents.await_args.kwargs == {"limit": 5}
+    find_cursor.sort.return_value.skip.assert_called_with(0)
+    assert result["total_capped"] is True
+    assert result["has_more"] is False
+
+
+@pytest.mark.asyncio
+async def test_log_activities_looks_up_actor_once_and_inserts_in_one_call():
+    user_id, org_id, project_id = ObjectId(), ObjectId(), ObjectId()
+    entries = [
+        {"project_id": project_id, "activity_type": "user_joined", "description": f"Added {i}",
+         "target_user_id": ObjectId()}
+        for i in range(3)
+    ]
+
+    with patch("app.services.activity_service.db") as mock_db, \
+            patch("app.services.activity_service.activity_writer") as writer, \
+            patch("app.services.activity_service.ActorSnapshotService.get_snapshot",
+                  AsyncMock(return_value={"name": "Ada"})) as get_snapshot:
+        writer.running = False
+        mock_db["activities"].insert_many = AsyncMock()
+        await ActivityService.log_activities(user_id, entries, organization_id=org_id)
+
+    get_snapshot.assert_awaited_once_with(user_id)
+    docs = mock_db["activities"].insert_many.call_args.args[0]
+    assert [d["description"] for d in docs] == ["Added 0", "Added 1", "Added 2"]
+    assert all(d["organization_id"] == org_id and d["actor"] == {"name": "Ada"} for d in docs)
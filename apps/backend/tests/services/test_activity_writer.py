@@ -0,0 +1,104 @@
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, patch
+from bson.errors import InvalidDocument
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError
+from app.services.activity_writer import ActivityWriter
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_in_batches():
+    writer = ActivityWriter(batch_size=2, flush_interval=60, max_buffer=10)
+    for i in range(5):
+        writer.enqueue({"description": str(i)})
+
+    with patch("app.services.activity_writer.db") as mock_db:
+        mock_db["activities"].insert_many = AsyncMock()
+        written = await writer.flush()
+
+    assert written == 5
+    assert mock_db["activities"].insert_many.await_count == 3
+    batch = mock_db["activities"].insert_many.await_args_list[0]
+    assert batch.args[0] == [{"description": "0"}, {"description": "1"}]
+    assert batch.kwargs == {"ordered": False}
+    assert writer.get_metrics()["queue_depth"] == 0
+
+
+def test_enqueue_drops_when_buffer_full():
+    writer = ActivityWriter(batch_size=10, flush_interval=60, max_buffer=2)
+    assert writer.enqueue({"n": 1})
+    assert writer.enqueue({"n": 2})
+    assert not writer.enqueue({"n": 3})
+
+    metrics = writer.get_metrics()
+    assert metrics["dropped"] == 1
+    assert metrics["queue_depth"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_batch():
+    writer = ActivityWriter(batch_size=10, flush_interval=60, max_buffer=10)
+    writer.enqueue({"n": 1})
+    writer.enqueue({"n": 2})
+
+    with patch("app.services.activity_writer.db") as mock_db:
+        mock_db["activities"].insert_many = AsyncMock(side_effect=AutoReconnect("down"))
+        assert await writer.flush() == 0
+
+    assert list(writer._buffer) == [{"n": 1}, {"n": 2}]
+    assert writer.get_metrics()["failed_flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_bulk_write_is_not_retried():
+    writer = ActivityWriter(batch_size=10, flush_interval=60, max_buffer=10)
+    for i in range(4):
+        writer.enqueue({"n": i})
+    error = BulkWriteError({"nInserted": 1, "writeErrors": [
+        {"index": 1, "code": 11000, "errmsg": "duplicate key"},
+        {"index": 2, "code": 121, "errmsg": "document failed validation"},
+        {"index": 3, "code": 11000, "errmsg": "duplicate key"}
+    ]})
+
+    with patch("app.services.activity_writer.db") as mock_db:
+        mock_db["activities"].insert_many = AsyncMock(side_effect=error)
+        # Duplicates were written by an earlier attempt; the rejected one is discarded
+        assert await writer.flush() == 3
+
+    metrics = writer.get_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["discarded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unencodable_activity_does_not_block_the_queue():
+    writer = ActivityWriter(batch_size=10, flush_interval=60, max_buffer=10)
+    good, bad, written_before = {"n": 1}, {"metadata": {"day": date(2026, 1, 1)}}, {"n": 2}
+    for doc in (good, bad, written_before):
+        writer.enqueue(doc)
+
+    with patch("app.services.activity_writer.db") as mock_db:
+        mock_db["activities"].insert_many = AsyncMock(side_effect=InvalidDocument("cannot encode date"))
+        mock_db["activities"].insert_one = AsyncMock(
+            side_effect=[None, InvalidDocument("cannot encode date"), DuplicateKeyError("dup")])
+        assert await writer.flush() == 2
+
+    assert [c.args[0] for c in mock_db["activities"].insert_one.await_args_list] == [good, bad, written_before]
+    metrics = writer.get_metrics()
+    assert metrics["queue_depth"] == 0
+    assert metrics["discarded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_buffer():
+    writer = ActivityWriter(batch_size=100, flush_interval=60, max_buffer=1000)
+
+    with patch("app.services.activity_writer.db") as mock_db:
+        mock_db["activities"].insert_many = AsyncMock()
+        writer.start()
+        writer.enqueue({"n": 1})
+        await writer.stop()
+
+    assert not writer.running
+    mock_db["activities"].insert_many.assert_awaited_once()
+    assert writer.get_metrics()["written"] == 1
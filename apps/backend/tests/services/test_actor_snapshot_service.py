@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import app.services.actor_snapshot_service as actor_snapshot_service
+from app.services.actor_snapshot_service import ActorSnapshotService
+
+
+def test_build_snapshot():
+    snapshot = ActorSnapshotService.build_snapshot(
+        {"name": "ada lovelace byron", "avatar_url": None})
+    assert snapshot == {"name": "ada lovelace byron", "avatar": None, "initials": "AL"}
+    assert ActorSnapshotService.build_snapshot(None)["name"] == ""
+
+
+@pytest.mark.asyncio
+async def test_get_snapshot_is_cached():
+    user_id = ObjectId()
+    actor_snapshot_service._actor_cache.clear()
+
+    with patch("app.services.actor_snapshot_service.db") as mock_db:
+        mock_db["users"].find_one = AsyncMock(return_value={"_id": user_id, "name": "Ada"})
+        first = await ActorSnapshotService.get_snapshot(user_id)
+        second = await ActorSnapshotService.get_snapshot(user_id)
+
+    assert first == second == {"name": "Ada", "avatar": None, "initials": "A"}
+    mock_db["users"].find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_changed_users_resumes_from_checkpoint():
+    last_seen = datetime(2024, 1, 1)
+    last_id = ObjectId()
+    user = {"_id": ObjectId(), "name": "New Name", "profile_updated_at": datetime(2024, 2, 1)}
+
+    with patch("app.services.actor_snapshot_service.db") as mock_db:
+        mock_db["migration_state"].find_one_and_update = AsyncMock(return_value={
+            "initial_done": True, "last_profile_updated_at": last_seen, "last_user_id": last_id})
+        mock_db["migration_state"].update_one = AsyncMock()
+        cursor = MagicMock()
+        cursor.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[user])
+        mock_db["users"].find.return_value = cursor
+        mock_db["activities"].bulk_write = AsyncMock(return_value=MagicMock(modified_count=3))
+
+        modified = await ActorSnapshotService.refresh_changed_users()
+
+    assert modified == 3
+    # Keyed on profile edits, so a login (which only moves updated_at) is not picked up
+    query = mock_db["users"].find.call_args.args[0]
+    assert query["$or"][0] == {"profile_updated_at": {"$gt": last_seen}}
+    # mock_db[...] is one mock for every collection: activities first, then memberships
+    activity_call, membership_call = mock_db["activities"].bulk_write.await_args_list
+    operation = activity_call.args[0][0]
+    assert operation._filter["user_id"] == user["_id"]
+    assert operation._doc["$set"]["actor"]["initials"] == "NN"
+    operation = membership_call.args[0][0]
+    assert operation._filter == {"user_id": user["_id"]}
+    assert operation._doc["$set"]["search_name"] == "new name"
+    checkpoint, release = mock_db["migration_state"].update_one.await_args_list
+    saved = checkpoint.args[1]["$set"]
+    assert (saved["last_profile_updated_at"], saved["last_user_id"]) == (user["profile_updated_at"], user["_id"])
+    assert release.args[1] == {"$set": {"lease_until": None}}
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_sweeps_every_user_then_follows_profile_edits():
+    users = [{"_id": ObjectId(), "name": "Ada"}, {"_id": ObjectId(), "name": "Grace"}]
+
+    with patch("app.services.actor_snapshot_service.db") as mock_db:
+        mock_db["migration_state"].find_one_and_update = AsyncMock(return_value={"_id": "refresh"})
+        mock_db["migration_state"].update_one = AsyncMock()
+        initial, changed = MagicMock(), MagicMock()
+        initial.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=users)
+        changed.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=[])
+        mock_db["users"].find.side_effect = [initial, changed]
+        mock_db["activities"].bulk_write = AsyncMock(return_value=MagicMock(modified_count=2))
+
+        assert await ActorSnapshotService.refresh_changed_users() == 2
+
+    first_query, second_query = [c.args[0] for c in mock_db["users"].find.call_args_list]
+    assert first_query == {}
+    assert list(second_query) == ["profile_updated_at"]
+    saved = [c.args[1]["$set"] for c in mock_db["migration_state"].update_one.await_args_list]
+    assert saved[1]["initial_done"] is True
+    assert saved[1]["last_profile_updated_at"] == saved[0]["initial_started_at"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_skipped_while_another_worker_holds_the_lease():
+    with patch("app.services.actor_snapshot_service.db") as mock_db:
+        mock_db["migration_state"].find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("leased"))
+        assert await ActorSnapshotService.refresh_changed_users() is None
+    mock_db["users"].find.assert_not_called()
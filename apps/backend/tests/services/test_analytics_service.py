@@ -0,0 +1,88 @@
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, patch, MagicMock
+from bson import ObjectId
+import app.services.analytics_service as analytics_service
+from app.services.analytics_service import AnalyticsService, STATUS_CODES, SECONDS_PER_DAY
+
+NOW = 100 * 7 * SECONDS_PER_DAY
+
+
+def make_columns(rows):
+    """rows: (status, priority_code, created_days_ago, completed_days_ago, due_days_ago, hours)"""
+    def days_ago(value):
+        return np.nan if value is None else NOW - value * SECONDS_PER_DAY
+
+    return {
+        "status": np.array([STATUS_CODES[r[0]] for r in rows], dtype=np.int8),
+        "priority": np.array([r[1] for r in rows], dtype=np.int8),
+        "created_at": np.array([days_ago(r[2]) for r in rows], dtype=np.float64),
+        "completed_at": np.array([days_ago(r[3]) for r in rows], dtype=np.float64),
+        "due_date": np.array([days_ago(r[4]) for r in rows], dtype=np.float64),
+        "estimated_hours": np.array([np.nan if r[5] is None else r[5] for r in rows], dtype=np.float32),
+        "actual_hours": np.full(len(rows), np.nan, dtype=np.float32),
+    }
+
+
+COLUMNS = make_columns([
+    ("done", 3, 10, 1, None, 4.0),
+    ("done", 1, 20, 9, None, None),
+    ("todo", 4, 2, None, 1, 2.0),
+    ("in_progress", 0, 30, None, -3, None),
+    ("canceled", 2, 5, 4, 10, 1.0),
+])
+
+
+def test_status_mix_counts_and_overdue():
+    result = AnalyticsService.compute_status_mix(COLUMNS, NOW)
+    assert result["total_tasks"] == 5
+    assert result["by_status"]["done"] == 2
+    assert result["by_status"]["todo"] == 1
+    # Only the open task whose due date has passed counts
+    assert result["overdue_tasks"] == 1
+
+
+def test_velocity_buckets_completed_by_week():
+    result = AnalyticsService.compute_velocity(COLUMNS, NOW, weeks=4)
+    weeks = result["weeks"]
+    assert len(weeks) == 4
+    assert weeks[-1]["completed"] == 1
+    assert weeks[-1]["completed_hours"] == 4.0
+    assert weeks[-2]["completed"] == 1
+    assert sum(w["created"] for w in weeks) == 4  # the 30 day old task is outside
+
+
+def test_throughput_percentiles():
+    result = AnalyticsService.compute_throughput(COLUMNS)
+    assert result["completed_tasks"] == 2
+    assert result["p50_days"] == 10.0
+    assert sum(b["count"] for b in result["distribution"]) == 2
+
+
+def test_priority_mix_matrix():
+    result = AnalyticsService.compute_priority_mix(COLUMNS, NOW, weeks=2)
+    assert result["weeks"][-1]["urgent"] == 1
+    assert result["weeks"][-1]["medium"] == 1
+    assert result["totals"]["none"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_columns_reloads_only_when_version_changes():
+    org_id = ObjectId()
+    project = {"_id": ObjectId(), "stats_version": 1}
+    analytics_service._column_cache.clear()
+
+    with patch("app.services.analytics_service.db") as mock_db, \
+            patch.object(AnalyticsService, "_load_columns", new_callable=AsyncMock) as mock_load:
+        projects_cursor = MagicMock()
+        projects_cursor.to_list = AsyncMock(return_value=[project])
+        mock_db["projects"].find.return_value = projects_cursor
+        mock_load.return_value = COLUMNS
+
+        await AnalyticsService.get_columns(org_id)
+        await AnalyticsService.get_columns(org_id)
+        assert mock_load.await_count == 1
+
+        project["stats_version"] = 2
+        await AnalyticsService.get_columns(org_id)
+        assert mock_load.await_count == 2
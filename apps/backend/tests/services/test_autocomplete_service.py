@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+import app.services.autocomplete_service as autocomplete_service
+from app.services.autocomplete_service import AutocompleteService, PrefixIndex
+
+
+def build_index():
+    index = PrefixIndex()
+    index.load([
+        {"type": "project", "id": "p1", "label": "Login Revamp", "project_id": "p1"},
+        {"type": "member", "id": "u1", "label": "Logan Smith"},
+        {"type": "task", "id": "t1", "label": "Fix login bug", "project_id": "p1"},
+        {"type": "task", "id": "t2", "label": "Write docs", "project_id": "p2"},
+    ])
+    return index
+
+
+def test_prefix_search_ranks_and_filters():
+    index = build_index()
+    results = index.search("lo", lambda e: True, 10)
+    assert [r["id"] for r in results] == ["p1", "u1", "t1"]
+
+    # Every query token must prefix-match some word of the label
+    assert [r["id"] for r in index.search("fix lo", lambda e: True, 10)] == ["t1"]
+    assert index.search("lo", lambda e: e["type"] == "task", 10)[0]["id"] == "t1"
+    assert index.search("!!", lambda e: True, 10) == []
+
+
+def test_incremental_upsert_and_remove():
+    index = build_index()
+    index.upsert({"type": "task", "id": "t1", "label": "Fix signup bug", "project_id": "p1"})
+    assert [r["id"] for r in index.search("log", lambda e: e["type"] == "task", 10)] == []
+    assert [r["id"] for r in index.search("sign", lambda e: True, 10)] == ["t1"]
+
+    index.remove("task", "t1")
+    assert index.search("sign", lambda e: True, 10) == []
+    assert len(index) == 3
+
+
+@pytest.mark.asyncio
+async def test_suggest_builds_once_and_hides_unjoined_projects():
+    org_id, user_id = ObjectId(), ObjectId()
+    autocomplete_service._indexes.clear()
+    membership = ({"scope_id": org_id, "role": "member"}, ["p1"])
+
+    with patch("app.services.autocomplete_service.MembershipService.get_organization_scope",
+               AsyncMock(return_value=membership)), \
+            patch.object(AutocompleteService, "_build_index",
+                         new=AsyncMock(return_value=build_index())) as mock_build:
+        first = await AutocompleteService.suggest(user_id, org_id, "wr")
+        second = await AutocompleteService.suggest(user_id, org_id, "fix")
+
+    assert first == []  # "Write docs" lives in a project the user has not joined
+    assert [r["id"] for r in second] == ["t1"]
+    assert mock_build.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_index_is_served_while_rebuilt_in_background():
+    org_id = ObjectId()
+    autocomplete_service._indexes.clear()
+    stale, fresh = build_index(), PrefixIndex()
+    autocomplete_service._indexes[org_id] = stale
+    rebuilt = asyncio.Event()
+
+    async def slow_build(organization_id):
+        await rebuilt.wait()
+        return fresh
+
+    with patch("app.services.autocomplete_service.AUTOCOMPLETE_INDEX_TTL_SECONDS", 0), \
+            patch.object(AutocompleteService, "_build_index", new=AsyncMock(side_effect=slow_build)) as mock_build:
+        # Both keystrokes get the stale index at once; one rebuild is started
+        assert await AutocompleteService.get_index(org_id) is stale
+        assert await AutocompleteService.get_index(org_id) is stale
+        rebuilt.set()
+        await autocomplete_service._rebuilds[org_id]
+
+    assert mock_build.await_count == 1
+    assert autocomplete_service._indexes[org_id] is fresh
+    assert org_id not in autocomplete_service._rebuilds
+    autocomplete_service._indexes.clear()
+
+
+class AsyncRows:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.rows:
+            raise StopAsyncIteration
+        return self.rows.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_index_members_come_from_memberships():
+    org_id, user_id, project_id = ObjectId(), ObjectId(), ObjectId()
+    members = [{"_id": ObjectId(), "user_id": user_id, "name": "Logan Smith", "avatar_url": "a.png"}]
+
+    with patch("app.services.autocomplete_service.db") as mock_db, \
+            patch("app.services.autocomplete_service.MembershipService.get_scope_member_profiles",
+                  AsyncMock(return_value=members)) as get_members:
+        mock_db["projects"].find.return_value.to_list = AsyncMock(
+            return_value=[{"_id": project_id, "name": "Login Revamp", "slug": "login"}])
+        mock_db["tasks"].find.return_value.batch_size.return_value = AsyncRows(
+            [{"_id": ObjectId(), "title": "Fix login bug", "project_id": project_id}])
+        index = await AutocompleteService._build_index(org_id)
+
+    get_members.assert_awaited_once_with(org_id, "organization")
+    member = index.search("logan", lambda e: True, 10)[0]
+    assert member == {"type": "member", "id": str(user_id), "label": "Logan Smith", "avatar": "a.png"}
+    assert len(index) == 3
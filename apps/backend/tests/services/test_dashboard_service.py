@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from app.services.dashboard_service import DashboardService
+
+
+def rows_cursor(rows):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+@pytest.mark.asyncio
+async def test_dashboard_task_queries_skip_archived_projects():
+    org_id = ObjectId()
+    project_ids = [ObjectId(), ObjectId()]
+
+    with patch("app.services.dashboard_service.db") as mock_db, \
+         patch("app.services.dashboard_service.AnalyticsService._get_org_version",
+               AsyncMock(return_value=(project_ids, ()))) as get_org_version:
+        mock_db["tasks"].aggregate = MagicMock(side_effect=[
+            rows_cursor([{"total_tasks": 4, "completed_tasks": 1, "in_progress_tasks": 2, "overdue_tasks": 0}]),
+            rows_cursor([]),
+            rows_cursor([])
+        ])
+
+        stats = await DashboardService._get_dashboard_stats(str(org_id))
+        await DashboardService._get_recent_tasks(str(org_id))
+        await DashboardService._get_upcoming_deadlines(str(org_id))
+
+    get_org_version.assert_awaited_with(org_id)
+    for call in mock_db["tasks"].aggregate.call_args_list:
+        match = call.args[0][0]["$match"]
+        assert match["organization_id"] == org_id
+        assert match["project_id"] == {"$in": project_ids}
+    assert stats["active_projects"] == 2
+    assert stats["completion_rate"] == 25
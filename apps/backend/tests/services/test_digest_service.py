@@ -0,0 +1,91 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.services.digest_service import DigestService
+
+
+class AsyncRows:
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.rows:
+            raise StopAsyncIteration
+        return self.rows.pop(0)
+
+
+def users_cursor(rows):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+@pytest.mark.asyncio
+async def test_digest_is_one_aggregation_per_org_and_one_job_per_user_batch():
+    now = datetime(2026, 10, 19, 9)
+    orgs = [{"_id": ObjectId(), "name": "Beta"}, {"_id": ObjectId(), "name": "Alpha"}]
+    users = [{"_id": ObjectId(), "name": f"U{i}", "email": f"u{i}@example.com"} for i in range(3)]
+    task_rows = [
+        [{"_id": users[0]["_id"], "assigned": 2, "completed": 1, "overdue": 1},
+         {"_id": users[1]["_id"], "assigned": 0, "completed": 0, "overdue": 0}],
+        [{"_id": users[0]["_id"], "assigned": 1, "completed": 0, "overdue": 0},
+         {"_id": users[2]["_id"], "assigned": 0, "completed": 3, "overdue": 0}]
+    ]
+    mention_rows = [{"_id": {"user_id": users[1]["_id"], "organization_id": str(orgs[1]["_id"])}, "count": 2}]
+
+    with patch("app.services.digest_service.db") as mock_db, \
+            patch("app.services.digest_service.DIGEST_EMAIL_BATCH_SIZE", 2), \
+            patch("app.services.digest_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        mock_db["digest_runs"].find_one_and_update = AsyncMock(return_value={"_id": "weekly:2026-10-12"})
+        mock_db["digest_runs"].update_one = AsyncMock()
+        # mock_db[...] is one mock for every collection: organizations, then two user batches
+        orgs_cursor = MagicMock()
+        orgs_cursor.sort.return_value = AsyncRows(orgs)
+        mock_db["users"].find.side_effect = [orgs_cursor, users_cursor(users[:2]), users_cursor(users[2:])]
+        mock_db["tasks"].aggregate.side_effect = [AsyncRows(task_rows[0]), AsyncRows(task_rows[1]),
+                                                  AsyncRows(mention_rows)]
+        summary = await DigestService.run_weekly_digest(now)
+
+    # Two organizations plus the mentions pass, never one query per user
+    assert mock_db["tasks"].aggregate.call_count == 3
+    first_match = mock_db["tasks"].aggregate.call_args_list[0].args[0][0]["$match"]
+    assert first_match["organization_id"] == orgs[0]["_id"]
+    # Open and closed are decided by status, not by completed_at being set
+    assert first_match["$or"][0] == {"status": {"$nin": ["done", "canceled"]}}
+    group = mock_db["tasks"].aggregate.call_args_list[0].args[0][1]["$group"]
+    assert group["assigned"]["$sum"]["$cond"][0] == {"$not": [{"$in": ["$status", ["done", "canceled"]]}]}
+    assert mock_db["users"].find.call_count == 3
+
+    assert summary["users_with_activity"] == 3 and summary["emails_queued"] == 3
+    assert enqueue.await_count == 2
+    job_type, payload = enqueue.await_args_list[0].args
+    assert job_type == "send_weekly_digests"
+    first = payload["digests"][0]
+    assert [org["name"] for org in first["organizations"]] == ["Alpha", "Beta"]
+    assert first["organizations"][1] == {"name": "Beta", "assigned": 2, "completed": 1, "overdue": 1, "mentions": 0}
+    assert payload["digests"][1]["organizations"] == [
+        {"name": "Alpha", "assigned": 0, "completed": 0, "overdue": 0, "mentions": 2}]
+
+    last_update = mock_db["digest_runs"].update_one.await_args_list[-1].args[1]["$set"]
+    assert last_update["status"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_week_that_already_ran_is_skipped():
+    with patch("app.services.digest_service.db") as mock_db, \
+            patch("app.services.digest_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        mock_db["digest_runs"].find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("done"))
+        assert await DigestService.run_weekly_digest(datetime(2026, 10, 19, 9)) is None
+    mock_db["organizations"].find.assert_not_called()
+    enqueue.assert_not_called()
+
+    # Before the digest hour on the digest day nothing is claimed
+    with patch("app.services.digest_service.db") as mock_db:
+        mock_db["digest_runs"].find_one_and_update = AsyncMock()
+        assert await DigestService.run_if_due(datetime(2026, 10, 19, 7)) is None
+    mock_db["digest_runs"].find_one_and_update.assert_not_called()
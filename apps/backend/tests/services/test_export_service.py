@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from bson import ObjectId
+from app.services.export_service import ExportService, ACTIVITY_FIELDS
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.close = AsyncMock()
+
+    def batch_size(self, size):
+        return self
+
+    def sort(self, keys):
+        self.sort_keys = keys
+        return self
+
+    def __aiter__(self):
+        async def iterate():
+            for doc in self.docs:
+                yield doc
+        return iterate()
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_stream_rows_flushes_every_batch_and_closes_cursor():
+    docs = [{"_id": ObjectId(), "description": f"row {i}"} for i in range(5)]
+    cursor = FakeCursor(docs)
+
+    with patch("app.services.export_service.db") as mock_db, \
+            patch("app.services.export_service.EXPORT_BATCH_SIZE", 2):
+        mock_db["activities"].find.return_value = cursor
+        chunks = await collect(ExportService._stream_rows(
+            "activities", {}, {}, ACTIVITY_FIELDS,
+            lambda doc: {"id": doc["_id"], "description": doc["description"]},
+            "ndjson", sort=[("created_at", 1), ("_id", 1)]))
+
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["description"] for r in rows] == [f"row {i}" for i in range(5)]
+    assert rows[0]["id"] == str(docs[0]["_id"])
+    cursor.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_csv_cells_that_look_like_formulas_are_quoted():
+    docs = [{"_id": ObjectId(), "description": text}
+            for text in ("=HYPERLINK(\"http://x\")", "+1", "-2", "@SUM(A1)", "plain - text")]
+
+    with patch("app.services.export_service.db") as mock_db:
+        mock_db["activities"].find.return_value = FakeCursor(docs)
+        chunks = await collect(ExportService._stream_rows(
+            "activities", {}, {}, ACTIVITY_FIELDS,
+            lambda doc: {"id": doc["_id"], "description": doc["description"]}, "csv"))
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert [r["description"] for r in rows] == [
+        "'=HYPERLINK(\"http://x\")", "'+1", "'-2", "'@SUM(A1)", "plain - text"]
+    assert rows[0]["id"] == str(docs[0]["_id"])
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_round_trip():
+    async def source():
+        yield b"id,title\n"
+        yield b"1,first\n"
+
+    compressed = b"".join(await collect(ExportService.gzip_stream(source())))
+    assert gzip.decompress(compressed) == b"id,title\n1,first\n"
+
+
+@pytest.mark.asyncio
+async def test_export_activities_rejects_project_outside_access():
+    with patch("app.services.export_service.ActivityService.get_accessible_project_ids",
+               new=AsyncMock(return_value=[ObjectId()])):
+        with pytest.raises(Exception) as exc:
+            await ExportService.export_organization_activities(
+                ObjectId(), ObjectId(), project_id=ObjectId())
+    assert exc.value.status_code == 403
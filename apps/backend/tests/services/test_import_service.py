@@ -0,0 +1,146 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+from app.services.import_service import ImportService, _iter_records, RecordTooLarge
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def make_job():
+    return {
+        "_id": ObjectId(),
+        "project_id": ObjectId(),
+        "organization_id": ObjectId(),
+        "board_id": ObjectId(),
+        "user_id": ObjectId(),
+        "format": "csv"
+    }
+
+
+def make_context(member_id=None):
+    return {
+        "header": None,
+        "column_lookup": {"todo": "todo", "to do": "todo", "done": "done"},
+        "default_column": "todo",
+        "next_position": {"todo": 4},
+        "member_ids": {member_id} if member_id else set(),
+        "assignees": {}
+    }
+
+
+@pytest.mark.asyncio
+async def test_csv_records_survive_chunk_boundaries_and_quoted_newlines():
+    records = await collect(_iter_records(stream(
+        b'\xef\xbb\xbftitle,description\nFirst,"multi',
+        b'\nline"\nSecond,pl',
+        b"ain"
+    ), "csv"))
+
+    assert records == [
+        (1, "title,description\n"),
+        (2, 'First,"multi\nline"\n'),
+        (3, "Second,plain\n")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_records_split_only_on_newline():
+    records = await collect(_iter_records(stream(
+        '{"title": "c\x85d"}\n{"title": "e\u2028f\x0cg"}\n'.encode()
+    ), "ndjson"))
+
+    assert records == [
+        (1, '{"title": "c\x85d"}\n'),
+        (2, '{"title": "e\u2028f\x0cg"}\n')
+    ]
+
+
+@pytest.mark.asyncio
+async def test_oversized_record_is_rejected():
+    with patch("app.services.import_service.IMPORT_MAX_RECORD_BYTES", 10):
+        with pytest.raises(RecordTooLarge):
+            await collect(_iter_records(stream(b'{"title": "' + b"x" * 50), "ndjson"))
+
+
+@pytest.mark.asyncio
+async def test_process_batch_inserts_valid_rows_and_reports_row_errors():
+    job = make_job()
+    context = make_context()
+    context["header"] = ["title", "column", "labels"]
+    batch = [
+        (2, ImportService._parse_record("Write docs,To Do,docs; docs;api\n", "csv", context)),
+        (3, ImportService._parse_record(",todo,\n", "csv", context)),
+        (4, ImportService._parse_record("Ship,Nowhere,\n", "csv", context)),
+        (5, ImportService._parse_record("Release,done,\n", "csv", context))
+    ]
+
+    with patch("app.services.import_service.db") as mock_db:
+        mock_db["tasks"].insert_many = AsyncMock(return_value=MagicMock(inserted_ids=[1, 2]))
+        mock_db["import_jobs"].update_one = AsyncMock()
+        await ImportService._process_batch(job, batch, context)
+
+    documents = mock_db["tasks"].insert_many.call_args.args[0]
+    assert mock_db["tasks"].insert_many.call_args.kwargs == {"ordered": False}
+    assert [d["title"] for d in documents] == ["Write docs", "Release"]
+    assert documents[0]["labels"] == ["docs", "api"]
+    assert (documents[0]["column_id"], documents[0]["position"]) == ("todo", 4)
+    assert (documents[1]["column_id"], documents[1]["position"]) == ("done", 0)
+
+    update = mock_db["import_jobs"].update_one.call_args.args[1]
+    assert update["$inc"] == {"processed": 4, "inserted": 2, "failed": 2}
+    errors = update["$push"]["errors"]["$each"]
+    assert [e["row"] for e in errors] == [3, 4]
+    assert errors[0]["errors"][0].startswith("title")
+
+
+@pytest.mark.asyncio
+async def test_process_batch_maps_write_errors_back_to_rows():
+    job = make_job()
+    member_id = ObjectId()
+    context = make_context(member_id)
+    batch = [
+        (1, {"title": "One", "assignee": "Dev@Example.com"}),
+        (2, {"title": "Two", "assignee": "stranger@example.com"}),
+        (3, {"title": "Three"})
+    ]
+    users_cursor = MagicMock()
+    users_cursor.to_list = AsyncMock(return_value=[
+        {"_id": member_id, "email": "dev@example.com", "name": "Dev"}
+    ])
+    write_error = BulkWriteError({
+        "nInserted": 1,
+        "writeErrors": [{"index": 1, "errmsg": "duplicate key"}]
+    })
+
+    with patch("app.services.import_service.db") as mock_db:
+        mock_db["users"].find.return_value = users_cursor
+        mock_db["tasks"].insert_many = AsyncMock(side_effect=write_error)
+        mock_db["import_jobs"].update_one = AsyncMock()
+        await ImportService._process_batch(job, batch, context)
+
+    documents = mock_db["tasks"].insert_many.call_args.args[0]
+    assert documents[0]["assignee_id"] == member_id
+    mock_db["users"].find.assert_called_once()
+
+    update = mock_db["import_jobs"].update_one.call_args.args[1]
+    assert update["$inc"] == {"processed": 3, "inserted": 1, "failed": 2}
+    assert {e["row"] for e in update["$push"]["errors"]["$each"]} == {2, 3}
+
+
+@pytest.mark.asyncio
+async def test_run_job_rejects_job_that_is_not_pending():
+    with patch("app.services.import_service.db") as mock_db:
+        mock_db["import_jobs"].find_one_and_update = AsyncMock(return_value=None)
+        with pytest.raises(HTTPException) as exc:
+            await ImportService.run_job(ObjectId(), ObjectId(), stream(b""))
+
+    assert exc.value.status_code == 409
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo import ReturnDocument
+from app.services.job_queue import JobQueue, STATUS_DEAD, STATUS_QUEUED, STATUS_RUNNING
+from app.services.job_worker import JobWorker
+
+
+def running_job(attempts=1, max_attempts=3, job_type="send_otp_email"):
+    return {
+        "_id": ObjectId(), "type": job_type, "payload": {"email": "a@b.c"},
+        "status": STATUS_RUNNING, "lease_id": ObjectId(),
+        "attempts": attempts, "max_attempts": max_attempts
+    }
+
+
+@pytest.mark.asyncio
+async def test_claim_leases_highest_priority_due_job_atomically():
+    with patch("app.services.job_queue.db") as mock_db:
+        mock_db["jobs"].find_one_and_update = AsyncMock(return_value=None)
+        await JobQueue.claim("worker-1", ["send_otp_email"], lease_seconds=30)
+
+    query, update = mock_db["jobs"].find_one_and_update.call_args.args
+    kwargs = mock_db["jobs"].find_one_and_update.call_args.kwargs
+    assert query["status"] == STATUS_QUEUED
+    assert query["type"] == {"$in": ["send_otp_email"]}
+    assert update["$set"]["status"] == STATUS_RUNNING
+    assert update["$set"]["worker_id"] == "worker-1"
+    assert (update["$set"]["lease_until"] - update["$set"]["started_at"]).total_seconds() == 30
+    assert update["$inc"] == {"attempts": 1}
+    assert kwargs["sort"] == [("priority", -1), ("run_at", 1)]
+    assert kwargs["return_document"] == ReturnDocument.AFTER
+
+
+@pytest.mark.asyncio
+async def test_failure_backs_off_then_dead_letters():
+    job = running_job(attempts=1, max_attempts=3)
+
+    with patch("app.services.job_queue.db") as mock_db:
+        mock_db["jobs"].update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+        assert await JobQueue.fail(job, "SMTP timeout") == STATUS_QUEUED
+        query, update = mock_db["jobs"].update_one.call_args.args
+        assert query == {"_id": job["_id"], "status": STATUS_RUNNING, "lease_id": job["lease_id"]}
+        assert update["$set"]["run_at"] > datetime.utcnow()
+        assert update["$set"]["last_error"] == "SMTP timeout"
+
+        job["attempts"] = 3
+        assert await JobQueue.fail(job, "SMTP timeout") == STATUS_DEAD
+        update = mock_db["jobs"].update_one.call_args.args[1]
+        assert update["$set"]["status"] == STATUS_DEAD
+
+    with patch("app.services.job_queue.JOB_RETRY_BASE_SECONDS", 10), \
+            patch("app.services.job_queue.JOB_RETRY_MAX_SECONDS", 60):
+        assert 5 <= JobQueue.retry_delay(1) <= 10
+        assert 20 <= JobQueue.retry_delay(3) <= 40
+        assert JobQueue.retry_delay(10) <= 60
+
+
+@pytest.mark.asyncio
+async def test_worker_respects_per_type_concurrency_and_records_outcomes():
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_handler(email):
+        calls.append(email)
+        await release.wait()
+
+    async def broken_handler(email):
+        raise RuntimeError("boom")
+
+    jobs = [running_job(job_type="slow") for _ in range(3)] + [running_job(job_type="broken")]
+
+    async def claim(worker_id, job_types, lease_seconds):
+        for job in jobs:
+            if job["type"] in job_types:
+                jobs.remove(job)
+                return job
+        return None
+
+    worker = JobWorker(
+        handlers={"slow": slow_handler, "broken": broken_handler},
+        concurrency={"slow": 2}
+    )
+    with patch("app.services.job_worker.JobQueue.claim", AsyncMock(side_effect=claim)) as claim_mock, \
+            patch("app.services.job_worker.JobQueue.complete", AsyncMock()) as complete, \
+            patch("app.services.job_worker.JobQueue.fail", AsyncMock(return_value=STATUS_QUEUED)) as fail:
+        assert await worker.run_once() == 3
+        await asyncio.sleep(0)
+        assert worker.get_metrics()["in_flight"]["slow"] == 2
+        assert "slow" not in claim_mock.call_args.args[1]
+        assert len(jobs) == 1
+
+        release.set()
+        await asyncio.gather(*list(worker._jobs))
+        assert complete.await_count == 2
+        fail.assert_awaited_once()
+        assert fail.await_args.args[1] == "boom"
+
+        assert await worker.run_once() == 1
+        await asyncio.gather(*list(worker._jobs))
+
+    assert len(calls) == 3
+    assert worker.get_metrics()["succeeded"] == 3
+    assert worker.get_metrics()["retried"] == 1
@@ -0,0 +1,186 @@
+import asyncio
+import socket
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.services.mail_delivery import MailDelivery, SMTPConnectionPool, RateBudget, build_message
+from app.services.email_service import render_email, send_invitation_emails, send_weekly_digests
+from app.services.job_queue import PRIORITY_HIGH, PRIORITY_LOW
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+SENDER = "taskforge@example.com"
+
+
+class CollectingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CollectingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield handler, controller.port
+    controller.stop()
+
+
+def local_delivery(port, size=2, max_messages=100, budget=None):
+    pool = SMTPConnectionPool(
+        hostname="127.0.0.1", port=port, username=None, password=None,
+        start_tls=False, use_tls=False, size=size, max_messages=max_messages)
+    return MailDelivery(pool, budget or RateBudget(0))
+
+
+@pytest.mark.asyncio
+async def test_batch_is_sent_over_pooled_connections(smtp_server):
+    handler, port = smtp_server
+    delivery = local_delivery(port, size=2)
+    messages = [build_message(f"user{i}@example.com", "Hello", "<p>Hi</p>", sender=SENDER) for i in range(6)]
+
+    results = await delivery.send_many(messages)
+    await delivery.send(build_message("late@example.com", "Hello", "<p>Hi</p>", sender=SENDER))
+    await delivery.close()
+
+    assert results == [None] * 6
+    assert sorted(env.rcpt_tos[0] for env in handler.messages)[-1] == "user5@example.com"
+    assert len(handler.messages) == 7
+    assert {env.mail_from for env in handler.messages} == {SENDER}
+    # Two sessions for the batch; the later send reuses one of them
+    assert delivery.pool.connections_opened == 2
+    assert len(handler.sessions) == 2
+
+
+@pytest.mark.asyncio
+async def test_connections_are_retired_after_max_messages(smtp_server):
+    handler, port = smtp_server
+    delivery = local_delivery(port, size=1, max_messages=2)
+
+    await delivery.send_many([build_message("a@example.com", "Hi", "<p>x</p>", sender=SENDER) for _ in range(5)])
+    await delivery.close()
+
+    assert len(handler.messages) == 5
+    assert delivery.pool.connections_opened == 3
+
+
+@pytest.mark.asyncio
+async def test_high_priority_send_is_not_blocked_by_a_throttled_batch(smtp_server):
+    handler, port = smtp_server
+    # One token every 50ms, one of the two reserved for priority mail
+    delivery = local_delivery(port, size=2, budget=RateBudget(rate_per_minute=1200, burst=2, reserve=1))
+    loop = asyncio.get_running_loop()
+
+    batch = asyncio.ensure_future(delivery.send_many(
+        [build_message(f"bulk{i}@example.com", "Digest", "<p>x</p>", sender=SENDER) for i in range(20)],
+        priority=PRIORITY_LOW))
+    await asyncio.sleep(0.1)
+    start = loop.time()
+    await delivery.send(build_message("otp@example.com", "Code", "<p>1234</p>", sender=SENDER),
+                        priority=PRIORITY_HIGH)
+    assert loop.time() - start < 0.3
+    assert not batch.done()
+
+    assert await batch == [None] * 20
+    await delivery.close()
+    assert len(handler.messages) == 21
+
+
+@pytest.mark.asyncio
+async def test_rate_budget_spaces_out_sends():
+    budget = RateBudget(rate_per_minute=1200, burst=1)  # one token every 50ms
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(3):
+        await budget.acquire()
+    assert loop.time() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_bulk_sends_leave_the_reserve_to_transactional_mail():
+    budget = RateBudget(rate_per_minute=600, burst=3, reserve=2)  # one token every 100ms
+    loop = asyncio.get_running_loop()
+
+    await budget.acquire(PRIORITY_LOW)
+    # Two tokens left, both reserved: a bulk send waits, an OTP does not
+    bulk = asyncio.ensure_future(budget.acquire(PRIORITY_LOW))
+    await asyncio.sleep(0)
+    start = loop.time()
+    await budget.acquire(PRIORITY_HIGH)
+    await budget.acquire(PRIORITY_HIGH)
+    assert loop.time() - start < 0.05
+    assert not bulk.done()
+    bulk.cancel()
+
+
+def test_templates_escape_user_input_but_keep_notification_html():
+    html = render_email(
+        "invitation", organization_name="<b>Acme</b>", inviter_name="Ann", role="member",
+        message=None, invitation_link="https://x", action_text="Join", instruction="",
+        header_title="Join", header_subtitle="")
+    assert "&lt;b&gt;Acme&lt;/b&gt;" in html
+    assert "Personal message" not in html
+
+    html = render_email(
+        "notification", subject="S", title="T", content="<strong>done</strong>",
+        action_text=None, action_link=None,
+        scheme={"gradient": "g", "button_color": "#fff", "icon": "i"})
+    assert "<strong>done</strong>" in html
+
+
+@pytest.mark.asyncio
+async def test_invitation_batch_requeues_only_failed_addresses():
+    invitations = [
+        {"email": "a@example.com", "token": "t1", "user_exists": True},
+        {"email": "b@example.com", "token": "t2", "user_exists": False}
+    ]
+    with patch("app.services.email_service.mail_delivery.send_many",
+               AsyncMock(return_value=[None, RuntimeError("refused")])) as send_many, \
+            patch("app.services.email_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        await send_invitation_emails("Acme", "Ann", "member", invitations)
+
+    messages = send_many.await_args.args[0]
+    assert send_many.await_args.kwargs == {"priority": PRIORITY_LOW}
+    assert [m["To"] for m in messages] == ["a@example.com", "b@example.com"]
+    assert "/user/login?token=t1" in messages[0].get_content()
+    assert "/user/signup?token=t2" in messages[1].get_content()
+    enqueue.assert_awaited_once()
+    assert enqueue.await_args.args[1]["email"] == "b@example.com"
+
+
+@pytest.mark.asyncio
+async def test_digest_batch_is_rendered_and_failures_requeued_one_by_one():
+    digests = [
+        {"email": f"{name}@example.com", "name": name,
+         "organizations": [{"name": "<Acme>", "assigned": 3, "completed": 1, "overdue": 0, "mentions": 2}]}
+        for name in ("a", "b")
+    ]
+    with patch("app.services.email_service.mail_delivery.send_many",
+               AsyncMock(return_value=[RuntimeError("refused"), None])) as send_many, \
+            patch("app.services.email_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        await send_weekly_digests(digests, "12 Oct - 18 Oct 2026")
+
+    messages = send_many.await_args.args[0]
+    assert [m["To"] for m in messages] == ["a@example.com", "b@example.com"]
+    assert "&lt;Acme&gt;" in messages[0].get_content()
+    enqueue.assert_awaited_once()
+    assert enqueue.await_args.args[1]["digests"] == digests[:1]
+
+    # A single digest that fails is left to the queue's retry
+    with patch("app.services.email_service.mail_delivery.send_many",
+               AsyncMock(return_value=[RuntimeError("refused")])), \
+            patch("app.services.email_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        with pytest.raises(RuntimeError):
+            await send_weekly_digests(digests[:1], "12 Oct - 18 Oct 2026")
+    enqueue.assert_not_called()
@@ -0,0 +1,167 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi import HTTPException
+import app.services.membership_service as membership_service
+from app.services.membership_service import MembershipService, SCOPE_ORGANIZATION, SCOPE_PROJECT
+from app.utils.permissions import verify_user_access_to_project
+
+
+def rows_cursor(rows):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=rows)
+    return cursor
+
+
+@pytest.mark.asyncio
+async def test_organization_scope_is_one_indexed_query():
+    user_id, org_id, project_id = ObjectId(), ObjectId(), ObjectId()
+    rows = [
+        {"scope_type": SCOPE_ORGANIZATION, "scope_id": org_id, "role": "admin"},
+        {"scope_type": SCOPE_PROJECT, "scope_id": project_id, "role": "member"}
+    ]
+
+    with patch("app.services.membership_service.db") as mock_db:
+        mock_db["memberships"].find.return_value = rows_cursor(rows)
+        membership, project_ids = await MembershipService.get_organization_scope(user_id, org_id)
+
+    assert membership["role"] == "admin"
+    assert project_ids == [project_id]
+    query = mock_db["memberships"].find.call_args.args[0]
+    assert query == {"user_id": user_id, "organization_id": org_id, "status": "active"}
+
+
+@pytest.mark.asyncio
+async def test_missing_rows_are_synced_from_user_document_until_backfill_completes():
+    user_id, org_id = ObjectId(), ObjectId()
+    membership_service._backfill_completed = False
+    synced = [{"scope_id": org_id, "role": "member", "status": "active"}]
+
+    with patch("app.services.membership_service.db") as mock_db:
+        mock_db["memberships"].find.side_effect = [rows_cursor([]), rows_cursor(synced)]
+        mock_db["memberships"].bulk_write = AsyncMock()
+        mock_db["migration_state"].find_one = AsyncMock(return_value=None)
+        mock_db["users"].find_one = AsyncMock(return_value={
+            "_id": user_id,
+            "organizations": [{"organization_id": org_id, "role": "member", "status": "active"}],
+            "joined_projects": []
+        })
+        membership = await MembershipService.get(user_id, org_id)
+
+    assert membership["role"] == "member"
+    operations = mock_db["memberships"].bulk_write.call_args.args[0]
+    assert operations[0]._filter == {"user_id": user_id, "scope_id": org_id}
+    assert operations[0]._upsert is True
+
+    # Once the backfill is done a missing row is a plain denial
+    with patch("app.services.membership_service.db") as mock_db:
+        mock_db["memberships"].find.return_value = rows_cursor([])
+        mock_db["migration_state"].find_one = AsyncMock(return_value={"completed": True})
+        mock_db["memberships"].bulk_write = AsyncMock()
+        assert await MembershipService.get(user_id, org_id) is None
+        mock_db["memberships"].bulk_write.assert_not_called()
+    membership_service._backfill_completed = False
+
+
+@pytest.mark.asyncio
+async def test_project_access_reads_memberships_not_user_document():
+    user_id, owner_id, org_id, project_id = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    project = {"_id": project_id, "organization_id": org_id, "owner_id": owner_id, "members": []}
+
+    with patch("app.utils.permissions.db") as mock_db, \
+            patch("app.utils.permissions.MembershipService.get_many", AsyncMock(return_value={
+                project_id: {"role": "member"}, org_id: {"role": "manager"}
+            })) as get_many:
+        mock_db["projects"].find_one = AsyncMock(return_value=project)
+        access = await verify_user_access_to_project(user_id, project_id)
+
+    get_many.assert_awaited_once_with(user_id, [project_id, org_id])
+    assert access["org_role"] == "manager"
+    assert access["can_manage"] is True
+
+    with patch("app.utils.permissions.db") as mock_db, \
+            patch("app.utils.permissions.MembershipService.get_many",
+                  AsyncMock(return_value={org_id: {"role": "member"}})):
+        mock_db["projects"].find_one = AsyncMock(return_value=project)
+        with pytest.raises(HTTPException) as exc:
+            await verify_user_access_to_project(user_id, project_id)
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_member_page_is_served_from_memberships_with_prefix_search():
+    scope_id, user_id = ObjectId(), ObjectId()
+    rows = [
+        {"user_id": user_id, "name": "Ada Lovelace", "email": "ada@example.com", "role": "admin"},
+        {"user_id": ObjectId(), "name": "Adam Smith", "email": "adam@example.com", "role": "member"}
+    ]
+    cursor = MagicMock()
+    cursor.sort.return_value.skip.return_value.limit.return_value.to_list = AsyncMock(return_value=rows)
+
+    with patch("app.services.membership_service.db") as mock_db, \
+            patch("app.services.membership_service._backfill_completed", True):
+        mock_db["memberships"].find.return_value = cursor
+        mock_db["memberships"].count_documents = AsyncMock(return_value=7)
+        page = await MembershipService.list_scope_members(
+            scope_id, SCOPE_PROJECT, search=" Ad.", limit=1, offset=2)
+
+    mock_db["memberships"].find.assert_called_once()
+    query, projection = mock_db["memberships"].find.call_args.args
+    prefix = {"$regex": r"^ad\."}
+    assert query == {"scope_id": scope_id, "$or": [{"search_name": prefix}, {"search_email": prefix}]}
+    assert "organizations" not in projection and "password" not in projection
+    cursor.sort.assert_called_once_with([("search_name", 1), ("user_id", 1)])
+    cursor.sort.return_value.skip.assert_called_once_with(2)
+    cursor.sort.return_value.skip.return_value.limit.assert_called_once_with(2)
+    assert page["members"] == rows[:1]
+    assert (page["total"], page["has_more"]) == (7, True)
+
+
+@pytest.mark.asyncio
+async def test_member_page_syncs_legacy_members_until_backfill_completes():
+    org_id, synced_id, legacy_id = ObjectId(), ObjectId(), ObjectId()
+    legacy_user = {
+        "_id": legacy_id, "name": "Grace", "email": "grace@example.com",
+        "organizations": [{"organization_id": org_id, "role": "member", "status": "active"}],
+        "joined_projects": []
+    }
+    cursor = MagicMock()
+    cursor.sort.return_value.skip.return_value.limit.return_value.to_list = AsyncMock(return_value=[])
+
+    with patch("app.services.membership_service.db") as mock_db, \
+            patch("app.services.membership_service._backfill_completed", False):
+        mock_db["migration_state"].find_one = AsyncMock(return_value=None)
+        mock_db["organizations"].find_one = AsyncMock(return_value={"members": [synced_id, legacy_id]})
+        mock_db["memberships"].distinct = AsyncMock(return_value=[synced_id])
+        # users.find for the legacy members, then the page itself
+        mock_db["users"].find.side_effect = [rows_cursor([legacy_user]), cursor]
+        mock_db["memberships"].bulk_write = AsyncMock()
+        mock_db["memberships"].count_documents = AsyncMock(return_value=2)
+        await MembershipService.list_scope_members(org_id, SCOPE_ORGANIZATION)
+
+    assert mock_db["users"].find.call_args_list[0].args[0] == {"_id": {"$in": [legacy_id]}}
+    operation = mock_db["memberships"].bulk_write.await_args.args[0][0]
+    assert operation._filter == {"user_id": legacy_id, "scope_id": org_id}
+    assert operation._doc["$set"]["search_name"] == "grace"
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_in_profiles_on_existing_rows():
+    alice, gone = ObjectId(), ObjectId()
+    rows = [{"user_id": alice}, {"user_id": alice}, {"user_id": gone}]
+
+    with patch("app.services.membership_service.db") as mock_db:
+        mock_db["migration_state"].find_one = AsyncMock(return_value={"completed": True})
+        profile_rows = MagicMock()
+        profile_rows.limit.return_value.to_list = AsyncMock(side_effect=[rows, []])
+        # memberships without a profile (twice), and the users of the first batch
+        mock_db["memberships"].find.side_effect = [profile_rows, rows_cursor([{"_id": alice, "name": "Alice"}]),
+                                                   profile_rows]
+        mock_db["memberships"].bulk_write = AsyncMock(return_value=MagicMock(modified_count=3))
+        result = await MembershipService.backfill()
+
+    assert result == {"memberships": 0, "profiles": 3}
+    operations = mock_db["memberships"].bulk_write.await_args.args[0]
+    assert [op._filter for op in operations] == [{"user_id": alice}, {"user_id": gone}]
+    assert operations[0]._doc["$set"]["search_name"] == "alice"
+    assert operations[1]._doc["$set"]["search_name"] == ""
@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from app.services.notification_push import (
+    CLOSE, ConnectionRegistry, LocalBroadcaster, MongoBroadcaster, NotificationPush
+)
+from app.services.notification_service import NotificationService
+
+
+@pytest.mark.asyncio
+async def test_registry_delivers_to_every_stream_of_the_user_only():
+    registry = ConnectionRegistry(queue_size=10, max_per_user=5)
+    alice, bob = ObjectId(), ObjectId()
+    tab1, tab2 = registry.connect(alice), registry.connect(str(alice))
+    other = registry.connect(bob)
+
+    registry.deliver(alice, {"type": "notification"})
+
+    assert tab1.get_nowait() == tab2.get_nowait() == {"type": "notification"}
+    assert other.empty()
+    registry.disconnect(alice, tab1)
+    registry.disconnect(alice, tab2)
+    assert registry.get_metrics()["users"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_and_excess_streams_are_closed_not_buffered():
+    registry = ConnectionRegistry(queue_size=2, max_per_user=2)
+    user_id = ObjectId()
+    slow = registry.connect(user_id)
+    for i in range(3):
+        registry.deliver(user_id, {"type": "notification", "i": i})
+    assert slow.get_nowait() is CLOSE and slow.empty()
+    assert registry.get_metrics()["streams"] == 0
+
+    first, second = registry.connect(user_id), registry.connect(user_id)
+    third = registry.connect(user_id)
+    assert first.get_nowait() is CLOSE
+    assert second.empty() and third.empty()
+    assert registry.get_metrics()["closed_excess"] == 1
+
+
+@pytest.mark.asyncio
+async def test_new_notifications_reach_connected_users_through_local_broadcaster():
+    push = NotificationPush(LocalBroadcaster())
+    push.start()
+    recipient = ObjectId()
+    stream = push.registry.connect(recipient)
+    task = {"_id": ObjectId(), "title": "Ship it", "project_id": ObjectId(), "assignee_id": recipient}
+
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.notification_push", push):
+        mock_db["notifications"].insert_many = AsyncMock(return_value=MagicMock(inserted_ids=[1]))
+        mock_db["notification_counters"].bulk_write = AsyncMock()
+        await NotificationService.notify_task_assigned(ObjectId(), [task])
+
+    event = stream.get_nowait()
+    assert event["type"] == "notification"
+    assert event["notification"]["data"]["task_id"] == str(task["_id"])
+    await push.stop()
+    assert stream.get_nowait() is CLOSE
+
+
+@pytest.mark.asyncio
+async def test_mongo_broadcaster_publishes_with_one_insert_and_never_raises():
+    user_id = ObjectId()
+
+    with patch("app.services.notification_push.db") as mock_db:
+        mock_db["notification_events"].insert_many = AsyncMock()
+        await MongoBroadcaster().publish([(user_id, {"type": "unread_count", "unread_count": 0})] * 2)
+    docs = mock_db["notification_events"].insert_many.await_args.args[0]
+    assert [d["user_id"] for d in docs] == [str(user_id)] * 2
+
+    push = NotificationPush(MongoBroadcaster())
+    with patch("app.services.notification_push.db") as mock_db:
+        mock_db["notification_events"].insert_many = AsyncMock(side_effect=Exception("down"))
+        await push.publish([(user_id, {"type": "unread_count", "unread_count": 0})])
+    assert push.get_metrics()["failed_publishes"] == 1
@@ -0,0 +1,150 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.db.enums import NotificationType
+from app.services.notification_service import NotificationService
+from app.utils.pagination import encode_cursor
+
+
+@pytest.mark.asyncio
+async def test_fan_out_is_one_insert_many_and_one_counter_bulk_write():
+    sender, alice, bob = ObjectId(), ObjectId(), ObjectId()
+    project_id = ObjectId()
+    tasks = [
+        {"_id": ObjectId(), "title": "A", "project_id": project_id, "assignee_id": alice},
+        {"_id": ObjectId(), "title": "B", "project_id": project_id, "assignee_id": alice},
+        {"_id": ObjectId(), "title": "C", "project_id": project_id, "assignee_id": bob},
+        {"_id": ObjectId(), "title": "Mine", "project_id": project_id, "assignee_id": sender}
+    ]
+
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.notification_push.publish", AsyncMock()) as publish:
+        mock_db["notifications"].insert_many = AsyncMock(return_value=MagicMock(inserted_ids=[1, 2, 3]))
+        mock_db["notification_counters"].bulk_write = AsyncMock()
+        created = await NotificationService.notify_task_assigned(sender, tasks)
+
+    assert created == 3
+    docs = mock_db["notifications"].insert_many.await_args.args[0]
+    assert [d["recipient_id"] for d in docs] == [alice, alice, bob]
+    assert all(d["type"] == NotificationType.TASK_ASSIGNED and d["read"] is False for d in docs)
+    operations = mock_db["notification_counters"].bulk_write.await_args.args[0]
+    assert {op._filter["_id"]: op._doc["$inc"]["unread"] for op in operations} == {alice: 2, bob: 1}
+    assert all(op._upsert for op in operations)
+    assert [user_id for user_id, _ in publish.await_args.args[0]] == [alice, alice, bob]
+
+
+@pytest.mark.asyncio
+async def test_due_reminders_are_only_marked_once_created():
+    tasks = [
+        {"_id": ObjectId(), "title": "A", "project_id": ObjectId(), "assignee_id": ObjectId(),
+         "due_date": datetime(2024, 1, 2)}
+        for _ in range(2)
+    ]
+    cursor = MagicMock()
+    cursor.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=tasks)
+
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.NotificationService.notify_many",
+                  AsyncMock(return_value=2)):
+        mock_db["migration_state"].find_one_and_update = AsyncMock(return_value={"_id": "due_reminders"})
+        mock_db["migration_state"].update_one = AsyncMock()
+        mock_db["tasks"].find.return_value = cursor
+        mock_db["tasks"].update_many = AsyncMock()
+        assert await NotificationService.send_due_reminders(datetime(2024, 1, 1)) == 2
+    ids = mock_db["tasks"].update_many.await_args.args[0]["_id"]["$in"]
+    assert ids == [task["_id"] for task in tasks]
+    query = mock_db["tasks"].find.call_args.args[0]
+    assert query["status"] == {"$nin": ["done", "canceled"]}
+
+    # A failed insert leaves the batch for the next run
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.NotificationService.notify_many",
+                  AsyncMock(return_value=0)):
+        mock_db["migration_state"].find_one_and_update = AsyncMock(return_value={"_id": "due_reminders"})
+        mock_db["migration_state"].update_one = AsyncMock()
+        mock_db["tasks"].find.return_value = cursor
+        mock_db["tasks"].update_many = AsyncMock()
+        assert await NotificationService.send_due_reminders(datetime(2024, 1, 1)) == 0
+    mock_db["tasks"].update_many.assert_not_called()
+    # The lease is handed back either way
+    assert mock_db["migration_state"].update_one.await_args.args[1]["$set"]["lease_until"] is None
+
+    # Another worker holds the lease: nothing is read or sent
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.NotificationService.notify_many", AsyncMock()) as notify:
+        mock_db["migration_state"].find_one_and_update = AsyncMock(side_effect=DuplicateKeyError("leased"))
+        assert await NotificationService.send_due_reminders(datetime(2024, 1, 1)) is None
+    mock_db["tasks"].find.assert_not_called()
+    notify.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unread_count_is_read_from_the_counter_not_counted():
+    user_id = ObjectId()
+
+    with patch("app.services.notification_service.db") as mock_db:
+        mock_db["notification_counters"].find_one = AsyncMock(return_value={"_id": user_id, "unread": 4})
+        mock_db["notifications"].count_documents = AsyncMock()
+        assert await NotificationService.get_unread_count(user_id) == 4
+
+        mock_db["notification_counters"].find_one = AsyncMock(return_value=None)
+        assert await NotificationService.get_unread_count(user_id) == 0
+    mock_db["notifications"].count_documents.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_mark_read_decrements_by_documents_actually_flipped():
+    user_id = ObjectId()
+    ids = [ObjectId(), ObjectId()]
+
+    with patch("app.services.notification_service.db") as mock_db, \
+            patch("app.services.notification_service.notification_push.publish", AsyncMock()) as publish:
+        mock_db["notifications"].update_many = AsyncMock(return_value=MagicMock(modified_count=1))
+        mock_db["notification_counters"].update_one = AsyncMock()
+        mock_db["notification_counters"].find_one = AsyncMock(return_value={"unread": 2})
+        result = await NotificationService.mark_read(user_id, ids)
+
+    query = mock_db["notifications"].update_many.await_args.args[0]
+    assert query["recipient_id"] == user_id and query["read"] is False
+    assert set(query["_id"]["$in"]) == set(ids)
+    counter_update = mock_db["notification_counters"].update_one.await_args.args[1]
+    assert counter_update["$inc"] == {"unread": -1}
+    assert result == {"updated_count": 1, "unread_count": 2}
+    publish.assert_awaited_once_with([(user_id, {"type": "unread_count", "unread_count": 2})])
+
+    # Nothing flipped: the counter is left alone
+    with patch("app.services.notification_service.db") as mock_db:
+        mock_db["notifications"].update_many = AsyncMock(return_value=MagicMock(modified_count=0))
+        mock_db["notification_counters"].update_one = AsyncMock()
+        mock_db["notification_counters"].find_one = AsyncMock(return_value={"unread": 2})
+        await NotificationService.mark_read(user_id)
+    assert "_id" not in mock_db["notifications"].update_many.await_args.args[0]
+    mock_db["notification_counters"].update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_listing_pages_by_cursor_newest_first():
+    user_id = ObjectId()
+    rows = [
+        {"_id": ObjectId(), "type": "mention", "title": "t", "message": "m",
+         "read": False, "created_at": datetime(2024, 1, 3 - i)}
+        for i in range(3)
+    ]
+    cursor = MagicMock()
+    cursor.sort.return_value.limit.return_value.to_list = AsyncMock(return_value=rows)
+
+    with patch("app.services.notification_service.db") as mock_db:
+        mock_db["notifications"].find.return_value = cursor
+        mock_db["notification_counters"].find_one = AsyncMock(return_value={"unread": 3})
+        page = await NotificationService.list_notifications(
+            user_id, limit=2, cursor=encode_cursor(datetime(2024, 1, 5), ObjectId()), unread_only=True)
+
+    query = mock_db["notifications"].find.call_args.args[0]
+    assert query["recipient_id"] == user_id and query["read"] is False and "$or" in query
+    cursor.sort.assert_called_once_with([("created_at", -1), ("_id", -1)])
+    cursor.sort.return_value.limit.assert_called_once_with(3)
+    assert [n["id"] for n in page["notifications"]] == [str(r["_id"]) for r in rows[:2]]
+    assert page["has_more"] is True and page["next_cursor"] == encode_cursor(rows[1]["created_at"], rows[1]["_id"])
+    assert page["unread_count"] == 3
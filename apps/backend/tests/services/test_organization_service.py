@@ -0,0 +1,100 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+from datetime import datetime
+from bson import ObjectId
+from app.services.organization_service import OrganizationService
+from app.utils.search import build_text_search
+
+
+def test_build_text_search_strips_operators():
+    assert build_text_search('fix -login .* bug') == "fix login bug"
+    assert build_text_search('"release notes" Release v2') == '"release notes" release v2'
+    assert build_text_search('"unbalanced') == "unbalanced"
+    assert build_text_search("$%^&*") == ""
+    assert len(build_text_search(" ".join(f"w{i}" for i in range(20))).split()) == 8
+
+
+def mock_org_member(org_id, project_id):
+    return patch(
+        "app.services.organization_service.MembershipService.get_organization_scope",
+        AsyncMock(return_value=({"scope_id": org_id, "role": "member"}, [project_id])))
+
+
+@pytest.mark.asyncio
+async def test_search_uses_text_index_and_ranks_by_score():
+    org_id, project_id = ObjectId(), ObjectId()
+    now = datetime(2024, 1, 1)
+
+    with patch("app.services.organization_service.db") as mock_db, mock_org_member(org_id, project_id):
+        mock_db["tasks"].count_documents = AsyncMock(return_value=1)
+        tasks_cursor = MagicMock()
+        tasks_cursor.to_list = AsyncMock(return_value=[{
+            "_id": ObjectId(), "title": "Login bug", "status": "todo", "priority": "high",
+            "search_score": 7.5, "created_at": now, "updated_at": now
+        }])
+        mock_db["tasks"].aggregate.return_value = tasks_cursor
+
+        result = await OrganizationService.get_organization_tasks(
+            ObjectId(), org_id, search="login (bug")
+
+    pipeline = mock_db["tasks"].aggregate.call_args.args[0]
+    assert pipeline[0]["$match"]["$text"] == {"$search": "login bug"}
+    assert pipeline[0]["$match"]["organization_id"] == org_id
+    assert pipeline[2]["$sort"] == {"search_score": -1, "updated_at": -1, "_id": -1}
+    assert not any("$regexMatch" in str(stage) for stage in pipeline)
+    assert result["tasks"][0]["relevance"] == 7.5
+    assert result["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_search_without_terms_returns_empty_page():
+    org_id, project_id = ObjectId(), ObjectId()
+
+    with patch("app.services.organization_service.db") as mock_db, mock_org_member(org_id, project_id):
+        result = await OrganizationService.get_organization_tasks(
+            ObjectId(), org_id, search="***")
+
+    assert result["tasks"] == []
+    mock_db["tasks"].aggregate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_invite_uses_one_query_per_collection_and_reports_each_address():
+    org_id, inviter_id = ObjectId(), ObjectId()
+    users = [
+        {"_id": ObjectId(), "email": "member@example.com", "organizations": [{"organization_id": org_id}]},
+        {"_id": ObjectId(), "email": "known@example.com", "organizations": []}
+    ]
+    users_cursor, pending_cursor = MagicMock(), MagicMock()
+    users_cursor.to_list = AsyncMock(return_value=users)
+    pending_cursor.to_list = AsyncMock(return_value=[{"email": "pending@example.com"}])
+    emails = ["new@example.com", "known@example.com", "member@example.com",
+              "pending@example.com", "not-an-email", "NEW@example.com"]
+
+    with patch("app.services.organization_service.db") as mock_db, \
+            patch("app.services.organization_service.JobQueue.enqueue", AsyncMock()) as enqueue, \
+            patch("app.services.organization_service.INVITE_EMAIL_BATCH_SIZE", 1):
+        mock_db["organizations"].find_one = AsyncMock(return_value={"_id": org_id, "name": "Acme"})
+        mock_db["users"].find.side_effect = [users_cursor, pending_cursor]
+        mock_db["organization_invitations"].insert_many = AsyncMock()
+        result = await OrganizationService.bulk_invite_users_to_organization(
+            org_id, emails, "Ann", "member", inviter_id)
+
+    assert result["invited"] == [{"email": "new@example.com"}, {"email": "known@example.com"}]
+    assert {f["email"]: f["reason"] for f in result["failed"]} == {
+        "member@example.com": "User already a member of this organization",
+        "pending@example.com": "Invitation already pending",
+        "not-an-email": "Invalid email address",
+        "NEW@example.com": "Duplicate email in request"
+    }
+
+    assert mock_db["users"].find.call_count == 2
+    documents = mock_db["organization_invitations"].insert_many.await_args.args[0]
+    assert [d["email"] for d in documents] == ["new@example.com", "known@example.com"]
+    assert len({d["token"] for d in documents}) == 2
+
+    assert enqueue.await_count == 2
+    job_type, payload = enqueue.await_args_list[1].args
+    assert job_type == "send_invitation_emails"
+    assert payload["invitations"][0]["email"] == "known@example.com"
+    assert payload["invitations"][0]["user_exists"] is True
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from pymongo import ReturnDocument
+import app.api.dependencies  # noqa: F401  user_service is imported through the dependencies
+from app.services.user_service import UserService
+
+
+def otp_token(user_id, token="1234", **metadata):
+    otp_metadata = {"attempts": 0, "max_attempts": 3, "is_blocked": False, "block_until": None}
+    otp_metadata.update(metadata)
+    return {"_id": ObjectId(), "user_id": user_id, "type": "otp", "token": token, "otp_metadata": otp_metadata}
+
+
+@pytest.mark.asyncio
+async def test_login_issues_otp_with_one_upsert_and_enqueues_email():
+    user = {"_id": ObjectId(), "email": "ada@example.com", "password_hash": "hashed"}
+
+    with patch("app.services.user_service.db") as mock_db, \
+            patch("app.services.user_service.pwd_context.verify", return_value=True), \
+            patch("app.services.user_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        mock_db["users"].find_one = AsyncMock(return_value=user)
+        mock_db["verification_tokens"].find_one_and_update = AsyncMock(return_value=None)
+        await UserService.login("ada@example.com", "secret")
+
+    mock_db["verification_tokens"].find_one_and_update.assert_awaited_once()
+    query, pipeline = mock_db["verification_tokens"].find_one_and_update.call_args.args
+    kwargs = mock_db["verification_tokens"].find_one_and_update.call_args.kwargs
+    assert query == {"user_id": user["_id"], "type": "otp"}
+    assert isinstance(pipeline, list)
+    assert kwargs["upsert"] is True
+    assert kwargs["return_document"] == ReturnDocument.BEFORE
+    enqueue.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_login_while_blocked_is_rejected_without_sending_email():
+    user = {"_id": ObjectId(), "email": "ada@example.com", "password_hash": "hashed"}
+    blocked = otp_token(user["_id"], is_blocked=True, block_until=datetime.utcnow() + timedelta(minutes=10))
+
+    with patch("app.services.user_service.db") as mock_db, \
+            patch("app.services.user_service.pwd_context.verify", return_value=True), \
+            patch("app.services.user_service.JobQueue.enqueue", AsyncMock()) as enqueue:
+        mock_db["users"].find_one = AsyncMock(return_value=user)
+        mock_db["verification_tokens"].find_one_and_update = AsyncMock(return_value=blocked)
+        with pytest.raises(HTTPException) as exc:
+            await UserService.login("ada@example.com", "secret")
+
+    assert exc.value.status_code == 429
+    assert exc.value.detail["blockTimeLeft"] == 10
+    enqueue.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_verify_otp_reads_outcome_from_the_pre_image():
+    user_id = ObjectId()
+    user = {"_id": user_id, "name": "Ada", "email": "ada@example.com", "profile": {},
+            "created_at": datetime(2024, 1, 1)}
+
+    async def verify(previous, otp):
+        with patch("app.services.user_service.db") as mock_db:
+            mock_db["users"].find_one = AsyncMock(return_value=user)
+            mock_db["users"].update_one = AsyncMock()
+            mock_db["verification_tokens"].find_one_and_update = AsyncMock(return_value=previous)
+            try:
+                return await UserService.verify_otp("ada@example.com", otp, Response())
+            finally:
+                query = mock_db["verification_tokens"].find_one_and_update.call_args.args[0]
+                assert query["is_used"] == {"$ne": True} and "$gt" in query["expires_at"]
+                mock_db["verification_tokens"].delete_one.assert_not_called()
+
+    with pytest.raises(HTTPException) as exc:
+        await verify(otp_token(user_id, attempts=1), "0000")
+    assert exc.value.status_code == 400
+    assert exc.value.detail["remaining_attempts"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await verify(otp_token(user_id, attempts=2), "0000")
+    assert exc.value.status_code == 429
+
+    # A correct code inside the block window is still rejected
+    with pytest.raises(HTTPException) as exc:
+        await verify(otp_token(user_id, is_blocked=True,
+                               block_until=datetime.utcnow() + timedelta(minutes=5)), "1234")
+    assert exc.value.status_code == 429
+
+    with pytest.raises(HTTPException) as exc:
+        await verify(None, "1234")
+    assert exc.value.status_code == 400
+
+    with patch("app.services.user_service.dependencies.set_auth_cookie", AsyncMock()):
+        result = await verify(otp_token(user_id), "1234")
+    assert result["message"] == "Login successful"
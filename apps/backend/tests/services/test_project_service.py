@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.services.project_service import ProjectService
+
+
+@pytest.mark.asyncio
+async def test_add_project_members_uses_fixed_number_of_round_trips():
+    owner_id, org_id, project_id = ObjectId(), ObjectId(), ObjectId()
+    existing, outsider, missing = ObjectId(), ObjectId(), ObjectId()
+    new_members = [ObjectId() for _ in range(3)]
+    active = [{"organization_id": org_id, "status": "active"}]
+    users = [{"_id": m, "name": f"User {i}", "organizations": active} for i, m in enumerate(new_members)]
+    users += [
+        {"_id": existing, "name": "Existing", "organizations": active},
+        {"_id": outsider, "name": "Outsider", "organizations": []}
+    ]
+    project = {"_id": project_id, "owner_id": owner_id, "members": [owner_id, existing]}
+    users_cursor = MagicMock()
+    users_cursor.to_list = AsyncMock(return_value=users)
+
+    with patch("app.services.project_service.db") as mock_db, \
+            patch("app.services.project_service.ProjectService.verify_user_access",
+                  AsyncMock(return_value={"can_manage": False})), \
+            patch("app.services.project_service.MembershipService.add_many", AsyncMock()) as add_many, \
+            patch("app.services.project_service.ActivityService.log_activities", AsyncMock()) as log_activities:
+        mock_db["projects"].find_one = AsyncMock(return_value=project)
+        mock_db["projects"].update_one = AsyncMock()
+        mock_db["users"].find.return_value = users_cursor
+        mock_db["users"].bulk_write = AsyncMock()
+        result = await ProjectService.add_project_members(
+            owner_id, org_id, "proj", new_members + [existing, outsider, missing, new_members[0]])
+
+    assert [m["id"] for m in result["added"]] == [str(m) for m in new_members]
+    assert {f["member_id"]: f["reason"] for f in result["failed"]} == {
+        str(existing): "User is already a project member",
+        str(outsider): "User is not a member of the organization",
+        str(missing): "User not found"
+    }
+
+    mock_db["users"].find.assert_called_once()
+    mock_db["projects"].update_one.assert_awaited_once_with(
+        {"_id": project_id}, {"$addToSet": {"members": {"$each": new_members}}})
+    operations = mock_db["users"].bulk_write.call_args.args[0]
+    assert len(operations) == 3 and all(isinstance(op, UpdateOne) for op in operations)
+    assert [u["_id"] for u in add_many.await_args.args[0]] == new_members
+    log_activities.assert_awaited_once()
+    assert len(log_activities.await_args.args[1]) == 3
+
+
+@pytest.mark.asyncio
+async def test_list_projects_computes_stats_for_the_page_in_one_aggregation():
+    user_id, org_id = ObjectId(), ObjectId()
+    projects = [
+        {"_id": ObjectId(), "name": f"P{i}", "slug": f"p{i}", "color": "#fff", "status": "active",
+         "owner_id": user_id, "members": [user_id], "created_at": None, "updated_at": None}
+        for i in range(3)
+    ]
+    projects_cursor = MagicMock()
+    projects_cursor.sort.return_value.skip.return_value.limit.return_value.to_list = AsyncMock(return_value=projects)
+    stats_cursor = MagicMock()
+    stats_cursor.to_list = AsyncMock(return_value=[
+        {"_id": projects[0]["_id"], "total_tasks": 4, "completed_tasks": 1, "in_progress_tasks": 1,
+         "todo_tasks": 2, "overdue_tasks": 1}
+    ])
+
+    with patch("app.services.project_service.db") as mock_db, \
+            patch("app.services.project_service.ProjectService.verify_user_access", AsyncMock()):
+        mock_db["projects"].count_documents = AsyncMock(return_value=3)
+        mock_db["projects"].find.return_value = projects_cursor
+        mock_db["tasks"].aggregate.return_value = stats_cursor
+        result = await ProjectService.list_projects(user_id, org_id)
+
+    # mock_db[...] is one mock for every collection: the only count is the project total
+    mock_db["tasks"].aggregate.assert_called_once()
+    mock_db["projects"].count_documents.assert_awaited_once()
+    match = mock_db["tasks"].aggregate.call_args.args[0][0]["$match"]
+    assert match["project_id"] == {"$in": [p["_id"] for p in projects]}
+
+    stats = [p["stats"] for p in result["projects"]]
+    assert stats[0]["overdue_tasks"] == 1 and stats[0]["completion_rate"] == 25.0
+    assert stats[1] == stats[2] == ProjectService._empty_project_stats()
@@ -0,0 +1,122 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateMany
+from app.services.task_service import TaskService
+
+
+def mock_tasks(mock_db, tasks):
+    cursor = MagicMock()
+    cursor.limit.return_value.to_list = AsyncMock(return_value=tasks)
+    mock_db["tasks"].find.return_value = cursor
+    mock_db["tasks"].bulk_write = AsyncMock()
+
+
+def access_for(projects):
+    async def verify(user_id, project_id):
+        return {"project": projects[project_id]}
+    return AsyncMock(side_effect=verify)
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_checks_each_project_once_and_logs_digest_per_project():
+    user_id, member_id, org_id = ObjectId(), ObjectId(), ObjectId()
+    project_a, project_b = ObjectId(), ObjectId()
+    projects = {
+        project_a: {"_id": project_a, "organization_id": org_id, "members": [user_id, member_id]},
+        project_b: {"_id": project_b, "organization_id": org_id, "members": [user_id, member_id]}
+    }
+    tasks = [
+        {"_id": ObjectId(), "project_id": project_a},
+        {"_id": ObjectId(), "project_id": project_a},
+        {"_id": ObjectId(), "project_id": project_b}
+    ]
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", access_for(projects)) as verify, \
+            patch("app.services.task_service.WorkloadService.rebuild_project", AsyncMock()) as rebuild, \
+            patch("app.services.task_service.AnalyticsService.bump_version", AsyncMock()), \
+            patch("app.services.task_service.ActivityService.log_activity", AsyncMock()) as log_activity, \
+            patch("app.services.task_service.NotificationService.notify_task_assigned", AsyncMock()) as notify:
+        mock_tasks(mock_db, tasks)
+        result = await TaskService.bulk_update_tasks(
+            user_id,
+            {"assignee_id": str(member_id), "add_labels": ["bug", " bug "], "remove_labels": ["triage"]},
+            task_ids=[task["_id"] for task in tasks]
+        )
+
+    assert result["updated_count"] == 3
+    assert verify.await_count == 2
+    assert rebuild.await_count == 2
+    assert all(call.kwargs == {"bump_stats_version": True} for call in rebuild.await_args_list)
+
+    operations = mock_db["tasks"].bulk_write.call_args.args[0]
+    assert len(operations) == 2
+    assert all(isinstance(op, UpdateMany) for op in operations)
+    set_update = operations[0]._doc
+    assert set_update["$set"]["assignee_id"] == member_id
+    assert set_update["$addToSet"] == {"labels": {"$each": ["bug"]}}
+    assert operations[1]._doc == {"$pull": {"labels": {"$in": ["triage"]}}}
+
+    assert log_activity.await_count == 2
+    notify.assert_awaited_once()
+    assert [t["assignee_id"] for t in notify.await_args.args[1]] == [member_id] * 3
+    first = log_activity.await_args_list[0].kwargs
+    assert first["project_id"] == project_a
+    assert len(first["metadata"]["task_ids"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_null_due_date_clears_it():
+    user_id, project_id = ObjectId(), ObjectId()
+    projects = {project_id: {"_id": project_id, "organization_id": ObjectId(), "members": [user_id]}}
+    tasks = [{"_id": ObjectId(), "project_id": project_id}]
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", access_for(projects)), \
+            patch("app.services.task_service.WorkloadService.rebuild_project", AsyncMock()), \
+            patch("app.services.task_service.AnalyticsService.bump_version", AsyncMock()), \
+            patch("app.services.task_service.ActivityService.log_activity", AsyncMock()):
+        mock_tasks(mock_db, tasks)
+        await TaskService.bulk_update_tasks(
+            user_id, {"due_date": None, "priority": None}, task_ids=[tasks[0]["_id"]])
+
+    set_fields = mock_db["tasks"].bulk_write.call_args.args[0][0]._doc["$set"]
+    assert set_fields["due_date"] is None
+    assert "priority" not in set_fields
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_rejects_assignee_outside_project():
+    user_id, project_id = ObjectId(), ObjectId()
+    projects = {project_id: {"_id": project_id, "organization_id": ObjectId(), "members": [user_id]}}
+    tasks = [{"_id": ObjectId(), "project_id": project_id}]
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", access_for(projects)):
+        mock_tasks(mock_db, tasks)
+        with pytest.raises(HTTPException) as exc:
+            await TaskService.bulk_update_tasks(
+                user_id, {"assignee_id": str(ObjectId())}, task_ids=[tasks[0]["_id"]])
+
+    assert exc.value.status_code == 400
+    mock_db["tasks"].bulk_write.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_filter_is_capped():
+    project_id = ObjectId()
+    tasks = [{"_id": ObjectId(), "project_id": project_id} for _ in range(3)]
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.BULK_UPDATE_MAX_TASKS", 2):
+        mock_tasks(mock_db, tasks)
+        with pytest.raises(HTTPException) as exc:
+            await TaskService.bulk_update_tasks(
+                ObjectId(), {"archived": True},
+                task_filter={"project_id": str(project_id), "label": "stale", "archived": False})
+
+    assert exc.value.status_code == 400
+    query = mock_db["tasks"].find.call_args.args[0]
+    assert query == {"project_id": project_id, "archived": False, "labels": "stale"}
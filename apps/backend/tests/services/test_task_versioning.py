@@ -0,0 +1,126 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from app.models.board import BoardUpdate
+from app.services.task_service import TaskService
+from app.services.board_service import BoardService
+
+
+def make_task(**overrides):
+    task = {
+        "_id": ObjectId(), "title": "Write docs", "status": "todo", "priority": "low",
+        "project_id": ObjectId(), "organization_id": ObjectId(), "creator_id": ObjectId(),
+        "column_id": "todo", "position": 0, "archived": False,
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1)
+    }
+    task.update(overrides)
+    return task
+
+
+def patch_side_effects():
+    return [
+        patch("app.services.task_service.verify_user_access_to_project", AsyncMock()),
+        patch("app.services.task_service.WorkloadService.apply_change", AsyncMock()),
+        patch("app.services.task_service.ActivityService.log_activity", AsyncMock()),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_partial_update_returns_post_image_in_one_round_trip():
+    task = make_task(version=3)
+    post_image = {**task, "title": "Write better docs", "version": 4}
+
+    patches = patch_side_effects()
+    with patch("app.services.task_service.db") as mock_db, \
+            patches[0], patches[1], patches[2]:
+        mock_db["tasks"].find_one = AsyncMock(return_value=task)
+        mock_db["tasks"].find_one_and_update = AsyncMock(return_value=post_image)
+        result = await TaskService.update_task_partial(
+            ObjectId(), task["_id"], {"title": "Write better docs", "version": 99}, expected_version=3)
+
+    assert result["title"] == "Write better docs"
+    assert result["version"] == 4
+    mock_db["tasks"].find_one.assert_awaited_once()
+
+    query, update = mock_db["tasks"].find_one_and_update.call_args.args
+    kwargs = mock_db["tasks"].find_one_and_update.call_args.kwargs
+    assert query == {"_id": task["_id"], "version": 3}
+    assert update["$inc"] == {"version": 1}
+    assert "version" not in update["$set"]
+    assert kwargs["return_document"] == ReturnDocument.AFTER
+    assert "comments" not in kwargs["projection"]
+
+
+@pytest.mark.asyncio
+async def test_stale_client_version_is_rejected_before_writing():
+    task = make_task(version=5)
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", AsyncMock()):
+        mock_db["tasks"].find_one = AsyncMock(return_value=task)
+        mock_db["tasks"].find_one_and_update = AsyncMock()
+        with pytest.raises(HTTPException) as exc:
+            await TaskService.update_task_partial(ObjectId(), task["_id"], {"title": "x"}, expected_version=4)
+
+    assert exc.value.status_code == 409
+    mock_db["tasks"].find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_invalid_mention_is_rejected_before_writing():
+    task = make_task(version=1)
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", AsyncMock()):
+        mock_db["tasks"].find_one = AsyncMock(return_value=task)
+        mock_db["tasks"].find_one_and_update = AsyncMock()
+        with pytest.raises(HTTPException) as exc:
+            await TaskService.update_task_partial(
+                ObjectId(), task["_id"], {"title": "x", "mentions": [str(ObjectId()), "not-an-id"]})
+
+    assert exc.value.status_code == 400
+    mock_db["tasks"].find_one_and_update.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_write_between_read_and_update_is_a_conflict():
+    task = make_task()  # created before versioning
+
+    with patch("app.services.task_service.db") as mock_db, \
+            patch("app.services.task_service.verify_user_access_to_project", AsyncMock()):
+        mock_db["tasks"].find_one = AsyncMock(return_value=task)
+        mock_db["tasks"].find_one_and_update = AsyncMock(return_value=None)
+        with pytest.raises(HTTPException) as exc:
+            await TaskService.update_task_partial(ObjectId(), task["_id"], {"title": "x"})
+
+    assert exc.value.status_code == 409
+    query = mock_db["tasks"].find_one_and_update.call_args.args[0]
+    assert query == {"_id": task["_id"], "version": None}
+
+
+@pytest.mark.asyncio
+async def test_update_board_formats_post_image_without_reloading():
+    board = {
+        "_id": ObjectId(), "name": "Board", "project_id": ObjectId(), "columns": [],
+        "is_default": True, "version": 2,
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1)
+    }
+
+    with patch("app.services.board_service.db") as mock_db, \
+            patch("app.services.board_service.verify_user_access_to_project",
+                  AsyncMock(return_value={"can_manage": True})), \
+            patch("app.services.board_service.ActivityService.log_activity", AsyncMock()), \
+            patch("app.services.board_service.BoardService.get_board", AsyncMock()) as get_board:
+        mock_db["boards"].find_one = AsyncMock(return_value=board)
+        mock_db["boards"].find_one_and_update = AsyncMock(
+            return_value={**board, "name": "Renamed", "version": 3})
+        result = await BoardService.update_board(
+            ObjectId(), board["_id"], BoardUpdate(name="Renamed"), expected_version=2)
+
+    assert (result["name"], result["version"]) == ("Renamed", 3)
+    get_board.assert_not_called()
+    query = mock_db["boards"].find_one_and_update.call_args.args[0]
+    assert query == {"_id": board["_id"], "version": 2}
@@ -21,7 +21,7 @@ async def test_register_user_and_verification_token_success():
 
     with patch("app.services.user_service.db") as mock_db, \
         patch("app.services.user_service.generate_verification_token", return_value="dummy_token"), \
-        patch("app.services.user_service.send_verification_email", new_callable=AsyncMock):
+        patch("app.services.user_service.JobQueue.enqueue", new_callable=AsyncMock):
 
         users_collection = MagicMock()
         users_collection.find_one = AsyncMock(return_value=None)
@@ -105,7 +105,7 @@ async def test_resend_verification_email_success():
     email = "test@example.com"
     
     with patch("app.services.user_service.db") as mock_db, \
-        patch("app.services.user_service.send_verification_email", new_callable=AsyncMock), \
+        patch("app.services.user_service.JobQueue.enqueue", new_callable=AsyncMock), \
         patch("app.services.user_service.Verification_Token") as MockVerificationToken:
 
         users_collection = AsyncMock()
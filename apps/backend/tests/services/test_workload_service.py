@@ -0,0 +1,131 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+from bson import ObjectId
+from app.services.workload_service import WorkloadService
+
+
+@pytest.mark.asyncio
+async def test_pick_assignee_least_loaded_member():
+    busy, idle = ObjectId(), ObjectId()
+    project = {
+        "_id": ObjectId(),
+        "members": [busy, idle],
+        "settings": {"auto_assign": True, "default_assignee": None},
+        "workload": {
+            str(busy): {"open_tasks": 4, "open_hours": 10.0},
+            str(idle): {"open_tasks": 1, "open_hours": 2.0},
+        }
+    }
+
+    with patch("app.services.workload_service.db") as mock_db:
+        assignee = await WorkloadService.pick_assignee(project)
+
+    assert assignee == idle
+    # Counters come from the project document, no query needed
+    assert not mock_db.__getitem__.called
+
+
+@pytest.mark.asyncio
+async def test_pick_assignee_tie_prefers_default_assignee():
+    first, default = ObjectId(), ObjectId()
+    project = {
+        "_id": ObjectId(),
+        "members": [first, default],
+        "settings": {"auto_assign": True, "default_assignee": default},
+        "workload": {}
+    }
+
+    assignee = await WorkloadService.pick_assignee(project)
+    assert assignee == default
+
+
+@pytest.mark.asyncio
+async def test_pick_assignee_without_auto_assign_uses_default():
+    member, outsider = ObjectId(), ObjectId()
+    project = {"_id": ObjectId(), "members": [member],
+               "settings": {"auto_assign": False, "default_assignee": member}}
+    assert await WorkloadService.pick_assignee(project) == member
+
+    project["settings"]["default_assignee"] = outsider
+    assert await WorkloadService.pick_assignee(project) is None
+
+
+@pytest.mark.asyncio
+async def test_pick_assignee_seeds_missing_counters():
+    member = ObjectId()
+    project = {"_id": ObjectId(), "members": [member],
+               "settings": {"auto_assign": True}}
+
+    with patch("app.services.workload_service.db") as mock_db:
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[])
+        mock_db["tasks"].aggregate.return_value = cursor
+        mock_db["projects"].update_one = AsyncMock()
+
+        assignee = await WorkloadService.pick_assignee(project)
+
+    assert assignee == member
+    mock_db["projects"].update_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_apply_change_moves_counters_between_assignees():
+    project_id, old, new = ObjectId(), ObjectId(), ObjectId()
+    before = {"assignee_id": old, "status": "todo", "estimated_hours": 3}
+    after = {"assignee_id": new, "status": "todo", "estimated_hours": 3}
+
+    with patch("app.services.workload_service.db") as mock_db:
+        mock_db["projects"].update_one = AsyncMock()
+        await WorkloadService.apply_change(project_id, before, after)
+
+    query, update = mock_db["projects"].update_one.await_args.args
+    assert query == {"_id": project_id, "workload": {"$exists": True}}
+    assert update["$inc"][f"workload.{old}.open_tasks"] == -1
+    assert update["$inc"][f"workload.{new}.open_tasks"] == 1
+    assert update["$inc"][f"workload.{new}.open_hours"] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_apply_change_ignores_closed_tasks():
+    with patch("app.services.workload_service.db") as mock_db:
+        mock_db["projects"].update_one = AsyncMock()
+        task = {"assignee_id": ObjectId(), "status": "done"}
+        await WorkloadService.apply_change(ObjectId(), task, dict(task))
+
+    mock_db["projects"].update_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_apply_change_bumps_stats_version_in_the_same_write():
+    project_id, old, new = ObjectId(), ObjectId(), ObjectId()
+    before = {"assignee_id": old, "status": "todo", "estimated_hours": 2}
+    after = {"assignee_id": new, "status": "todo", "estimated_hours": 5}
+
+    with patch("app.services.workload_service.db") as mock_db:
+        mock_db["projects"].update_one = AsyncMock()
+        await WorkloadService.apply_change(project_id, before, after, bump_stats_version=True)
+
+    mock_db["projects"].update_one.assert_awaited_once()
+    query, pipeline = mock_db["projects"].update_one.await_args.args
+    assert query == {"_id": project_id}
+    stage = pipeline[0]["$set"]
+    assert stage["stats_version"] == {"$add": [{"$ifNull": ["$stats_version", 0]}, 1]}
+    # Unseeded counters stay missing, seeded ones get the delta merged in
+    missing, absent, merged = stage["workload"]["$cond"]
+    assert missing == {"$eq": [{"$type": "$workload"}, "missing"]}
+    assert absent == "$$REMOVE"
+    counters = merged["$mergeObjects"][1]
+    assert counters[str(old)]["open_tasks"] == {"$add": [{"$ifNull": [f"$workload.{old}.open_tasks", 0]}, -1]}
+    assert counters[str(new)]["open_hours"] == {"$add": [{"$ifNull": [f"$workload.{new}.open_hours", 0]}, 5.0]}
+
+
+@pytest.mark.asyncio
+async def test_apply_change_without_delta_still_bumps_stats_version():
+    project_id = ObjectId()
+    with patch("app.services.workload_service.db") as mock_db:
+        mock_db["projects"].update_one = AsyncMock()
+        task = {"assignee_id": ObjectId(), "status": "done"}
+        await WorkloadService.apply_change(project_id, task, dict(task), bump_stats_version=True)
+
+    mock_db["projects"].update_one.assert_awaited_once_with(
+        {"_id": project_id}, {"$inc": {"stats_version": 1}})